@@ -0,0 +1,299 @@
+"""
+性能基准测试
+测量FK、雅可比、IK、工作空间、轨迹规划和MPC热点路径的延迟分位数和吞吐量，
+结果保存为JSON，并可与基准结果对比以发现性能回退
+
+用法:
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json --threshold 0.2
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import platform
+import time
+
+import numpy as np
+
+from robot_kinematics import ThreeLinkRobot
+from robot_kinematics.path_planning import PathPlanner
+from robot_kinematics.utils import jacobian_matrix
+from dynamics_control import CartDynamics, MPCController
+
+
+def measure(func, min_time=0.2, min_calls=5, max_calls=10000, warmup=2):
+    """
+    重复调用func并记录每次调用的耗时
+
+    参数:
+        func: 无参数的可调用对象
+        min_time: 最少累计测量时间 (秒)
+        min_calls: 最少调用次数
+        max_calls: 最多调用次数
+        warmup: 预热调用次数 (不计入结果)
+
+    返回:
+        每次调用的耗时数组 (秒)
+    """
+    for _ in range(warmup):
+        func()
+
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < max_calls:
+        t0 = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t0)
+        if len(latencies) >= min_calls and time.perf_counter() - start >= min_time:
+            break
+    return np.array(latencies)
+
+
+def summarize(name, size, latencies, items_per_call):
+    """
+    整理单个测试项的统计结果 (时间单位为微秒)
+    """
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        'name': name,
+        'size': size,
+        'calls': len(latencies),
+        'mean_us': float(latencies.mean() * 1e6),
+        'min_us': float(latencies.min() * 1e6),
+        'p50_us': float(p50 * 1e6),
+        'p90_us': float(p90 * 1e6),
+        'p99_us': float(p99 * 1e6),
+        'throughput_per_s': float(items_per_call / np.median(latencies)),
+    }
+
+
+def _random_joint_angles(rng, count, n_joints=3):
+    return rng.uniform(-np.pi, np.pi, size=(count, n_joints))
+
+
+def _random_targets(robot, rng, count):
+    """
+    工作空间内的随机目标点 (由随机关节角度的正运动学得到，保证可达)
+    """
+    _, positions = robot.forward_kinematics_batch(_random_joint_angles(rng, count, robot.n_joints))
+    return positions[:, -1, :2]
+
+
+def benchmark_cases(robot, rng, quick=False):
+    """
+    生成测试项
+
+    返回:
+        (name, size, setup) 列表，setup() 返回 (被测函数, 每次调用处理的数据量)
+    """
+    sizes = [1, 100] if quick else [1, 100, 10000]
+    ik_sizes = [1, 10] if quick else [1, 10, 100]
+    boundary_sizes = [30, 100] if quick else [30, 100, 300]
+    path_sizes = [10, 100] if quick else [10, 100, 1000]
+    spline_sizes = [100, 1000] if quick else [100, 10000, 100000]
+    horizons = [10] if quick else [10, 20, 40]
+    cases = []
+
+    def fk(size):
+        q = _random_joint_angles(rng, size)
+        if size == 1:
+            return lambda: robot.forward_kinematics(q[0]), 1
+        return lambda: robot.forward_kinematics_batch(q), size
+
+    def jac(size):
+        q = _random_joint_angles(rng, size)
+        if size == 1:
+            return lambda: jacobian_matrix(robot, q[0]), 1
+        return lambda: robot.jacobian_batch(q), size
+
+    def ik_optimization(size):
+        targets = _random_targets(robot, rng, size)
+        return lambda: [robot.inverse_kinematics_optimization(t) for t in targets], size
+
+    def ik_jacobian(size):
+        targets = _random_targets(robot, rng, size)
+        return lambda: [robot.inverse_kinematics_jacobian(t) for t in targets], size
+
+    def workspace_boundary(size):
+        # num_points为每个关节的采样数，共 size^2 个构型
+        return lambda: robot.get_workspace_boundary(size), size * size
+
+    waypoints_joint = _random_joint_angles(rng, 4)
+    waypoints_cart = np.column_stack([_random_targets(robot, rng, 4), np.zeros(4)])
+
+    def joint_space(size):
+        return lambda: PathPlanner.interpolate_joint_space(waypoints_joint, num_points=size), size
+
+    def operational_space(size):
+        return lambda: PathPlanner.interpolate_operational_space(
+            waypoints_cart, num_points=size, robot=robot, initial_joint_angles=waypoints_joint[0]
+        ), size
+
+    def spline(size, method):
+        # size为路径点数 (随机游走，相邻点间距约0.01 rad)
+        waypoints = np.cumsum(rng.normal(scale=0.01, size=(size, 3)), axis=0)
+        return lambda: PathPlanner.plan_spline(waypoints, method), size
+
+    def simplify(size):
+        # 密集记录的噪声路径 (鼠标拖动)
+        t = np.linspace(0.0, 1.0, size)
+        points = np.column_stack([3.0 * t, np.sin(6.0 * t) + rng.normal(scale=0.002, size=size)])
+        return lambda: PathPlanner.simplify(points, 0.01), size
+
+    def retime(size):
+        path = PathPlanner.plan_spline(np.cumsum(rng.normal(scale=0.05, size=(size, 3)), axis=0))
+        return lambda: PathPlanner.retime(path, vmax=1.0, amax=2.0), size
+
+    for size in sizes:
+        cases.append(('forward_kinematics', size, lambda size=size: fk(size)))
+        cases.append(('jacobian_matrix', size, lambda size=size: jac(size)))
+    for size in ik_sizes:
+        cases.append(('ik_optimization', size, lambda size=size: ik_optimization(size)))
+        cases.append(('ik_jacobian', size, lambda size=size: ik_jacobian(size)))
+    for size in boundary_sizes:
+        cases.append(('get_workspace_boundary', size, lambda size=size: workspace_boundary(size)))
+    for size in path_sizes:
+        cases.append(('interpolate_joint_space', size, lambda size=size: joint_space(size)))
+        cases.append(('interpolate_operational_space', size, lambda size=size: operational_space(size)))
+    for size in spline_sizes:
+        for method in ('cubic', 'quintic', 'bspline'):
+            cases.append((f'plan_spline_{method}', size, lambda size=size, method=method: spline(size, method)))
+    for size in spline_sizes:
+        cases.append(('simplify', size, lambda size=size: simplify(size)))
+    for size in path_sizes:
+        cases.append(('retime_time_optimal', size, lambda size=size: retime(size)))
+
+    # MPC: 在受约束区域和LQR可行区域交替取状态，覆盖两条求解路径
+    states = np.column_stack([rng.uniform(-8, 8, 64), rng.uniform(-3, 3, 64)])
+    target = np.array([2.0, 0.0])
+    for backend in MPCController.BACKENDS:
+        for horizon in horizons:
+            def mpc(horizon=horizon, backend=backend):
+                controller = MPCController(CartDynamics(), horizon=horizon, dt=0.1, backend=backend)
+                controller.get_control_action(states[0], target)
+                counter = iter(range(10 ** 9))
+                return lambda: controller.get_control_action(states[next(counter) % len(states)], target), 1
+            cases.append((f'mpc_{backend}', horizon, mpc))
+
+    return cases
+
+
+def run_benchmarks(quick=False, min_time=0.2, pattern=None, seed=0):
+    """
+    运行所有测试项
+
+    参数:
+        quick: 只运行较小的问题规模
+        min_time: 每个测试项的最少测量时间 (秒)
+        pattern: 只运行名称包含该字符串的测试项
+        seed: 随机数种子
+
+    返回:
+        包含环境信息和各项结果的字典
+    """
+    rng = np.random.default_rng(seed)
+    robot = ThreeLinkRobot(link_lengths=[1.0, 1.0, 0.5])
+    results = []
+
+    for name, size, setup in benchmark_cases(robot, rng, quick):
+        if pattern is not None and pattern not in name:
+            continue
+        try:
+            func, items = setup()
+            latencies = measure(func, min_time=min_time)
+        except NotImplementedError:
+            print(f"{name:<32}{size:>8}  skipped (not implemented)")
+            continue
+        result = summarize(name, size, latencies, items)
+        results.append(result)
+        print(f"{name:<32}{size:>8}  p50 {result['p50_us']:>12.1f} us  "
+              f"p99 {result['p99_us']:>12.1f} us  {result['throughput_per_s']:>12.0f} /s")
+
+    return {
+        'metadata': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.2, metric='p50_us'):
+    """
+    与基准结果对比
+
+    参数:
+        current: 本次结果 (run_benchmarks的返回值)
+        baseline: 基准结果
+        threshold: 相对变慢超过该比例视为回退
+        metric: 对比的统计量
+
+    返回:
+        回退的测试项列表 [(name, size, baseline值, 当前值, 比值)]
+    """
+    reference = {(r['name'], r['size']): r for r in baseline['results']}
+    regressions = []
+
+    print(f"\n{'name':<32}{'size':>8}{'baseline':>14}{'current':>14}{'ratio':>9}")
+    for result in current['results']:
+        key = (result['name'], result['size'])
+        if key not in reference:
+            continue
+        old, new = reference[key][metric], result[metric]
+        ratio = new / old if old > 0 else float('inf')
+        flag = ''
+        if ratio > 1.0 + threshold:
+            flag = '  REGRESSION'
+            regressions.append((key[0], key[1], old, new, ratio))
+        elif ratio < 1.0 - threshold:
+            flag = '  faster'
+        print(f"{key[0]:<32}{key[1]:>8}{old:>14.1f}{new:>14.1f}{ratio:>9.2f}{flag}")
+
+    return regressions
+
+
+def main():
+    """
+    主函数
+    """
+    parser = argparse.ArgumentParser(description='Robot kinematics and MPC benchmarks')
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown reported as a regression (default 0.2)')
+    parser.add_argument('--metric', default='p50_us', help='statistic to compare (default p50_us)')
+    parser.add_argument('--quick', action='store_true', help='only run the small problem sizes')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per case')
+    parser.add_argument('--filter', help='only run cases whose name contains this string')
+    args = parser.parse_args()
+
+    print("Benchmarks")
+    print("=" * 50)
+    current = run_benchmarks(quick=args.quick, min_time=args.min_time, pattern=args.filter)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold, args.metric)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@
 """
 
 from .mpc_controller import MPCController
-from .cart_dynamics import CartDynamics
+from .cart_dynamics import CartDynamics, NonlinearCartDynamics
+from .telemetry import SolverTelemetry
 
-__all__ = ['MPCController', 'CartDynamics'] 
\ No newline at end of file
+__all__ = ['MPCController', 'CartDynamics', 'NonlinearCartDynamics', 'SolverTelemetry'] 
\ No newline at end of file
@@ -3,8 +3,12 @@
 包含状态方程和观测方程
 """
 
+from collections import OrderedDict
+
 import numpy as np
-from scipy.integrate import odeint
+from scipy.integrate import solve_ivp
+from scipy.linalg import expm
+from scipy.signal import lfilter
 
 
 class CartDynamics:
@@ -14,13 +18,16 @@ class CartDynamics:
     控制输入: 力
     """
     
-    def __init__(self, mass=1.0, damping=0.1):
+    INTEGRATORS = ('euler', 'rk4', 'zoh', 'solve_ivp')
+    
+    def __init__(self, mass=1.0, damping=0.1, linearization_cache_size=256):
         """
         初始化小车动力学模型
         
         参数:
             mass: 小车质量 (kg)
             damping: 阻尼系数 (N/(m/s))
+            linearization_cache_size: 线性化结果LRU缓存的容量
         """
         self.mass = mass
         self.damping = damping
@@ -39,6 +46,19 @@ class CartDynamics:
             [0],
             [1/mass]
         ])
+        
+        # 动力学关于状态和输入是线性的 (dynamics = A x + B u)，
+        # 此时euler/rk4/zoh离散化都可以化为矩阵形式并整段向量化仿真
+        self.is_linear = True
+        
+        # 离散系统矩阵缓存，键为 (method, dt)
+        self._discrete_cache = {}
+        
+        # 线性化结果LRU缓存，键为 (state, control, dt, method)
+        self.linearization_cache_size = linearization_cache_size
+        self._linearization_cache = OrderedDict()
+        self._linearization_hits = 0
+        self._linearization_misses = 0
     
     def dynamics(self, state, t, control):
         """
@@ -64,105 +84,403 @@ class CartDynamics:
         
         return [velocity, acceleration]
     
-    def discrete_dynamics(self, state, control, dt):
+    def dynamics_batch(self, states, controls):
         """
-        离散时间动力学方程 (使用欧拉积分)
+        批量连续时间动力学方程
+        
+        参数:
+            states: 状态数组，形状 (M, n_states)
+            controls: 控制输入数组，形状 (M, n_inputs)
+        
+        返回:
+            状态导数，形状 (M, n_states)
+        """
+        states = np.asarray(states, dtype=float)
+        controls = np.asarray(controls, dtype=float)
+        velocity = states[:, 1]
+        force = controls[:, 0]
+        
+        derivatives = np.empty_like(states)
+        derivatives[:, 0] = velocity
+        derivatives[:, 1] = (force - self.damping * velocity) / self.mass
+        return derivatives
+    
+    def discretize(self, dt, method='zoh'):
+        """
+        线性系统的离散化 x[k+1] = Ad x[k] + Bd u[k] (控制输入在步长内保持不变)
+        
+        参数:
+            dt: 时间步长
+            method: 'euler' (一阶), 'rk4' (四阶), 'zoh' (矩阵指数精确离散)
+        
+        返回:
+            Ad, Bd: 离散系统矩阵 (按 (method, dt) 缓存)
+        """
+        if not self.is_linear:
+            raise ValueError("非线性模型请使用linearize_discrete在工作点处离散化")
+        
+        key = (method, dt)
+        if key in self._discrete_cache:
+            return self._discrete_cache[key]
+        
+        n, m = self.n_states, self.n_inputs
+        if method == 'euler':
+            Ad = np.eye(n) + self.A * dt
+            Bd = self.B * dt
+        elif method == 'rk4':
+            # 线性系统上的RK4等价于指数矩阵的四阶泰勒展开
+            Ah = self.A * dt
+            Ah2 = Ah @ Ah
+            Ah3 = Ah2 @ Ah
+            Ad = np.eye(n) + Ah + Ah2 / 2 + Ah3 / 6 + Ah3 @ Ah / 24
+            Bd = (np.eye(n) + Ah / 2 + Ah2 / 6 + Ah3 / 24) @ self.B * dt
+        elif method == 'zoh':
+            # exp([[A, B], [0, 0]] dt) = [[Ad, Bd], [0, I]]
+            M = np.zeros((n + m, n + m))
+            M[:n, :n] = self.A
+            M[:n, n:] = self.B
+            expM = expm(M * dt)
+            Ad = expM[:n, :n]
+            Bd = expM[:n, n:]
+        else:
+            raise ValueError(f"无法离散化的积分方法: {method}")
+        
+        self._discrete_cache[key] = (Ad, Bd)
+        return Ad, Bd
+    
+    def discrete_dynamics(self, state, control, dt, method='euler'):
+        """
+        离散时间动力学方程
         
         参数:
             state: 当前状态 [位置, 速度]
             control: 控制输入 [力]
             dt: 时间步长
+            method: 积分方法
+                'euler': 欧拉积分 x[k+1] = x[k] + dt * dx/dt
+                'rk4': 四阶龙格-库塔
+                'zoh': 零阶保持精确离散 (仅线性模型)
+                'solve_ivp': 自适应步长积分
         
         返回:
             下一时刻状态 [位置, 速度]
         """
-        # TODO: 需要实现这个函数
-        # 提示: 使用欧拉积分方法 x[k+1] = x[k] + dt * dx/dt
+        state = np.asarray(state, dtype=float)
+        
+        if method == 'euler':
+            # 计算状态导数
+            state_derivative = self.dynamics(state, 0, control)
+            
+            # 欧拉积分
+            return state + dt * np.asarray(state_derivative)
+        
+        if method == 'rk4':
+            k1 = np.asarray(self.dynamics(state, 0, control))
+            k2 = np.asarray(self.dynamics(state + dt / 2 * k1, dt / 2, control))
+            k3 = np.asarray(self.dynamics(state + dt / 2 * k2, dt / 2, control))
+            k4 = np.asarray(self.dynamics(state + dt * k3, dt, control))
+            return state + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        
+        if method == 'zoh':
+            if not self.is_linear:
+                raise ValueError("zoh离散化仅适用于线性模型")
+            Ad, Bd = self.discretize(dt, 'zoh')
+            return Ad @ state + Bd @ np.asarray(control, dtype=float)
+        
+        if method == 'solve_ivp':
+            solution = solve_ivp(
+                lambda t, x: self.dynamics(x, t, control), (0, dt), state,
+                rtol=1e-8, atol=1e-10
+            )
+            return solution.y[:, -1]
         
-        # 计算状态导数
-        state_derivative = self.dynamics(state, 0, control)
+        raise ValueError(f"未知的积分方法: {method}，可选: {self.INTEGRATORS}")
+    
+    def _control_array(self, control_sequence, n_intervals):
+        """
+        将控制序列整理为形状 (n_intervals, n_inputs) 的数组，超出序列长度的部分为0
+        """
+        controls = np.zeros((n_intervals, self.n_inputs))
+        control_sequence = np.asarray(control_sequence, dtype=float).reshape(-1, self.n_inputs)
+        n_controls = min(len(control_sequence), n_intervals)
+        controls[:n_controls] = control_sequence[:n_controls]
+        return controls
+    
+    @staticmethod
+    def _propagate_linear(initial_state, controls, Ad, Bd):
+        """
+        整段计算线性递推 x[k+1] = Ad x[k] + Bd u[k]
         
-        # 欧拉积分
-        next_state = np.array(state) + dt * np.array(state_derivative)
+        Ad可对角化时在模态坐标下每个分量都是一阶递推 z[k+1] = λ z[k] + w[k]，
+        用lfilter一次性完成；否则退回逐步矩阵乘法。
         
-        return next_state
+        返回:
+            形状 (K+1, n_states) 的状态序列
+        """
+        n_steps = len(controls)
+        states = np.zeros((n_steps + 1, len(initial_state)))
+        states[0] = initial_state
+        if n_steps == 0:
+            return states
+        
+        eigvals, V = np.linalg.eig(Ad)
+        if np.linalg.cond(V) < 1e8:
+            V_inv = np.linalg.inv(V)
+            z0 = V_inv @ initial_state
+            w = controls @ (V_inv @ Bd).T
+            z = np.empty((n_steps, len(eigvals)), dtype=complex)
+            for i, lam in enumerate(eigvals):
+                z[:, i] = lfilter([1.0], [1.0, -lam], w[:, i], zi=[lam * z0[i]])[0]
+            states[1:] = np.real(z @ V.T)
+        else:
+            inputs = controls @ Bd.T
+            for k in range(n_steps):
+                states[k + 1] = Ad @ states[k] + inputs[k]
+        
+        return states
     
-    def simulate(self, initial_state, control_sequence, dt, t_span):
+    def simulate(self, initial_state, control_sequence, dt, t_span, method='euler'):
         """
         模拟小车运动
         
         参数:
             initial_state: 初始状态 [位置, 速度]
-            control_sequence: 控制序列
+            control_sequence: 控制序列 (每个时间步内保持不变)
             dt: 时间步长
             t_span: 时间范围 [t_start, t_end]
+            method: 积分方法 ('euler', 'rk4', 'zoh', 'solve_ivp')
+                线性模型的euler/rk4/zoh整段向量化计算；
+                solve_ivp在每个步长内做一次自适应积分
         
         返回:
             time_array: 时间数组
             state_history: 状态历史
         """
-        # TODO: 需要实现这个函数
-        # 提示: 使用scipy.integrate.odeint或手动积分
+        if method not in self.INTEGRATORS:
+            raise ValueError(f"未知的积分方法: {method}，可选: {self.INTEGRATORS}")
         
         t_start, t_end = t_span
         time_array = np.arange(t_start, t_end + dt, dt)
         n_steps = len(time_array)
+        initial_state = np.asarray(initial_state, dtype=float)
+        controls = self._control_array(control_sequence, n_steps - 1)
         
+        if self.is_linear and method != 'solve_ivp':
+            Ad, Bd = self.discretize(dt, method)
+            return time_array, self._propagate_linear(initial_state, controls, Ad, Bd)
+        
+        # 非线性模型或solve_ivp逐步积分 (控制在步长边界处跳变，按步长分段积分)
         state_history = np.zeros((n_steps, self.n_states))
         state_history[0] = initial_state
-        
-        # 手动积分
         for i in range(1, n_steps):
-            if i < len(control_sequence):
-                control = control_sequence[i-1]
-            else:
-                control = [0]  # 如果没有控制输入，设为0
-            
             state_history[i] = self.discrete_dynamics(
-                state_history[i-1], control, dt
+                state_history[i-1], controls[i-1], dt, method
+            )
+        
+        return time_array, state_history
+    
+    def simulate_batch(self, initial_states, control_sequences, dt, t_span, method='euler'):
+        """
+        批量模拟多辆小车 (所有小车按相同时间步同步推进)
+        
+        参数:
+            initial_states: 初始状态，形状 (M, n_states)
+            control_sequences: 控制序列，形状 (T, n_inputs) (所有小车共用)
+                               或 (M, T, n_inputs)
+            dt: 时间步长
+            t_span: 时间范围 [t_start, t_end]
+            method: 积分方法 ('euler', 'rk4', 'zoh')
+        
+        返回:
+            time_array: 时间数组
+            state_history: 状态历史，形状 (M, n_steps, n_states)
+        """
+        initial_states = np.atleast_2d(np.asarray(initial_states, dtype=float))
+        n_carts = initial_states.shape[0]
+        
+        control_sequences = np.asarray(control_sequences, dtype=float)
+        if control_sequences.ndim == 2:
+            control_sequences = np.broadcast_to(
+                control_sequences, (n_carts,) + control_sequences.shape
             )
         
+        t_start, t_end = t_span
+        time_array = np.arange(t_start, t_end + dt, dt)
+        n_steps = len(time_array)
+        
+        state_history = np.zeros((n_carts, n_steps, self.n_states))
+        state_history[:, 0] = initial_states
+        
+        # 超出控制序列长度的时间步控制输入为0
+        n_controls = min(control_sequences.shape[1], n_steps - 1)
+        controls = np.zeros((n_carts, n_steps - 1, self.n_inputs))
+        controls[:, :n_controls] = control_sequences[:, :n_controls]
+        
+        if self.is_linear and method in ('euler', 'rk4', 'zoh'):
+            Ad, Bd = self.discretize(dt, method)
+            inputs = controls @ Bd.T
+            for i in range(1, n_steps):
+                state_history[:, i] = state_history[:, i - 1] @ Ad.T + inputs[:, i - 1]
+            return time_array, state_history
+        
+        for i in range(1, n_steps):
+            x = state_history[:, i - 1]
+            u = controls[:, i - 1]
+            if method == 'euler':
+                state_history[:, i] = x + dt * self.dynamics_batch(x, u)
+            elif method == 'rk4':
+                k1 = self.dynamics_batch(x, u)
+                k2 = self.dynamics_batch(x + dt / 2 * k1, u)
+                k3 = self.dynamics_batch(x + dt / 2 * k2, u)
+                k4 = self.dynamics_batch(x + dt * k3, u)
+                state_history[:, i] = x + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+            else:
+                raise ValueError(f"批量仿真不支持的积分方法: {method}")
+        
         return time_array, state_history
     
+    def jacobians(self, state, control):
+        """
+        动力学方程的解析雅可比矩阵
+        
+        子类重写dynamics时应同时重写本方法；没有解析形式时返回None，
+        linearize会退回有限差分。
+        
+        参数:
+            state: 状态
+            control: 控制输入
+        
+        返回:
+            A_lin: df/dx，形状 (n_states, n_states)
+            B_lin: df/du，形状 (n_states, n_inputs)
+        """
+        return self.A.copy(), self.B.copy()
+    
+    def _finite_difference_jacobians(self, state, control, epsilon=1e-6):
+        """
+        前向差分雅可比矩阵 (所有扰动点一次批量计算)
+        """
+        n, m = self.n_states, self.n_inputs
+        states = np.tile(state, (n + m + 1, 1))
+        controls = np.tile(control, (n + m + 1, 1))
+        states[1:n + 1] += epsilon * np.eye(n)
+        controls[n + 1:] += epsilon * np.eye(m)
+        
+        derivatives = self.dynamics_batch(states, controls)
+        jacobian = ((derivatives[1:] - derivatives[0]) / epsilon).T
+        return jacobian[:, :n], jacobian[:, n:]
+    
+    def _cached_linearization(self, key, compute):
+        """
+        按key查找线性化缓存，未命中时调用compute计算并按LRU淘汰
+        """
+        cache = self._linearization_cache
+        if key in cache:
+            cache.move_to_end(key)
+            self._linearization_hits += 1
+            return cache[key]
+        
+        self._linearization_misses += 1
+        result = compute()
+        for matrix in result:
+            # 缓存结果被多处共享，设为只读防止被调用方修改
+            matrix.setflags(write=False)
+        cache[key] = result
+        if len(cache) > self.linearization_cache_size:
+            cache.popitem(last=False)
+        return result
+    
+    def linearization_cache_info(self):
+        """
+        线性化缓存统计
+        
+        返回:
+            包含 hits, misses, size, maxsize 的字典
+        """
+        return {
+            'hits': self._linearization_hits,
+            'misses': self._linearization_misses,
+            'size': len(self._linearization_cache),
+            'maxsize': self.linearization_cache_size,
+        }
+    
+    def clear_linearization_cache(self):
+        """
+        清空线性化缓存 (修改模型参数后需要调用)
+        """
+        self._linearization_cache.clear()
+        self._discrete_cache.clear()
+        self._linearization_hits = 0
+        self._linearization_misses = 0
+    
     def linearize(self, state_eq, control_eq):
         """
-        在平衡点附近线性化系统
+        在工作点附近线性化系统
+        
+        优先使用jacobians给出的解析雅可比矩阵，否则使用有限差分。
+        结果按 (state, control) 缓存，返回的矩阵为只读。
         
         参数:
-            state_eq: 平衡状态 [位置, 速度]
-            control_eq: 平衡控制输入 [力]
+            state_eq: 工作点状态 [位置, 速度]
+            control_eq: 工作点控制输入 [力]
         
         返回:
             A_lin, B_lin: 线性化后的系统矩阵
         """
-        # TODO: 需要实现这个函数
-        # 提示: 使用数值微分计算雅可比矩阵
+        state_eq = np.asarray(state_eq, dtype=float)
+        control_eq = np.asarray(control_eq, dtype=float)
+        key = (tuple(state_eq.tolist()), tuple(control_eq.tolist()), None, None)
         
-        epsilon = 1e-6
+        def compute():
+            jacobians = self.jacobians(state_eq, control_eq)
+            if jacobians is None:
+                jacobians = self._finite_difference_jacobians(state_eq, control_eq)
+            return tuple(np.array(matrix, dtype=float) for matrix in jacobians)
         
-        # 计算A矩阵 (状态雅可比)
-        A_lin = np.zeros((self.n_states, self.n_states))
-        for i in range(self.n_states):
-            state_perturbed = state_eq.copy()
-            state_perturbed[i] += epsilon
-            
-            deriv_original = self.dynamics(state_eq, 0, control_eq)
-            deriv_perturbed = self.dynamics(state_perturbed, 0, control_eq)
-            
-            A_lin[:, i] = (np.array(deriv_perturbed) - np.array(deriv_original)) / epsilon
+        return self._cached_linearization(key, compute)
+    
+    def linearize_discrete(self, state, control, dt, method='zoh'):
+        """
+        在工作点附近线性化并离散化
+        
+        连续模型 dx/dt ≈ A x + B u + g，g = f(x0, u0) - A x0 - B u0，
+        离散为 x[k+1] ≈ Ad x[k] + Bd u[k] + c。
+        结果按 (state, control, dt, method) 缓存，返回的矩阵为只读。
         
-        # 计算B矩阵 (控制雅可比)
-        B_lin = np.zeros((self.n_states, self.n_inputs))
-        for i in range(self.n_inputs):
-            control_perturbed = control_eq.copy()
-            control_perturbed[i] += epsilon
+        参数:
+            state: 工作点状态
+            control: 工作点控制输入
+            dt: 时间步长
+            method: 'euler' 或 'zoh' (增广矩阵指数，含仿射项的精确离散)
+        
+        返回:
+            Ad, Bd, c: 离散系统矩阵和仿射项
+        """
+        if method not in ('euler', 'zoh'):
+            raise ValueError(f"无法离散化的积分方法: {method}")
+        
+        state = np.asarray(state, dtype=float)
+        control = np.asarray(control, dtype=float)
+        key = (tuple(state.tolist()), tuple(control.tolist()), dt, method)
+        
+        def compute():
+            A_lin, B_lin = self.linearize(state, control)
+            derivative = self.dynamics_batch(state[np.newaxis, :], control[np.newaxis, :])[0]
+            g = derivative - A_lin @ state - B_lin @ control
             
-            deriv_original = self.dynamics(state_eq, 0, control_eq)
-            deriv_perturbed = self.dynamics(state_eq, 0, control_perturbed)
+            n, m = self.n_states, self.n_inputs
+            if method == 'euler':
+                return np.eye(n) + A_lin * dt, B_lin * dt, g * dt
             
-            B_lin[:, i] = (np.array(deriv_perturbed) - np.array(deriv_original)) / epsilon
+            # exp([[A, B, g], [0, 0, 0], [0, 0, 0]] dt) = [[Ad, Bd, c], [0, I, 0], [0, 0, 1]]
+            M = np.zeros((n + m + 1, n + m + 1))
+            M[:n, :n] = A_lin
+            M[:n, n:n + m] = B_lin
+            M[:n, -1] = g
+            expM = expm(M * dt)
+            return expM[:n, :n], expM[:n, n:n + m], expM[:n, -1]
         
-        return A_lin, B_lin
+        return self._cached_linearization(key, compute)
     
     def get_equilibrium_point(self, target_position):
         """
@@ -183,4 +501,122 @@ class CartDynamics:
         # 在平衡点，力应该抵消阻尼力
         control_eq = [0]  # 如果速度为0，则不需要力
         
-        return state_eq, control_eq 
\ No newline at end of file
+        return state_eq, control_eq
+
+
+class NonlinearCartDynamics(CartDynamics):
+    """
+    带库仑摩擦和执行器饱和的一维小车
+    
+        m a = F_max tanh(u / F_max) - b v - F_c tanh(v / v_s)
+    
+    库仑摩擦用tanh平滑 (v_s为平滑速度)，执行器输出力平滑饱和于 ±F_max。
+    A、B取静止点 (v=0, u=0) 处的线性化，供线性MPC使用；
+    LTV模式下MPCController沿预测轨迹逐点重新线性化。
+    """
+    
+    def __init__(self, mass=1.0, damping=0.1, coulomb_friction=0.5, friction_smoothing=0.05,
+                 force_limit=4.0, linearization_cache_size=256):
+        """
+        初始化非线性小车模型
+        
+        参数:
+            mass: 小车质量 (kg)
+            damping: 粘性阻尼系数 (N/(m/s))
+            coulomb_friction: 库仑摩擦力 F_c (N)
+            friction_smoothing: 摩擦平滑速度 v_s (m/s)
+            force_limit: 执行器最大输出力 F_max (N)，None表示不饱和
+            linearization_cache_size: 线性化结果LRU缓存的容量
+        """
+        super().__init__(mass, damping, linearization_cache_size)
+        self.coulomb_friction = coulomb_friction
+        self.friction_smoothing = friction_smoothing
+        self.force_limit = force_limit
+        self.is_linear = False
+        
+        self.A, self.B = self.jacobians(np.zeros(self.n_states), np.zeros(self.n_inputs))
+    
+    def _applied_force(self, force):
+        """
+        执行器输出力及其对指令的导数
+        """
+        if self.force_limit is None:
+            return force, np.ones_like(force)
+        saturation = np.tanh(force / self.force_limit)
+        return self.force_limit * saturation, 1.0 - saturation ** 2
+    
+    def _friction(self, velocity):
+        """
+        摩擦力 (粘性 + 库仑) 及其对速度的导数
+        """
+        smooth_sign = np.tanh(velocity / self.friction_smoothing)
+        friction = self.damping * velocity + self.coulomb_friction * smooth_sign
+        d_friction = self.damping + self.coulomb_friction / self.friction_smoothing * (1.0 - smooth_sign ** 2)
+        return friction, d_friction
+    
+    def dynamics(self, state, t, control):
+        """
+        连续时间动力学方程
+        
+        参数:
+            state: 当前状态 [位置, 速度]
+            t: 时间
+            control: 控制输入 [力]
+        
+        返回:
+            状态导数 [位置导数, 速度导数]
+        """
+        position, velocity = state
+        force, _ = self._applied_force(np.float64(control[0]))
+        friction, _ = self._friction(np.float64(velocity))
+        
+        acceleration = (force - friction) / self.mass
+        
+        return [velocity, float(acceleration)]
+    
+    def dynamics_batch(self, states, controls):
+        """
+        批量连续时间动力学方程
+        
+        参数:
+            states: 状态数组，形状 (M, n_states)
+            controls: 控制输入数组，形状 (M, n_inputs)
+        
+        返回:
+            状态导数，形状 (M, n_states)
+        """
+        states = np.asarray(states, dtype=float)
+        controls = np.asarray(controls, dtype=float)
+        velocity = states[:, 1]
+        force, _ = self._applied_force(controls[:, 0])
+        friction, _ = self._friction(velocity)
+        
+        derivatives = np.empty_like(states)
+        derivatives[:, 0] = velocity
+        derivatives[:, 1] = (force - friction) / self.mass
+        return derivatives
+    
+    def jacobians(self, state, control):
+        """
+        动力学方程的解析雅可比矩阵
+        
+        参数:
+            state: 状态
+            control: 控制输入
+        
+        返回:
+            A_lin: df/dx，形状 (n_states, n_states)
+            B_lin: df/du，形状 (n_states, n_inputs)
+        """
+        _, d_force = self._applied_force(np.float64(control[0]))
+        _, d_friction = self._friction(np.float64(state[1]))
+        
+        A_lin = np.array([
+            [0.0, 1.0],
+            [0.0, -d_friction / self.mass]
+        ])
+        B_lin = np.array([
+            [0.0],
+            [d_force / self.mass]
+        ])
+        return A_lin, B_lin
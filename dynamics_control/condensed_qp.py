@@ -0,0 +1,125 @@
+"""
+稠密(凝聚)形式的线性MPC二次规划
+消去状态变量，只保留控制序列作为决策变量，直接调用OSQP底层接口求解
+"""
+
+import numpy as np
+import scipy.sparse as sparse
+import osqp
+
+
+class CondensedMPCQP:
+    """
+    凝聚形式的线性MPC问题
+
+    预测方程 X = Sx x0 + Su U，其中 X = [x1; ...; xN]，U = [u0; ...; u(N-1)]。
+    代价 sum_k (x_k - r)^T Q (x_k - r) + u_k^T R u_k 化为
+        0.5 U^T H U + f(x0, r)^T U
+    H、约束矩阵只依赖于模型和权重，构建一次；
+    每步只需更新线性项f和约束上下界。
+    """
+
+    def __init__(self, Ad, Bd, horizon, Q, R, eps_abs=1e-5, eps_rel=1e-5):
+        """
+        构建QP矩阵并完成OSQP初始化
+
+        参数:
+            Ad, Bd: 离散系统矩阵
+            horizon: 预测时域长度
+            Q: 状态误差权重矩阵
+            R: 控制输入权重矩阵
+            eps_abs, eps_rel: OSQP收敛容差
+        """
+        self.Ad = np.asarray(Ad, dtype=float)
+        self.Bd = np.asarray(Bd, dtype=float)
+        self.horizon = horizon
+        self.n_states, self.n_inputs = self.Bd.shape
+        n, m, N = self.n_states, self.n_inputs, horizon
+
+        # 预测矩阵: x_k = Ad^k x0 + sum_j Ad^(k-1-j) Bd u_j
+        powers = [np.eye(n)]
+        for _ in range(N):
+            powers.append(self.Ad @ powers[-1])
+        self.Sx = np.vstack(powers[1:])
+        self.Su = np.zeros((N * n, N * m))
+        for k in range(N):
+            for j in range(k + 1):
+                self.Su[k * n:(k + 1) * n, j * m:(j + 1) * m] = powers[k - j] @ self.Bd
+
+        Q_bar = np.kron(np.eye(N), Q)
+        R_bar = np.kron(np.eye(N), R)
+        self._SuT_Qbar = self.Su.T @ Q_bar
+
+        # 0.5 U^T H U (OSQP约定)，对应原代价 U^T (Su^T Qbar Su + Rbar) U
+        H = 2.0 * (self._SuT_Qbar @ self.Su + R_bar)
+        self.H = (H + H.T) / 2
+
+        # 约束: 控制上下界 + 预测状态上下界
+        self.A_con = np.vstack([np.eye(N * m), self.Su])
+
+        self.solver = osqp.OSQP()
+        self.solver.setup(
+            sparse.triu(sparse.csc_matrix(self.H), format='csc'),
+            np.zeros(N * m),
+            sparse.csc_matrix(self.A_con),
+            -np.inf * np.ones(self.A_con.shape[0]),
+            np.inf * np.ones(self.A_con.shape[0]),
+            eps_abs=eps_abs,
+            eps_rel=eps_rel,
+            warm_start=True,
+            polish=False,
+            verbose=False,
+        )
+
+    def linear_term(self, x0, x_ref):
+        """
+        代价线性项 f = 2 Su^T Qbar (Sx x0 - R_ref)
+        """
+        ref = np.tile(x_ref, self.horizon)
+        return 2.0 * self._SuT_Qbar @ (self.Sx @ x0 - ref)
+
+    def bounds(self, x0, u_min, u_max, x_min, x_max):
+        """
+        约束上下界 l <= A U <= u
+        """
+        N = self.horizon
+        free = self.Sx @ x0
+        lower = np.concatenate([np.tile(u_min, N), np.tile(x_min, N) - free])
+        upper = np.concatenate([np.tile(u_max, N), np.tile(x_max, N) - free])
+        return lower, upper
+
+    def solve_raw(self, x0, x_ref, u_min, u_max, x_min, x_max):
+        """
+        更新线性项和约束上下界后求解，返回OSQP原始结果 (含对偶变量y)
+        """
+        x0 = np.asarray(x0, dtype=float)
+        lower, upper = self.bounds(x0, u_min, u_max, x_min, x_max)
+        self.solver.update(q=self.linear_term(x0, x_ref), l=lower, u=upper)
+        return self.solver.solve()
+
+    def solve(self, x0, x_ref, u_min, u_max, x_min, x_max):
+        """
+        求解一步MPC
+
+        参数:
+            x0: 当前状态
+            x_ref: 目标状态
+            u_min, u_max: 控制约束 (长度为n_inputs)
+            x_min, x_max: 状态约束 (长度为n_states)
+
+        返回:
+            optimal_control: 形状 (n_inputs, horizon)，求解失败时为None
+            optimal_states: 形状 (n_states, horizon+1)，求解失败时为None
+            info: OSQP求解信息
+        """
+        x0 = np.asarray(x0, dtype=float)
+        result = self.solve_raw(x0, x_ref, u_min, u_max, x_min, x_max)
+
+        if result.info.status != 'solved':
+            return None, None, result.info
+
+        U = result.x
+        X = self.Sx @ x0 + self.Su @ U
+        optimal_control = U.reshape(self.horizon, self.n_inputs).T
+        optimal_states = np.column_stack([x0, X.reshape(self.horizon, self.n_states).T])
+        return optimal_control, optimal_states, result.info
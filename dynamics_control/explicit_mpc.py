@@ -0,0 +1,150 @@
+"""
+显式MPC
+离线求出分段仿射控制律并按网格索引存储，在线只需查表和一次矩阵乘法
+"""
+
+import numpy as np
+
+
+class ExplicitMPCLaw:
+    """
+    网格索引的分段仿射MPC控制律
+
+    线性MPC的最优首步控制 u0(x) 是状态的分段仿射函数，每个仿射区域对应一组有效约束。
+    离线时在每个网格单元中心求解一次QP，由其有效约束集的KKT方程
+        [H  G^T] [U     ]   [-(F x + c)]
+        [G  0  ] [lambda] = [ b0 + E x ]
+    得到该单元内的仿射律 u0 = K x + k。在线时按状态算出单元下标即可。
+
+    单元完全落在一个仿射区域内时结果与在线QP一致；
+    跨越区域边界的单元为近似解，加密网格可减小误差。
+    单元中心的QP无解 (例如状态约束下不可行) 时该单元标记为无效，
+    查表不返回控制，由调用方改为在线求解。
+    """
+
+    def __init__(self, qp, x_ref, u_min, u_max, x_min, x_max, grid_shape=(41, 41), active_tol=1e-5):
+        """
+        离线计算控制律
+
+        参数:
+            qp: CondensedMPCQP 对象
+            x_ref: 目标状态
+            u_min, u_max: 控制约束 (长度为n_inputs)
+            x_min, x_max: 状态约束，同时作为网格覆盖的状态区域
+            grid_shape: 每个状态维度上的网格数
+            active_tol: 判断约束有效的对偶变量/松弛量阈值
+        """
+        n, m, N = qp.n_states, qp.n_inputs, qp.horizon
+        self.n_states = n
+        self.n_inputs = m
+        self.x_ref = np.asarray(x_ref, dtype=float)
+        self.u_min = np.asarray(u_min, dtype=float)
+        self.u_max = np.asarray(u_max, dtype=float)
+        self.lower = np.asarray(x_min, dtype=float)
+        self.upper = np.asarray(x_max, dtype=float)
+        self.grid_shape = tuple(grid_shape)
+        if len(self.grid_shape) != n:
+            raise ValueError(f"grid_shape的长度应为状态维度{n}")
+        self.cell_size = (self.upper - self.lower) / np.array(self.grid_shape)
+
+        # 线性项 f = F x + c，约束上下界 = bound0 + E x
+        F = 2.0 * qp._SuT_Qbar @ qp.Sx
+        c = -2.0 * qp._SuT_Qbar @ np.tile(self.x_ref, N)
+        lower0 = np.concatenate([np.tile(self.u_min, N), np.tile(self.lower, N)])
+        upper0 = np.concatenate([np.tile(self.u_max, N), np.tile(self.upper, N)])
+        E = np.vstack([np.zeros((N * m, n)), -qp.Sx])
+
+        self.gains = np.zeros(self.grid_shape + (m, n))
+        self.offsets = np.zeros(self.grid_shape + (m,))
+        self.valid = np.zeros(self.grid_shape, dtype=bool)
+        self.n_failed = 0
+
+        for index in np.ndindex(*self.grid_shape):
+            center = self.lower + (np.array(index) + 0.5) * self.cell_size
+            result = qp.solve_raw(center, self.x_ref, self.u_min, self.u_max, self.lower, self.upper)
+            if result.info.status != 'solved':
+                # 该单元中心不可行，标记为无效
+                self.n_failed += 1
+                continue
+
+            # 有效约束: 对偶变量非零且约束取等
+            constraint_value = qp.A_con @ result.x
+            lower_bound, upper_bound = qp.bounds(center, self.u_min, self.u_max, self.lower, self.upper)
+            upper_active = (result.y > active_tol) & (upper_bound - constraint_value < active_tol)
+            lower_active = (result.y < -active_tol) & (constraint_value - lower_bound < active_tol)
+            active = upper_active | lower_active
+
+            G = qp.A_con[active]
+            n_active = G.shape[0]
+            kkt = np.block([
+                [qp.H, G.T],
+                [G, np.zeros((n_active, n_active))],
+            ])
+            rhs_const = np.concatenate([-c, np.where(upper_active, upper0, lower0)[active]])
+            rhs_linear = np.vstack([-F, E[active]])
+
+            solution = np.linalg.lstsq(kkt, np.column_stack([rhs_const, rhs_linear]), rcond=None)[0]
+            self.offsets[index] = solution[:m, 0]
+            self.gains[index] = solution[:m, 1:]
+            self.valid[index] = True
+
+        # 单点查表使用的纯Python副本 (小规模运算时避免numpy调用开销)
+        self._table = list(zip(
+            self.gains.reshape(-1, m, n).tolist(), self.offsets.reshape(-1, m).tolist(),
+            self.valid.ravel().tolist()
+        ))
+        self._lookup = list(zip(
+            self.lower.tolist(), self.cell_size.tolist(), self.grid_shape
+        ))
+        self._u_bounds = list(zip(self.u_min.tolist(), self.u_max.tolist()))
+
+    def _cell_index(self, states):
+        """
+        状态所在的网格单元下标 (区域外的状态使用边界单元)
+        """
+        index = np.floor((states - self.lower) / self.cell_size).astype(int)
+        return np.clip(index, 0, np.array(self.grid_shape) - 1)
+
+    def evaluate(self, state):
+        """
+        查表计算控制动作
+
+        参数:
+            state: 当前状态
+
+        返回:
+            control_action: 控制动作，形状 (n_inputs,)；状态所在单元无效时为None
+        """
+        state = np.asarray(state, dtype=float).tolist()
+
+        # 行优先展开的单元下标
+        flat_index = 0
+        for value, (low, size, count) in zip(state, self._lookup):
+            i = min(max(int((value - low) // size), 0), count - 1)
+            flat_index = flat_index * count + i
+
+        gains, offsets, valid = self._table[flat_index]
+        if not valid:
+            return None
+        control = [
+            min(max(offset + sum(g * x for g, x in zip(gain_row, state)), u_lo), u_hi)
+            for gain_row, offset, (u_lo, u_hi) in zip(gains, offsets, self._u_bounds)
+        ]
+        return np.array(control)
+
+    def evaluate_batch(self, states):
+        """
+        批量查表计算控制动作
+
+        参数:
+            states: 状态数组，形状 (M, n_states)
+
+        返回:
+            控制动作，形状 (M, n_inputs)；所在单元无效的行为NaN
+        """
+        states = np.asarray(states, dtype=float)
+        index = tuple(self._cell_index(states).T)
+        controls = np.einsum('kij,kj->ki', self.gains[index], states) + self.offsets[index]
+        controls = np.clip(controls, self.u_min, self.u_max)
+        controls[~self.valid[index]] = np.nan
+        return controls
@@ -0,0 +1,105 @@
+"""
+有限时域LQR
+无约束线性MPC问题的Riccati闭式解
+"""
+
+import numpy as np
+
+
+class FiniteHorizonLQR:
+    """
+    有限时域LQR跟踪控制器
+
+    以误差 e = x - r 表示，常值目标r下的离散模型为
+        e[k+1] = Ad e[k] + Bd u[k] + d,    d = (Ad - I) r
+    代价与MPC相同: sum_{k=0}^{N} e_k^T Q e_k + sum_{k=0}^{N-1} u_k^T R u_k。
+    逆向Riccati递推得到时变反馈 u_k = -K_k e_k - N_k d。
+
+    整个闭环预测对 (e0, d) 是线性的，因此预测轨迹的映射矩阵也预先算好，
+    在线只需两次矩阵乘法即可得到完整的控制和状态序列。
+    """
+
+    def __init__(self, Ad, Bd, Q, R, horizon):
+        """
+        计算反馈增益和预测映射
+
+        参数:
+            Ad, Bd: 离散系统矩阵
+            Q: 状态误差权重矩阵 (同时作为终端权重)
+            R: 控制输入权重矩阵
+            horizon: 预测时域长度
+        """
+        A = np.asarray(Ad, dtype=float)
+        B = np.asarray(Bd, dtype=float)
+        Q = np.atleast_2d(np.asarray(Q, dtype=float))
+        R = np.atleast_2d(np.asarray(R, dtype=float))
+        n, m = B.shape
+        N = horizon
+        self.n_states, self.n_inputs, self.horizon = n, m, N
+        I = np.eye(n)
+
+        # 逆向Riccati递推，p_k = M_k d 为代价的线性项
+        self.K = np.zeros((N, m, n))
+        self.N_aff = np.zeros((N, m, n))
+        P = Q.copy()
+        M = np.zeros((n, n))
+        for k in range(N - 1, -1, -1):
+            S = R + B.T @ P @ B
+            K = np.linalg.solve(S, B.T @ P @ A)
+            N_k = np.linalg.solve(S, B.T @ (P + M))
+            A_cl = A - B @ K
+            M = K.T @ R @ N_k + A_cl.T @ (P @ (I - B @ N_k) + M)
+            P = Q + A.T @ P @ A_cl
+            P = (P + P.T) / 2
+            self.K[k] = K
+            self.N_aff[k] = N_k
+
+        # 闭环预测: e_k = Ee_k e0 + Ed_k d，u_k = Ue_k e0 + Ud_k d
+        self.Ue = np.zeros((N, m, n))
+        self.Ud = np.zeros((N, m, n))
+        self.Ee = np.zeros((N + 1, n, n))
+        self.Ed = np.zeros((N + 1, n, n))
+        self.Ee[0] = I
+        for k in range(N):
+            self.Ue[k] = -self.K[k] @ self.Ee[k]
+            self.Ud[k] = -self.K[k] @ self.Ed[k] - self.N_aff[k]
+            self.Ee[k + 1] = A @ self.Ee[k] + B @ self.Ue[k]
+            self.Ed[k + 1] = A @ self.Ed[k] + B @ self.Ud[k] + I
+
+        self._A_minus_I = A - I
+
+    def plan_batch(self, x0, x_ref):
+        """
+        批量计算无约束最优控制和状态序列
+
+        参数:
+            x0: 当前状态，形状 (M, n_states)
+            x_ref: 目标状态，形状 (n_states,)
+
+        返回:
+            controls: 形状 (M, horizon, n_inputs)
+            states: 形状 (M, horizon+1, n_states)
+        """
+        x0 = np.atleast_2d(np.asarray(x0, dtype=float))
+        x_ref = np.asarray(x_ref, dtype=float)
+        e0 = x0 - x_ref
+        d = self._A_minus_I @ x_ref
+
+        controls = np.einsum('kij,bj->bki', self.Ue, e0) + self.Ud @ d
+        states = np.einsum('kij,bj->bki', self.Ee, e0) + self.Ed @ d + x_ref
+        return controls, states
+
+    def plan(self, x0, x_ref):
+        """
+        计算无约束最优控制和状态序列
+
+        参数:
+            x0: 当前状态
+            x_ref: 目标状态
+
+        返回:
+            optimal_control: 形状 (n_inputs, horizon)
+            optimal_states: 形状 (n_states, horizon+1)
+        """
+        controls, states = self.plan_batch(np.asarray(x0, dtype=float)[np.newaxis, :], x_ref)
+        return controls[0].T, states[0].T
@@ -0,0 +1,146 @@
+"""
+线性时变(LTV) MPC的凝聚QP
+沿名义轨迹逐步线性化的预测模型，QP的稀疏结构固定，每次迭代只更新矩阵数值
+"""
+
+import numpy as np
+import scipy.sparse as sparse
+import osqp
+
+
+def _fixed_pattern(mask):
+    """
+    按布尔掩码构造CSC稀疏结构 (数值为零的结构非零元也保留)
+
+    返回:
+        indices, indptr: CSC结构 (indices即每个结构非零元的行下标)
+        cols: 每个结构非零元的列下标 (按CSC存储顺序)
+    """
+    pattern = sparse.csc_matrix(mask.astype(float))
+    cols = np.repeat(np.arange(mask.shape[1]), np.diff(pattern.indptr))
+    return pattern.indices, pattern.indptr, cols
+
+
+class LTVMPCQP:
+    """
+    凝聚形式的LTV MPC问题
+
+    预测模型 x[k+1] = Ad_k x[k] + Bd_k u[k] + c_k，预测方程
+        X = Sx x0 + Su U + w
+    代价与约束和 CondensedMPCQP 相同。Ad_k、Bd_k随名义轨迹变化，
+    但H和约束矩阵的稀疏结构不变，因此OSQP只初始化一次，
+    之后用update(Px, Ax)更新数值并保留热启动。
+    """
+
+    def __init__(self, n_states, n_inputs, horizon, Q, R, eps_abs=1e-5, eps_rel=1e-5):
+        """
+        参数:
+            n_states, n_inputs: 状态和控制维度
+            horizon: 预测时域长度
+            Q: 状态误差权重矩阵
+            R: 控制输入权重矩阵
+            eps_abs, eps_rel: OSQP收敛容差
+        """
+        self.n_states = n_states
+        self.n_inputs = n_inputs
+        self.horizon = horizon
+        n, m, N = n_states, n_inputs, horizon
+
+        self._Q_bar = np.kron(np.eye(N), Q)
+        self._R_bar = np.kron(np.eye(N), R)
+        self._settings = dict(eps_abs=eps_abs, eps_rel=eps_rel, warm_start=True,
+                              polish=False, verbose=False)
+
+        # H: 稠密上三角；约束: [I; Su]，Su为分块下三角
+        self._P_pattern = _fixed_pattern(np.triu(np.ones((N * m, N * m), dtype=bool)))
+        su_mask = np.kron(np.tril(np.ones((N, N), dtype=bool)), np.ones((n, m), dtype=bool))
+        self._A_pattern = _fixed_pattern(np.vstack([np.eye(N * m, dtype=bool), su_mask]))
+        self.solver = None
+
+    def prediction_matrices(self, A_seq, B_seq, c_seq):
+        """
+        时变预测矩阵
+
+        参数:
+            A_seq: 形状 (N, n, n)
+            B_seq: 形状 (N, n, m)
+            c_seq: 形状 (N, n)
+
+        返回:
+            Sx: 形状 (N*n, n)
+            Su: 形状 (N*n, N*m)
+            w: 形状 (N*n,)
+        """
+        n, m, N = self.n_states, self.n_inputs, self.horizon
+        Sx = np.zeros((N * n, n))
+        Su = np.zeros((N * n, N * m))
+        w = np.zeros(N * n)
+
+        Phi = np.eye(n)
+        Su_row = np.zeros((n, N * m))
+        w_row = np.zeros(n)
+        for k in range(N):
+            Phi = A_seq[k] @ Phi
+            Su_row = A_seq[k] @ Su_row
+            Su_row[:, k * m:(k + 1) * m] = B_seq[k]
+            w_row = A_seq[k] @ w_row + c_seq[k]
+
+            Sx[k * n:(k + 1) * n] = Phi
+            Su[k * n:(k + 1) * n] = Su_row
+            w[k * n:(k + 1) * n] = w_row
+        return Sx, Su, w
+
+    def solve(self, x0, x_ref, A_seq, B_seq, c_seq, u_min, u_max, x_min, x_max, U_init=None):
+        """
+        求解一次LTV QP
+
+        参数:
+            x0: 当前状态
+            x_ref: 目标状态
+            A_seq, B_seq, c_seq: 沿名义轨迹的离散线性化
+            u_min, u_max: 控制约束 (长度为n_inputs)
+            x_min, x_max: 状态约束 (长度为n_states)
+            U_init: 热启动的控制序列，形状 (N, m)
+
+        返回:
+            U: 最优控制序列，形状 (N, m)，求解失败时为None
+            info: OSQP求解信息
+        """
+        n, m, N = self.n_states, self.n_inputs, self.horizon
+        x0 = np.asarray(x0, dtype=float)
+        Sx, Su, w = self.prediction_matrices(A_seq, B_seq, c_seq)
+
+        SuT_Qbar = Su.T @ self._Q_bar
+        H = 2.0 * (SuT_Qbar @ Su + self._R_bar)
+        H = (H + H.T) / 2
+        free = Sx @ x0 + w
+        q = 2.0 * SuT_Qbar @ (free - np.tile(x_ref, N))
+        A_con = np.vstack([np.eye(N * m), Su])
+        lower = np.concatenate([np.tile(u_min, N), np.tile(x_min, N) - free])
+        upper = np.concatenate([np.tile(u_max, N), np.tile(x_max, N) - free])
+
+        P_indices, P_indptr, P_cols = self._P_pattern
+        A_indices, A_indptr, A_cols = self._A_pattern
+        Px = H[P_indices, P_cols]
+        Ax = A_con[A_indices, A_cols]
+
+        if self.solver is None:
+            self.solver = osqp.OSQP()
+            self.solver.setup(
+                sparse.csc_matrix((Px, P_indices, P_indptr), shape=H.shape),
+                q,
+                sparse.csc_matrix((Ax, A_indices, A_indptr), shape=A_con.shape),
+                lower,
+                upper,
+                **self._settings,
+            )
+        else:
+            self.solver.update(Px=Px, Ax=Ax, q=q, l=lower, u=upper)
+
+        if U_init is not None:
+            self.solver.warm_start(x=np.asarray(U_init, dtype=float).reshape(N * m))
+
+        result = self.solver.solve()
+        if result.info.status != 'solved':
+            return None, result.info
+        return result.x.reshape(N, m), result.info
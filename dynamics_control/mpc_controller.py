@@ -3,9 +3,17 @@
 用于一维小车的位置控制
 """
 
+import time
+
 import numpy as np
 import cvxpy as cp
 
+from .condensed_qp import CondensedMPCQP
+from .explicit_mpc import ExplicitMPCLaw
+from .lqr import FiniteHorizonLQR
+from .ltv_mpc import LTVMPCQP
+from .telemetry import SolverTelemetry
+
 
 class MPCController:
     """
@@ -13,7 +21,11 @@ class MPCController:
     使用线性MPC控制一维小车位置
     """
     
-    def __init__(self, dynamics_model, horizon=10, dt=0.1):
+    BACKENDS = ('cvxpy', 'osqp', 'explicit')
+    MODES = ('linear', 'ltv')
+    
+    def __init__(self, dynamics_model, horizon=10, dt=0.1, backend='cvxpy', lqr_fast_path=True,
+                 mode='linear', sqp_iterations=3, sqp_tolerance=1e-4, sqp_time_budget=None):
         """
         初始化MPC控制器
         
@@ -21,7 +33,31 @@ class MPCController:
             dynamics_model: 动力学模型对象
             horizon: 预测时域长度
             dt: 时间步长
+            backend: 求解后端
+                'cvxpy': 参数化cvxpy模型 + OSQP
+                'osqp': 凝聚形式稠密QP，直接调用OSQP底层接口
+                'explicit': 离线计算的显式MPC控制律，get_control_action只查表
+                            (solve_mpc仍按osqp后端在线求解完整序列)
+            lqr_fast_path: 约束不起作用时直接使用有限时域LQR的闭式解，
+                           仅当预测的控制或状态越界时才求解约束QP
+            mode: 预测模型
+                'linear': 常值矩阵 dynamics.A/B 的欧拉离散
+                'ltv': 沿上一步最优轨迹重新线性化 dynamics.dynamics 的时变模型，
+                       用序列QP迭代求解 (始终使用OSQP，backend和lqr_fast_path不起作用)
+            sqp_iterations: LTV模式每个控制周期最多的QP迭代次数
+            sqp_tolerance: 控制序列变化小于该值时停止迭代
+            sqp_time_budget: 每个控制周期的迭代时间预算 (秒)，None表示不限
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"未知的求解后端: {backend}，可选: {self.BACKENDS}")
+        if mode not in self.MODES:
+            raise ValueError(f"未知的预测模型: {mode}，可选: {self.MODES}")
+        if mode == 'ltv' and backend == 'explicit':
+            raise ValueError("显式MPC只适用于线性预测模型")
+        if sqp_iterations < 1:
+            raise ValueError(f"sqp_iterations至少为1，实际为{sqp_iterations}")
+        self.backend = backend
+        self.mode = mode
         self.dynamics = dynamics_model
         self.horizon = horizon
         self.dt = dt
@@ -41,11 +77,80 @@ class MPCController:
         # 状态约束
         self.x_min = np.array([-10.0, -5.0])  # 最小位置和速度
         self.x_max = np.array([10.0, 5.0])    # 最大位置和速度
+        
+        # 参数化问题缓存 (首次求解时构建)
+        self._parametric = None
+        self._condensed = None
+        self._condensed_key = None
+        
+        # 显式MPC控制律缓存
+        self.explicit_grid_shape = (41, 41)
+        self._explicit = None
+        self._explicit_key = None
+        
+        # LQR快速通道
+        self.lqr_fast_path = lqr_fast_path
+        self._lqr = None
+        self._lqr_key = None
+        self.path_stats = {'lqr': 0, 'qp': 0}
+        
+        # LTV/SQP模式
+        self.sqp_iterations = sqp_iterations
+        self.sqp_tolerance = sqp_tolerance
+        self.sqp_time_budget = sqp_time_budget
+        self._ltv = None
+        self._ltv_key = None
+        self._ltv_guess = None
+        self.last_sqp_info = None
+        
+        # 求解遥测 (默认关闭，见enable_telemetry)
+        self.telemetry = None
+        self._step_stats = None
+    
+    def enable_telemetry(self, capacity=1024):
+        """
+        开启逐步求解遥测
+        
+        之后每次solve_mpc / get_control_action调用都会记录耗时分解和求解器统计。
+        关闭时每步只多一次属性检查。
+        
+        参数:
+            capacity: 日志初始容量
+        
+        返回:
+            SolverTelemetry 对象 (同时保存在self.telemetry)
+        """
+        self.telemetry = SolverTelemetry(capacity)
+        return self.telemetry
+    
+    def disable_telemetry(self):
+        """
+        关闭遥测，返回已记录的日志
+        """
+        telemetry, self.telemetry = self.telemetry, None
+        return telemetry
+    
+    def _instrumented(self, solve, *args, **kwargs):
+        """
+        计时执行一次求解，并将各求解路径填入的统计写入遥测日志
+        """
+        self._step_stats = {'path': 'lqr', 'status': 'unknown'}
+        start = time.perf_counter()
+        try:
+            result = solve(*args, **kwargs)
+            self._step_stats['total_time'] = time.perf_counter() - start
+            self.telemetry.record(**self._step_stats)
+        finally:
+            self._step_stats = None
+        return result
     
     def setup_optimization_problem(self, current_state, target_state):
         """
         设置MPC优化问题
         
+        问题结构只在首次调用 (或时域、步长、系统矩阵改变) 时构建，
+        之后每步只更新cp.Parameter的取值，避免重复建模和规范化。
+        
         参数:
             current_state: 当前状态
             target_state: 目标状态
@@ -53,55 +158,107 @@ class MPCController:
         返回:
             problem, variables: 优化问题和变量
         """
-        # TODO: 需要实现这个函数
-        # 提示:
-        # 1. 定义状态和控制变量
-        # 2. 添加动力学约束
-        # 3. 定义目标函数
-        # 4. 添加状态和控制约束
-        
-        # 定义变量
-        x = cp.Variable((self.n_states, self.horizon + 1))
-        u = cp.Variable((self.n_inputs, self.horizon))
-        
-        # 目标函数
-        cost = 0
-        
-        # 终端成本
-        cost += cp.quad_form(x[:, -1] - target_state, self.Q)
+        key = self._problem_key()
+        if self._parametric is None or self._parametric['key'] != key:
+            self._parametric = self._build_parametric_problem()
+            self._parametric['key'] = key
         
-        # 运行成本
-        for k in range(self.horizon):
-            cost += cp.quad_form(x[:, k] - target_state, self.Q)
-            cost += cp.quad_form(u[:, k], self.R)
+        self._update_parameters(current_state, target_state)
         
-        # 约束条件
-        constraints = []
+        return self._parametric['problem'], self._parametric['variables']
+    
+    def _problem_key(self):
+        """
+        决定问题结构的参数，改变后需要重新构建问题
+        """
+        return (self.horizon, self.dt, self.dynamics.A.tobytes(), self.dynamics.B.tobytes())
+    
+    def _weighted_problem_key(self):
+        """
+        问题结构和权重共同决定的键 (凝聚QP和LQR增益依赖权重)
+        """
+        return self._problem_key() + (np.asarray(self.Q).tobytes(), np.asarray(self.R).tobytes())
+    
+    def _discrete_matrices(self):
+        """
+        预测模型使用的离散系统矩阵 (欧拉离散)
         
-        # 初始状态约束
-        constraints.append(x[:, 0] == current_state)
+        返回:
+            Ad, Bd: x[k+1] = Ad x[k] + Bd u[k]
+        """
+        Ad = np.eye(self.n_states) + self.dynamics.A * self.dt
+        Bd = self.dynamics.B * self.dt
+        return Ad, Bd
+    
+    def _build_parametric_problem(self):
+        """
+        构建参数化的MPC问题
         
-        # 动力学约束
-        for k in range(self.horizon):
-            # 线性化动力学模型
-            next_state = (np.eye(self.n_states) + self.dynamics.A * self.dt) @ x[:, k] + \
-                        self.dynamics.B * self.dt @ u[:, k]
-            constraints.append(x[:, k + 1] == next_state)
+        当前状态、目标、权重和约束都是cp.Parameter。
+        权重以矩阵平方根的形式出现，使代价满足DPP规则:
+            (x - r)^T Q (x - r) = ||Q^{1/2} x - Q^{1/2} r||^2
         
-        # 控制约束
-        for k in range(self.horizon):
-            constraints.append(u[:, k] >= self.u_min)
-            constraints.append(u[:, k] <= self.u_max)
+        返回:
+            包含problem、variables和parameters的字典
+        """
+        n, m, N = self.n_states, self.n_inputs, self.horizon
         
-        # 状态约束
-        for k in range(self.horizon + 1):
-            constraints.append(x[:, k] >= self.x_min)
-            constraints.append(x[:, k] <= self.x_max)
+        # 定义变量
+        x = cp.Variable((n, N + 1))
+        u = cp.Variable((m, N))
+        
+        # 定义参数
+        params = {
+            'x0': cp.Parameter(n),
+            'Q_half': cp.Parameter((n, n)),
+            'Q_half_ref': cp.Parameter((n, 1)),
+            'R_half': cp.Parameter((m, m)),
+            'u_min': cp.Parameter((m, 1)),
+            'u_max': cp.Parameter((m, 1)),
+            'x_min': cp.Parameter((n, 1)),
+            'x_max': cp.Parameter((n, 1)),
+        }
+        ones_x = np.ones((1, N + 1))
+        ones_u = np.ones((1, N))
+        
+        # 目标函数: 每个预测状态 (含初始和终端状态) 的跟踪误差 + 控制输入代价
+        cost = cp.sum_squares(params['Q_half'] @ x - params['Q_half_ref'] @ ones_x)
+        cost += cp.sum_squares(params['R_half'] @ u)
+        
+        # 动力学约束 (线性化动力学模型)
+        Ad, Bd = self._discrete_matrices()
+        constraints = [
+            x[:, 0] == params['x0'],
+            x[:, 1:] == Ad @ x[:, :-1] + Bd @ u,
+            # 控制约束
+            u >= params['u_min'] @ ones_u,
+            u <= params['u_max'] @ ones_u,
+            # 状态约束
+            x >= params['x_min'] @ ones_x,
+            x <= params['x_max'] @ ones_x,
+        ]
         
         # 创建优化问题
         problem = cp.Problem(cp.Minimize(cost), constraints)
         
-        return problem, (x, u)
+        return {'problem': problem, 'variables': (x, u), 'parameters': params}
+    
+    def _update_parameters(self, current_state, target_state):
+        """
+        将当前状态、目标、权重和约束写入问题参数
+        """
+        params = self._parametric['parameters']
+        n, m = self.n_states, self.n_inputs
+        
+        Q_half = _matrix_sqrt(self.Q)
+        params['x0'].value = np.asarray(current_state, dtype=float).reshape(n)
+        params['Q_half'].value = Q_half
+        params['Q_half_ref'].value = (Q_half @ np.asarray(target_state, dtype=float)).reshape(n, 1)
+        params['R_half'].value = _matrix_sqrt(self.R)
+        params['u_min'].value = np.broadcast_to(np.asarray(self.u_min, dtype=float), (m,)).reshape(m, 1)
+        params['u_max'].value = np.broadcast_to(np.asarray(self.u_max, dtype=float), (m,)).reshape(m, 1)
+        params['x_min'].value = np.broadcast_to(np.asarray(self.x_min, dtype=float), (n,)).reshape(n, 1)
+        params['x_max'].value = np.broadcast_to(np.asarray(self.x_max, dtype=float), (n,)).reshape(n, 1)
     
     def solve_mpc(self, current_state, target_state):
         """
@@ -115,15 +272,52 @@ class MPCController:
             optimal_control: 最优控制序列
             optimal_states: 最优状态序列
         """
-        # TODO: 需要实现这个函数
-        # 提示: 调用setup_optimization_problem并求解
+        if self.telemetry is not None:
+            return self._instrumented(self._solve_mpc, current_state, target_state)
+        return self._solve_mpc(current_state, target_state)
+    
+    def _solve_mpc(self, current_state, target_state):
+        """
+        按预测模型和后端选择求解路径
+        """
+        if self.mode == 'ltv':
+            self.path_stats['qp'] += 1
+            return self._solve_ltv(current_state, target_state)
+        
+        if self.lqr_fast_path:
+            optimal_control, optimal_states = self._solve_lqr(current_state, target_state)
+            if optimal_control is not None:
+                self.path_stats['lqr'] += 1
+                if self._step_stats is not None:
+                    self._step_stats.update(path='lqr', status='solved')
+                return optimal_control, optimal_states
+        self.path_stats['qp'] += 1
         
-        # 设置优化问题
+        if self.backend in ('osqp', 'explicit'):
+            return self._solve_condensed(current_state, target_state)
+        
+        return self._solve_parametric(current_state, target_state)
+    
+    def _solve_parametric(self, current_state, target_state):
+        """
+        用参数化cvxpy模型求解MPC问题 (cvxpy后端)
+        """
+        # 设置优化问题 (仅更新参数)
+        setup_start = time.perf_counter()
         problem, (x, u) = self.setup_optimization_problem(current_state, target_state)
+        setup_time = time.perf_counter() - setup_start
         
-        # 求解
+        # 求解 (以上一步的解热启动)
         try:
-            problem.solve(solver=cp.OSQP, verbose=False)
+            problem.solve(solver=cp.OSQP, warm_start=True, verbose=False)
+            
+            if self._step_stats is not None:
+                stats = problem.solver_stats
+                self._step_stats.update(
+                    path='cvxpy', status=problem.status, setup_time=setup_time,
+                    canonicalization_time=problem.compilation_time or 0.0,
+                    solve_time=stats.solve_time or 0.0, iterations=stats.num_iters or 0, qp_count=1,
+                )
             
             if problem.status == cp.OPTIMAL:
                 optimal_control = u.value
@@ -135,8 +329,233 @@ class MPCController:
                 
         except Exception as e:
             print(f"MPC求解出错: {e}")
+            if self._step_stats is not None:
+                self._step_stats.update(path='cvxpy', status='error', setup_time=setup_time, qp_count=1)
             return None, None
     
+    def _get_condensed_qp(self):
+        """
+        获取凝聚形式QP，时域、步长、模型或权重改变时重新构建
+        """
+        key = self._weighted_problem_key()
+        if self._condensed is None or self._condensed_key != key:
+            Ad, Bd = self._discrete_matrices()
+            self._condensed = CondensedMPCQP(Ad, Bd, self.horizon, self.Q, self.R)
+            self._condensed_key = key
+        return self._condensed
+    
+    def _bound_vectors(self):
+        """
+        将当前约束展开为向量
+        
+        返回:
+            u_min, u_max, x_min, x_max
+        """
+        n, m = self.n_states, self.n_inputs
+        return (
+            np.broadcast_to(np.asarray(self.u_min, dtype=float), (m,)),
+            np.broadcast_to(np.asarray(self.u_max, dtype=float), (m,)),
+            np.broadcast_to(np.asarray(self.x_min, dtype=float), (n,)),
+            np.broadcast_to(np.asarray(self.x_max, dtype=float), (n,)),
+        )
+    
+    def _solve_condensed(self, current_state, target_state):
+        """
+        用凝聚形式QP求解MPC问题 (osqp/explicit后端)
+        
+        约束上下界每步按当前取值更新。
+        注意: 凝聚形式只约束预测状态x1..xN，不检查当前状态x0是否越界。
+        """
+        optimal_control, optimal_states, info = self._get_condensed_qp().solve(
+            current_state, np.asarray(target_state, dtype=float), *self._bound_vectors()
+        )
+        if self._step_stats is not None:
+            self._step_stats.update(
+                path='osqp', status=info.status, setup_time=info.update_time,
+                solve_time=info.solve_time, iterations=info.iter, qp_count=1,
+            )
+        if optimal_control is None:
+            print(f"MPC求解失败，状态: {info.status}")
+        return optimal_control, optimal_states
+    
+    def _get_lqr(self):
+        """
+        获取有限时域LQR增益，时域、步长、模型或权重改变时重新计算
+        """
+        key = self._weighted_problem_key()
+        if self._lqr is None or self._lqr_key != key:
+            Ad, Bd = self._discrete_matrices()
+            self._lqr = FiniteHorizonLQR(Ad, Bd, self.Q, self.R, self.horizon)
+            self._lqr_key = key
+        return self._lqr
+    
+    def _solve_lqr(self, current_state, target_state):
+        """
+        无约束最优解 (Riccati反馈)
+        
+        若预测的控制和状态都在约束范围内，无约束最优解就是约束问题的最优解；
+        否则返回None，由调用方求解约束QP。
+        """
+        optimal_control, optimal_states = self._get_lqr().plan(current_state, target_state)
+        
+        u_min, u_max, x_min, x_max = self._bound_vectors()
+        if np.any(optimal_control < u_min[:, np.newaxis]) or np.any(optimal_control > u_max[:, np.newaxis]):
+            return None, None
+        if np.any(optimal_states < x_min[:, np.newaxis]) or np.any(optimal_states > x_max[:, np.newaxis]):
+            return None, None
+        return optimal_control, optimal_states
+    
+    def _get_ltv_qp(self):
+        """
+        获取LTV QP，时域或权重改变时重新构建
+        """
+        key = (self.horizon, np.asarray(self.Q).tobytes(), np.asarray(self.R).tobytes())
+        if self._ltv is None or self._ltv_key != key:
+            self._ltv = LTVMPCQP(self.n_states, self.n_inputs, self.horizon, self.Q, self.R)
+            self._ltv_key = key
+            self._ltv_guess = None
+        return self._ltv
+    
+    def _rollout(self, current_state, controls):
+        """
+        用非线性模型 (欧拉离散) 推演控制序列对应的状态轨迹
+        
+        返回:
+            形状 (N+1, n_states) 的状态序列
+        """
+        states = np.zeros((len(controls) + 1, self.n_states))
+        states[0] = current_state
+        for k, control in enumerate(controls):
+            states[k + 1] = self.dynamics.discrete_dynamics(states[k], control, self.dt)
+        return states
+    
+    def reset_warm_start(self):
+        """
+        丢弃LTV模式保存的上一步最优控制序列 (例如状态发生跳变后)
+        """
+        self._ltv_guess = None
+    
+    def _solve_ltv(self, current_state, target_state, warm_start=True):
+        """
+        LTV/SQP求解 (实时迭代)
+        
+        以上一步的最优控制序列左移一步作为初始名义控制，
+        用非线性模型推演名义轨迹，沿轨迹逐点线性化后求解QP，
+        以QP解作为新的名义控制重复，直到控制序列收敛、
+        达到迭代次数或用完时间预算。
+        """
+        start_time = time.perf_counter()
+        qp = self._get_ltv_qp()
+        current_state = np.asarray(current_state, dtype=float)
+        target_state = np.asarray(target_state, dtype=float)
+        N, m = self.horizon, self.n_inputs
+        
+        if warm_start and self._ltv_guess is not None:
+            controls = np.vstack([self._ltv_guess[1:], self._ltv_guess[-1:]])
+        else:
+            controls = np.zeros((N, m))
+        
+        bounds = self._bound_vectors()
+        A_seq = np.zeros((N, self.n_states, self.n_states))
+        B_seq = np.zeros((N, self.n_states, m))
+        c_seq = np.zeros((N, self.n_states))
+        
+        solved = False
+        converged = False
+        iterations = 0
+        solver_time = 0.0
+        solver_iterations = 0
+        status = 'not_solved'
+        while iterations < self.sqp_iterations:
+            states = self._rollout(current_state, controls)
+            for k in range(N):
+                A_seq[k], B_seq[k], c_seq[k] = self.dynamics.linearize_discrete(
+                    states[k], controls[k], self.dt, method='euler'
+                )
+            
+            new_controls, info = qp.solve(
+                current_state, target_state, A_seq, B_seq, c_seq, *bounds, U_init=controls
+            )
+            iterations += 1
+            solver_time += info.solve_time
+            solver_iterations += info.iter
+            status = info.status
+            if new_controls is None:
+                print(f"MPC求解失败，状态: {info.status}")
+                break
+            
+            solved = True
+            step = np.max(np.abs(new_controls - controls))
+            controls = new_controls
+            if step < self.sqp_tolerance:
+                converged = True
+                break
+            if self.sqp_time_budget is not None and \
+                    time.perf_counter() - start_time > self.sqp_time_budget:
+                break
+        
+        self.last_sqp_info = {'iterations': iterations, 'converged': converged, 'solved': solved}
+        if self._step_stats is not None:
+            # 线性化、凝聚和OSQP更新都计入setup_time
+            self._step_stats.update(
+                path='ltv', status=status,
+                setup_time=time.perf_counter() - start_time - solver_time,
+                solve_time=solver_time, iterations=solver_iterations, qp_count=iterations,
+            )
+        if not solved:
+            self._ltv_guess = None
+            return None, None
+        
+        if warm_start:
+            self._ltv_guess = controls
+        return controls.T, self._rollout(current_state, controls).T
+    
+    def get_path_stats(self):
+        """
+        统计solve_mpc中LQR快速通道和约束QP各被使用的次数
+        
+        返回:
+            dict: 'lqr'、'qp' 次数及 'lqr_fraction' 比例
+        """
+        total = self.path_stats['lqr'] + self.path_stats['qp']
+        stats = dict(self.path_stats)
+        stats['lqr_fraction'] = self.path_stats['lqr'] / total if total > 0 else 0.0
+        return stats
+    
+    def reset_path_stats(self):
+        """
+        清零路径统计
+        """
+        self.path_stats = {'lqr': 0, 'qp': 0}
+    
+    def build_explicit_law(self, target_state, grid_shape=None):
+        """
+        离线计算显式MPC控制律 (explicit后端)
+        
+        控制律覆盖x_min/x_max围成的状态区域，与目标状态、权重和约束绑定，
+        这些量不变时直接复用缓存。
+        
+        参数:
+            target_state: 目标状态
+            grid_shape: 每个状态维度上的网格数 (默认使用self.explicit_grid_shape)
+        
+        返回:
+            ExplicitMPCLaw 对象
+        """
+        if grid_shape is None:
+            grid_shape = self.explicit_grid_shape
+        target_state = np.asarray(target_state, dtype=float)
+        
+        # 时域、步长、模型、权重和约束也可能被直接修改，都计入缓存键
+        key = self._weighted_problem_key() + (target_state.tobytes(), tuple(grid_shape)) + tuple(
+            np.asarray(b, dtype=float).tobytes() for b in (self.u_min, self.u_max, self.x_min, self.x_max)
+        )
+        if self._explicit is None or self._explicit_key != key:
+            self._explicit = ExplicitMPCLaw(self._get_condensed_qp(), target_state, *self._bound_vectors(),
+                                            grid_shape=grid_shape)
+            self._explicit_key = key
+        return self._explicit
+    
     def get_control_action(self, current_state, target_state):
         """
         获取当前时刻的控制动作
@@ -151,6 +570,13 @@ class MPCController:
         # TODO: 需要实现这个函数
         # 提示: 求解MPC问题，返回第一个控制动作
         
+        if self.backend == 'explicit':
+            # 显式MPC: 查表，无需在线求解
+            # (权重和约束通过tune_weights/set_constraints修改时会清空缓存)
+            if self.telemetry is not None:
+                return self._instrumented(self._explicit_action, current_state, target_state)
+            return self._explicit_action(current_state, target_state)
+        
         optimal_control, _ = self.solve_mpc(current_state, target_state)
         
         if optimal_control is not None:
@@ -158,6 +584,127 @@ class MPCController:
         else:
             return np.zeros(self.n_inputs)  # 如果求解失败，返回零控制
     
+    def _explicit_action(self, current_state, target_state):
+        """
+        显式MPC查表 (首次调用或问题改变时离线计算控制律)
+        
+        状态落在离线求解失败的单元时改为在线求解约束QP。
+        """
+        control = self.build_explicit_law(target_state).evaluate(current_state)
+        if control is None:
+            return self._explicit_fallback(current_state, target_state)
+        if self._step_stats is not None:
+            self._step_stats.update(path='explicit', status='solved')
+        return control
+    
+    def _explicit_fallback(self, current_state, target_state):
+        """
+        显式控制律无效单元中的状态: 在线求解约束QP，失败时返回零控制
+        """
+        self.path_stats['qp'] += 1
+        optimal_control, _ = self._solve_condensed(current_state, target_state)
+        if optimal_control is None:
+            return np.zeros(self.n_inputs)
+        return optimal_control[:, 0]
+    
+    def get_control_action_batch(self, current_states, target_state):
+        """
+        批量获取控制动作
+        
+        explicit后端直接批量查表 (无效单元中的状态在线求解)；其他后端先批量计算LQR解，
+        只对约束起作用的状态逐个求解约束QP；LTV模式逐个求解 (不热启动)。
+        
+        参数:
+            current_states: 当前状态，形状 (M, n_states)
+            target_state: 目标状态
+        
+        返回:
+            控制动作，形状 (M, n_inputs)
+        """
+        current_states = np.atleast_2d(np.asarray(current_states, dtype=float))
+        target_state = np.asarray(target_state, dtype=float)
+        
+        if self.backend == 'explicit':
+            actions = self.build_explicit_law(target_state).evaluate_batch(current_states)
+            for i in np.flatnonzero(np.isnan(actions).any(axis=1)):
+                actions[i] = self._batch_row_solve(self._explicit_fallback, current_states[i], target_state)
+            return actions
+        
+        n_batch = current_states.shape[0]
+        actions = np.zeros((n_batch, self.n_inputs))
+        pending = np.arange(n_batch)
+        
+        if self.mode == 'ltv':
+            # 各状态的预测轨迹互不相关，不使用热启动
+            for i in pending:
+                self.path_stats['qp'] += 1
+                optimal_control, _ = self._batch_row_solve(
+                    self._solve_ltv, current_states[i], target_state, warm_start=False
+                )
+                if optimal_control is not None:
+                    actions[i] = optimal_control[:, 0]
+            return actions
+        
+        if self.lqr_fast_path:
+            controls, states = self._get_lqr().plan_batch(current_states, target_state)
+            u_min, u_max, x_min, x_max = self._bound_vectors()
+            feasible = np.all((controls >= u_min) & (controls <= u_max), axis=(1, 2)) & \
+                np.all((states >= x_min) & (states <= x_max), axis=(1, 2))
+            actions[feasible] = controls[feasible, 0]
+            self.path_stats['lqr'] += int(np.count_nonzero(feasible))
+            pending = pending[~feasible]
+        
+        # 约束起作用的状态逐个求解QP (跳过solve_mpc中的LQR检查)
+        for i in pending:
+            self.path_stats['qp'] += 1
+            solve = self._solve_parametric if self.backend == 'cvxpy' else self._solve_condensed
+            optimal_control, _ = self._batch_row_solve(solve, current_states[i], target_state)
+            if optimal_control is not None:
+                actions[i] = optimal_control[:, 0]
+        
+        return actions
+    
+    def _batch_row_solve(self, solve, *args, **kwargs):
+        """
+        批量求解中的单个约束QP，开启遥测时每个QP记为一条记录
+        """
+        if self.telemetry is not None:
+            return self._instrumented(solve, *args, **kwargs)
+        return solve(*args, **kwargs)
+    
+    def simulate_closed_loop_batch(self, initial_states, target_state, simulation_time, dt):
+        """
+        批量闭环仿真 (多个初始状态同步推进)
+        
+        参数:
+            initial_states: 初始状态，形状 (M, n_states)
+            target_state: 目标状态
+            simulation_time: 仿真时间
+            dt: 时间步长
+        
+        返回:
+            time_array: 时间数组
+            state_history: 状态历史，形状 (M, n_steps+1, n_states)
+            control_history: 控制历史，形状 (M, n_steps, n_inputs)
+        """
+        initial_states = np.atleast_2d(np.asarray(initial_states, dtype=float))
+        n_batch = initial_states.shape[0]
+        
+        n_steps = int(simulation_time / dt)
+        time_array = np.arange(0, simulation_time + dt, dt)
+        
+        state_history = np.zeros((n_batch, n_steps + 1, self.n_states))
+        control_history = np.zeros((n_batch, n_steps, self.n_inputs))
+        state_history[:, 0] = initial_states
+        
+        for i in range(n_steps):
+            control_history[:, i] = self.get_control_action_batch(state_history[:, i], target_state)
+            state_history[:, i + 1] = state_history[:, i] + dt * self.dynamics.dynamics_batch(
+                state_history[:, i], control_history[:, i]
+            )
+        
+        return time_array, state_history, control_history
+    
     def simulate_closed_loop(self, initial_state, target_state, simulation_time, dt):
         """
         闭环仿真
@@ -209,6 +756,7 @@ class MPCController:
             self.Q = Q_new
         if R_new is not None:
             self.R = R_new
+        self._explicit = None
     
     def set_constraints(self, u_min=None, u_max=None, x_min=None, x_max=None):
         """
@@ -225,4 +773,14 @@ class MPCController:
         if x_min is not None:
             self.x_min = x_min
         if x_max is not None:
-            self.x_max = x_max 
\ No newline at end of file
+            self.x_max = x_max
+        self._explicit = None 
+
+
+def _matrix_sqrt(M):
+    """
+    对称半正定矩阵的平方根 S，满足 S^T S = M
+    """
+    M = np.atleast_2d(np.asarray(M, dtype=float))
+    eigvals, eigvecs = np.linalg.eigh((M + M.T) / 2)
+    return eigvecs @ np.diag(np.sqrt(np.clip(eigvals, 0.0, None))) @ eigvecs.T
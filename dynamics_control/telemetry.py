@@ -0,0 +1,166 @@
+"""
+MPC求解遥测
+逐步记录求解耗时分解和求解器统计，数组存储，可导出CSV/NPZ
+"""
+
+import csv
+
+import numpy as np
+
+
+class SolverTelemetry:
+    """
+    MPC逐步求解记录
+
+    每条记录对应一次 solve_mpc / get_control_action 调用，字段:
+        path: 求解路径 ('lqr', 'cvxpy', 'osqp', 'explicit', 'ltv')
+        status: 求解器状态
+        setup_time: 问题数据更新时间 (cvxpy参数赋值、OSQP update、LTV线性化与凝聚)
+        canonicalization_time: cvxpy规范化时间 (其他路径为0)
+        solve_time: 求解器报告的求解时间
+        total_time: 整步墙钟时间
+        iterations: 求解器迭代次数 (LTV模式为各次QP之和)
+        qp_count: 本步求解的QP个数
+
+    数据存放在预分配的数组中，容量不足时倍增；
+    状态和路径以整数编码存储，名称表见 status_names / PATHS。
+    """
+
+    PATHS = ('lqr', 'cvxpy', 'osqp', 'explicit', 'ltv')
+    TIME_FIELDS = ('setup_time', 'canonicalization_time', 'solve_time', 'total_time')
+    COUNT_FIELDS = ('iterations', 'qp_count')
+
+    def __init__(self, capacity=1024):
+        """
+        参数:
+            capacity: 初始容量 (记录条数)
+        """
+        self.size = 0
+        self.status_names = []
+        self._status_codes = {}
+        self._path_codes = {name: code for code, name in enumerate(self.PATHS)}
+        self._allocate(max(int(capacity), 1))
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self._times = np.zeros((capacity, len(self.TIME_FIELDS)))
+        self._counts = np.zeros((capacity, len(self.COUNT_FIELDS)), dtype=np.int32)
+        self._path = np.zeros(capacity, dtype=np.int8)
+        self._status = np.zeros(capacity, dtype=np.int16)
+
+    def _grow(self):
+        old = (self._times, self._counts, self._path, self._status)
+        self._allocate(self.capacity * 2)
+        for new_array, old_array in zip((self._times, self._counts, self._path, self._status), old):
+            new_array[:len(old_array)] = old_array
+
+    def _status_code(self, status):
+        code = self._status_codes.get(status)
+        if code is None:
+            code = len(self.status_names)
+            self._status_codes[status] = code
+            self.status_names.append(status)
+        return code
+
+    def record(self, path, status, setup_time=0.0, canonicalization_time=0.0, solve_time=0.0,
+               total_time=0.0, iterations=0, qp_count=0):
+        """
+        追加一条记录
+        """
+        if self.size == self.capacity:
+            self._grow()
+        i = self.size
+        self._times[i] = (setup_time, canonicalization_time, solve_time, total_time)
+        self._counts[i] = (iterations, qp_count)
+        self._path[i] = self._path_codes[path]
+        self._status[i] = self._status_code(str(status))
+        self.size += 1
+
+    def clear(self):
+        """
+        清空记录 (保留已分配的容量)
+        """
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def as_arrays(self):
+        """
+        返回各字段的数组 (长度为记录条数，拷贝)
+
+        返回:
+            dict: 时间和计数字段为数值数组，path/status为字符串数组
+        """
+        n = self.size
+        arrays = {name: self._times[:n, j].copy() for j, name in enumerate(self.TIME_FIELDS)}
+        arrays.update({name: self._counts[:n, j].copy() for j, name in enumerate(self.COUNT_FIELDS)})
+        arrays['path'] = np.array(self.PATHS, dtype=object)[self._path[:n]].astype(str)
+        arrays['status'] = np.array(self.status_names, dtype=object)[self._status[:n]].astype(str)
+        return arrays
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        统计摘要
+
+        参数:
+            percentiles: 总耗时的分位数
+
+        返回:
+            dict: 记录条数、总耗时分位数与最大值 (秒)、各路径和状态的次数
+        """
+        n = self.size
+        total = self._times[:n, self.TIME_FIELDS.index('total_time')]
+        summary = {'steps': n}
+        if n > 0:
+            for p, value in zip(percentiles, np.percentile(total, percentiles)):
+                summary[f'total_time_p{p:g}'] = float(value)
+            summary['total_time_max'] = float(total.max())
+        summary['paths'] = {
+            self.PATHS[code]: int(count)
+            for code, count in zip(*np.unique(self._path[:n], return_counts=True))
+        }
+        summary['statuses'] = {
+            self.status_names[code]: int(count)
+            for code, count in zip(*np.unique(self._status[:n], return_counts=True))
+        }
+        return summary
+
+    def outliers(self, quantile=0.99, threshold=None):
+        """
+        总耗时异常的步下标
+
+        参数:
+            quantile: 未给出threshold时以该分位数为阈值
+            threshold: 耗时阈值 (秒)
+
+        返回:
+            超过阈值的记录下标数组
+        """
+        total = self._times[:self.size, self.TIME_FIELDS.index('total_time')]
+        if threshold is None:
+            if self.size == 0:
+                return np.zeros(0, dtype=int)
+            threshold = np.quantile(total, quantile)
+        return np.flatnonzero(total > threshold)
+
+    def to_npz(self, path):
+        """
+        导出为NPZ文件 (每个字段一个数组)
+        """
+        np.savez(path, **self.as_arrays())
+
+    def to_csv(self, path):
+        """
+        导出为CSV文件 (每步一行)
+        """
+        arrays = self.as_arrays()
+        columns = ['step', 'path', 'status'] + list(self.TIME_FIELDS) + list(self.COUNT_FIELDS)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for i in range(self.size):
+                row = [i, arrays['path'][i], arrays['status'][i]]
+                row += [repr(float(arrays[name][i])) for name in self.TIME_FIELDS]
+                row += [int(arrays[name][i]) for name in self.COUNT_FIELDS]
+                writer.writerow(row)
@@ -39,8 +39,19 @@ class AdvancedInteractiveIKDemo:
         self.trajectory_points = []
         self.trajectory_joint_angles = []
         
-        # IK方法选择 (0: 优化IK, 1: 雅可比IK)
+        # 轨迹播放的采样周期 (轨迹时间，秒/帧)
+        self.playback_dt = 0.05
+        
+        # 播放时使用blit (后端不支持时自动退回整图重绘)
+        self.use_blit = True
+        
+        # 播放前简化路径点的允许偏差 (笛卡尔: 长度单位，关节空间: rad)
+        self.simplify_tolerance = 0.01
+        self.simplify_joint_tolerance = 0.01
+        
+        # IK方法选择 (0: 优化IK, 1: 雅可比IK, 2: 解析IK)
         self.ik_method = 0
+        self.ik_method_names = ["Simp Optim IK", "Jacobian IK", "Analytic IK"]
         
         # 插值方式 (0: joint space, 1: operational space)
         self.interp_mode = 0  # 0: joint space, 1: operational space
@@ -52,6 +63,7 @@ class AdvancedInteractiveIKDemo:
         
         # Connect events
         self.fig.canvas.mpl_connect('button_press_event', self.on_click)
+        self.fig.canvas.mpl_connect('button_release_event', self.on_release)
         self.fig.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
         
         # Add control elements
@@ -97,8 +109,61 @@ class AdvancedInteractiveIKDemo:
         self.ax.set_aspect('equal')
         
         # Show workspace
-        x_coords, y_coords = self.robot.get_workspace_boundary(num_points=500)
-        self.ax.scatter(x_coords, y_coords, c='lightblue', alpha=0.3, s=1, label='Workspace')
+        self.ax.add_patch(self._get_workspace_artist())
+        
+        self._create_artists()
+    
+    def _create_artists(self):
+        """
+        创建轨迹、机器人、目标和文字的artist (只创建一次，之后只更新数据)
+        """
+        text_style = dict(transform=self.ax.transAxes, verticalalignment='top')
+        self.trajectory_line, = self.ax.plot([], [], 'g-', alpha=0.5, linewidth=2, label='Trajectory')
+        self.links_line, = self.ax.plot([], [], 'b-', linewidth=3, label='Robot Links')
+        self.joints_line, = self.ax.plot([], [], 'ro', markersize=8, linestyle='none', label='Joint 1')
+        self.target_marker, = self.ax.plot([], [], 'r*', markersize=15, label='Target Position')
+        self.angle_text = self.ax.text(0.02, 0.98, '', bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.8),
+                                       **text_style)
+        self.error_text = self.ax.text(0.02, 0.93, '', bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.8),
+                                       **text_style)
+        self.method_text = self.ax.text(0.02, 0.88, '', bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.8),
+                                        **text_style)
+        self.interp_text = self.ax.text(0.02, 0.82, '', bbox=dict(boxstyle='round', facecolor='lightyellow', alpha=0.8),
+                                        **text_style)
+        self.status_text = self.ax.text(0.02, 0.05, '', transform=self.ax.transAxes, fontsize=10, color='red',
+                                        verticalalignment='bottom',
+                                        bbox=dict(boxstyle='round', facecolor='white', alpha=0.7))
+        self.ax.legend(loc='upper right')
+        
+        # 关节角度柱状图 (显示规范到 (-180°, 180°] 的角度，纵轴范围固定)
+        self.ax_angles.set_title('Joint Angles')
+        self.ax_angles.set_xlabel('Joint')
+        self.ax_angles.set_ylabel('Angle (rad)')
+        self.ax_angles.grid(True)
+        self.ax_angles.set_ylim(-200, 200)
+        joints = [f'Joint {i + 1}' for i in range(self.robot.n_joints)]
+        self.angle_bars = self.ax_angles.bar(joints, np.zeros(len(joints)), color=['red', 'green', 'blue'])
+        self.angle_labels = [
+            self.ax_angles.text(bar.get_x() + bar.get_width() / 2., 0.0, '', ha='center', va='bottom')
+            for bar in self.angle_bars
+        ]
+    
+    def _robot_artists(self):
+        """
+        轨迹播放时每帧变化的artist (用于blit)
+        """
+        return [self.links_line, self.joints_line, self.angle_text, self.error_text, self.status_text,
+                *self.angle_bars, *self.angle_labels]
+    
+    def _get_workspace_artist(self):
+        """
+        Return the prebuilt workspace artist, rebuilding it only when the link lengths change
+        """
+        key = self.robot.get_workspace().key
+        if getattr(self, '_workspace_key', None) != key:
+            self._workspace_artist = self.visualizer.create_workspace_artist()
+            self._workspace_key = key
+        return self._workspace_artist
     
     def setup_controls(self):
         """
@@ -152,11 +217,24 @@ class AdvancedInteractiveIKDemo:
         # 设置目标位置
         self.target_position = [x, y, 0]
         
+        # 按住鼠标拖动时继续记录路径点
+        self.mouse_pressed = True
+        self.last_mouse_pos = [x, y]
+        
         # 计算IK解
-        if self.ik_method == 0:
-            ik_solution = self.robot.inverse_kinematics_optimization(self.target_position, initial_guess=self.current_joint_angles)
-        else:
-            ik_solution = self.robot.inverse_kinematics_jacobian(self.target_position, initial_guess=self.current_joint_angles)
+        self._record_waypoint()
+        
+        # 更新图形
+        self.update_plot()
+        
+        # 重绘
+        self.fig.canvas.draw_idle()
+    
+    def _record_waypoint(self):
+        """
+        求解目标位置的IK，成功时把目标位置和关节角度加入轨迹
+        """
+        ik_solution = self.compute_ik(self.target_position)
         if ik_solution is not None:
             self.current_joint_angles = ik_solution
             self.ik_solution = ik_solution
@@ -165,18 +243,19 @@ class AdvancedInteractiveIKDemo:
             self.status_message = ''
         else:
             self.status_message = 'IK Solution failed!'
-        
-        # 更新图形
-        self.update_plot()
-        
-        # 重绘
-        self.fig.canvas.draw_idle()
+    
+    def on_release(self, event):
+        """
+        处理鼠标释放事件（结束拖动）
+        """
+        self.mouse_pressed = False
+        self.last_mouse_pos = None
     
     def on_mouse_move(self, event):
         """
         处理鼠标移动事件（用于轨迹绘制）
         """
-        if event.inaxes != self.ax:
+        if self.animation_running or event.inaxes != self.ax:
             return
         
         if not self.mouse_pressed:
@@ -193,11 +272,10 @@ class AdvancedInteractiveIKDemo:
            np.linalg.norm([x - self.last_mouse_pos[0], y - self.last_mouse_pos[1]]) > 0.1:
             
             self.target_position = [x, y, 0]
-            self.trajectory_points.append(self.target_position.copy())
             self.last_mouse_pos = [x, y]
             
             # 计算IK解
-            self.solve_ik()
+            self._record_waypoint()
             
             # 更新图形
             self.update_plot()
@@ -205,6 +283,33 @@ class AdvancedInteractiveIKDemo:
             # 重绘
             self.fig.canvas.draw()
     
+    def compute_ik(self, target_position):
+        """
+        用当前选择的IK方法求解目标位置，以当前关节角度作为初始值
+        
+        解析IK返回离当前构型最近的分支，无解时退回优化IK
+        """
+        if self.ik_method == 0:
+            # 优化IK
+            return self.robot.inverse_kinematics_optimization(
+                target_position, initial_guess=self.current_joint_angles
+            )
+        if self.ik_method == 1:
+            # 雅可比IK
+            return self.robot.inverse_kinematics_jacobian(
+                target_position, initial_guess=self.current_joint_angles
+            )
+        
+        # 解析IK
+        solutions = self.robot.inverse_kinematics_analytic(
+            target_position, initial_guess=self.current_joint_angles
+        )
+        if solutions is not None:
+            return solutions[0]
+        return self.robot.inverse_kinematics_optimization(
+            target_position, initial_guess=self.current_joint_angles
+        )
+    
     def solve_ik(self):
         """
         求解IK
@@ -213,16 +318,7 @@ class AdvancedInteractiveIKDemo:
             return
         
         try:
-            if self.ik_method == 0:
-                # 优化IK
-                self.ik_solution = self.robot.inverse_kinematics_optimization(
-                    self.target_position, initial_guess=self.current_joint_angles
-                )
-            else:
-                # 雅可比IK
-                self.ik_solution = self.robot.inverse_kinematics_jacobian(
-                    self.target_position, initial_guess=self.current_joint_angles
-                )
+            self.ik_solution = self.compute_ik(self.target_position)
             
             if self.ik_solution is not None:
                 self.current_joint_angles = self.ik_solution.copy()
@@ -241,118 +337,83 @@ class AdvancedInteractiveIKDemo:
     def update_plot(self):
         """
         更新图形显示
-        """
-        # 清除主图形
-        self.ax.clear()
-        
-        # 重新设置主图形
-        max_reach = sum(self.robot.link_lengths)
-        self.ax.set_xlim(-max_reach*1.2, max_reach*1.2)
-        self.ax.set_ylim(-max_reach*1.2, max_reach*1.2)
-        self.ax.set_xlabel('X (m)')
-        self.ax.set_ylabel('Y (m)')
-        self.ax.set_title('Advanced Interactive IK Demo')
-        self.ax.grid(True)
-        self.ax.set_aspect('equal')
-        
-        # 显示工作空间
-        x_coords, y_coords = self.robot.get_workspace_boundary(num_points=500)
-        self.ax.scatter(x_coords, y_coords, c='lightblue', alpha=0.3, s=1, label='Workspace')
         
+        只更新已有artist的数据，不清除坐标轴；返回更新过的artist。
+        调用方负责重绘 (draw_idle) 或由动画blit。
+        """
         # 绘制轨迹
         if len(self.trajectory_points) > 1:
-            traj_x = [p[0] for p in self.trajectory_points]
-            traj_y = [p[1] for p in self.trajectory_points]
-            self.ax.plot(traj_x, traj_y, 'g-', alpha=0.5, linewidth=2, label='Trajectory')
-        
-        # 绘制当前机器人配置
-        joint_positions = self.visualizer._calculate_joint_positions(self.current_joint_angles)
-        
-        # 绘制连杆
-        for i in range(len(joint_positions) - 1):
-            start_pos = joint_positions[i]
-            end_pos = joint_positions[i + 1]
-            self.ax.plot([start_pos[0], end_pos[0]], 
-                        [start_pos[1], end_pos[1]], 
-                        'b-', linewidth=3, label='Robot Links' if i == 0 else "")
-        
-        # 绘制关节
-        for i, pos in enumerate(joint_positions):
-            self.ax.plot(pos[0], pos[1], 'ro', markersize=8, 
-                        label=f'Joint {i+1}' if i == 0 else "")
+            points = np.asarray(self.trajectory_points, dtype=float)
+            self.trajectory_line.set_data(points[:, 0], points[:, 1])
+        else:
+            self.trajectory_line.set_data([], [])
         
         # 绘制目标位置
         if self.target_position is not None:
-            self.ax.plot(self.target_position[0], self.target_position[1], 
-                        'r*', markersize=15, label='Target Position')
-            
-            # 如果IK求解成功，显示信息
+            self.target_marker.set_data([self.target_position[0]], [self.target_position[1]])
+        else:
+            self.target_marker.set_data([], [])
+        
+        # 显示当前IK方法
+        self.method_text.set_text(f"Current method: {self.ik_method_names[self.ik_method]}")
+        self.interp_text.set_text(f"Interp mode: {self.interp_mode_names[self.interp_mode]}")
+        
+        return [self.trajectory_line, self.target_marker, self.method_text, self.interp_text] + \
+            self.update_robot_artists()
+    
+    def update_robot_artists(self):
+        """
+        更新机器人构型、关节角度和状态信息
+        """
+        # 绘制当前机器人配置 (连杆为一条折线，关节为标记)
+        joint_positions = np.asarray(self.visualizer._calculate_joint_positions(self.current_joint_angles))
+        self.links_line.set_data(joint_positions[:, 0], joint_positions[:, 1])
+        self.joints_line.set_data(joint_positions[:, 0], joint_positions[:, 1])
+        
+        self.angle_text.set_text('')
+        self.error_text.set_text('')
+        self.error_text.set_visible(False)
+        if self.target_position is not None:
             if self.ik_solution is not None:
                 # 显示关节角度信息
-                angle_text = f"Joint angles: [{', '.join([f'{a:.2f}' for a in self.ik_solution])}]"
-                self.ax.text(0.02, 0.98, angle_text, transform=self.ax.transAxes,
-                           verticalalignment='top',
-                           bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.8))
+                self.angle_text.set_text(
+                    f"Joint angles: [{', '.join([f'{a:.2f}' for a in self.ik_solution])}]"
+                )
+                self.angle_text.get_bbox_patch().set_facecolor('lightgreen')
                 
                 # 计算误差
                 actual_pos = self.robot.get_end_effector_position(self.ik_solution)
                 error = np.linalg.norm(actual_pos - self.target_position)
-                error_text = f"Position error: {error:.4f}"
-                self.ax.text(0.02, 0.93, error_text, transform=self.ax.transAxes,
-                           verticalalignment='top',
-                           bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.8))
+                self.error_text.set_text(f"Position error: {error:.4f}")
+                self.error_text.set_visible(True)
             else:
                 # IK求解失败
-                self.ax.text(0.02, 0.98, "IK solution failed - Target position unreachable", 
-                           transform=self.ax.transAxes, verticalalignment='top',
-                           bbox=dict(boxstyle='round', facecolor='lightcoral', alpha=0.8))
+                self.angle_text.set_text("IK solution failed - Target position unreachable")
+                self.angle_text.get_bbox_patch().set_facecolor('lightcoral')
+        self.angle_text.set_visible(bool(self.angle_text.get_text()))
         
-        # 显示当前IK方法
-        method_name = "Simp Optim IK" if self.ik_method == 0 else "Jacobian IK"
-        interp_name = self.interp_mode_names[self.interp_mode]
-        self.ax.text(0.02, 0.88, f"Current method: {method_name}", 
-                    transform=self.ax.transAxes, verticalalignment='top',
-                    bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.8))
-        self.ax.text(0.02, 0.82, f"Interp mode: {interp_name}",
-                    transform=self.ax.transAxes, verticalalignment='top',
-                    bbox=dict(boxstyle='round', facecolor='lightyellow', alpha=0.8))
-        
-        # 更新图例
-        handles, labels = self.ax.get_legend_handles_labels()
-        by_label = dict(zip(labels, handles))
-        self.ax.legend(by_label.values(), by_label.keys(), loc='upper right')
+        # 在主图左下角显示status_message
+        self.status_text.set_text(self.status_message if getattr(self, 'status_message', '') else '')
+        self.status_text.set_visible(bool(self.status_text.get_text()))
         
         # 更新关节角度图
         self.update_angles_plot()
         
-        # 移除 update_error_plot 的调用
-        # self.update_error_plot()
-        # 在主图右下角显示status_message
-        if hasattr(self, 'status_message') and self.status_message:
-            self.ax.text(0.02, 0.05, self.status_message, transform=self.ax.transAxes,
-                         fontsize=10, color='red', verticalalignment='bottom',
-                         bbox=dict(boxstyle='round', facecolor='white', alpha=0.7))
+        return self._robot_artists()
     
     def update_angles_plot(self):
         """
         更新关节角度图
         """
-        self.ax_angles.clear()
-        self.ax_angles.set_title('Joint Angles')
-        self.ax_angles.set_xlabel('Joint')
-        self.ax_angles.set_ylabel('Angle (rad)')
-        self.ax_angles.grid(True)
-        
         if self.ik_solution is not None:
-            joints = ['Joint 1', 'Joint 2', 'Joint 3']
-            angles = [np.degrees(a) for a in self.ik_solution]  # 转换为度
-            bars = self.ax_angles.bar(joints, angles, color=['red', 'green', 'blue'])
-            
-            # 添加数值标签
-            for bar, angle in zip(bars, angles):
-                height = bar.get_height()
-                self.ax_angles.text(bar.get_x() + bar.get_width()/2., height,
-                                  f'{angle:.1f}°', ha='center', va='bottom')
+            # 转换为度，规范到 (-180°, 180°]
+            angles = np.degrees(np.arctan2(np.sin(self.ik_solution), np.cos(self.ik_solution)))
+        else:
+            angles = np.zeros(len(self.angle_bars))
+        for bar, label, angle in zip(self.angle_bars, self.angle_labels, angles):
+            bar.set_height(angle)
+            label.set_y(angle)
+            label.set_text(f'{angle:.1f}°' if self.ik_solution is not None else '')
     
     # 移除 update_error_plot 方法
     # def update_error_plot(self):
@@ -393,14 +454,11 @@ class AdvancedInteractiveIKDemo:
         """
         切换IK方法，并尝试将当前目标点加入轨迹（如果新方法求解成功且未重复）
         """
-        self.ik_method = 1 - self.ik_method
-        print(f"Switched IK method to: {'Jacobian' if self.ik_method else 'Optimization'}")
+        self.ik_method = (self.ik_method + 1) % len(self.ik_method_names)
+        print(f"Switched IK method to: {self.ik_method_names[self.ik_method]}")
         # 对当前目标点重新求解
         if self.target_position is not None:
-            if self.ik_method == 0:
-                ik_solution = self.robot.inverse_kinematics_optimization(self.target_position, initial_guess=self.current_joint_angles)
-            else:
-                ik_solution = self.robot.inverse_kinematics_jacobian(self.target_position, initial_guess=self.current_joint_angles)
+            ik_solution = self.compute_ik(self.target_position)
             if ik_solution is not None:
                 self.current_joint_angles = ik_solution
                 self.ik_solution = ik_solution
@@ -442,55 +500,102 @@ class AdvancedInteractiveIKDemo:
             return
         self.animation_running = True
         self.btn_play.label.set_text('Playing...')
+        trajectory_points, trajectory_joint_angles = self._simplified_waypoints()
+        # 流式生成关节设定点: 第一帧不需要等待整条轨迹计算完成
+        if self.interp_mode == 0:
+            setpoints = PathPlanner.stream_joint_space(
+                trajectory_joint_angles,
+                dt=self.playback_dt,
+                vmax=1.0,
+                amax=1.0
+            )
+        else:
+            setpoints = PathPlanner.stream_operational_space(
+                trajectory_points,
+                dt=self.playback_dt,
+                vmax=1.0,
+                amax=1.0,
+                robot=self.robot,
+                initial_joint_angles=trajectory_joint_angles[0]
+            )
+        self.status_message = ''
+        # blit: 静态背景 (坐标轴、工作空间、轨迹) 只绘制一次并缓存，每帧只重绘机器人相关的artist
+        self.anim = FuncAnimation(self.fig, self.animation_frame, frames=self._playback_frames(setpoints, trajectory_joint_angles),
+                                  init_func=self._robot_artists, interval=30 / self.speed_slider.val,
+                                  repeat=False, cache_frame_data=False,
+                                  blit=self.use_blit and self.fig.canvas.supports_blit)
+        print("Animation started")
+        self.fig.canvas.draw_idle()
+    
+    def _simplified_waypoints(self):
+        """
+        删除冗余路径点 (拖动记录的路径很密)
+        
+        按当前插值方式在关节空间或笛卡尔空间简化，两个列表保留相同的下标。
+        
+        返回:
+            trajectory_points, trajectory_joint_angles: 简化后的数组
+        """
+        points = np.asarray(self.trajectory_points, dtype=float)
+        joint_angles = np.asarray(self.trajectory_joint_angles, dtype=float)
+        if self.interp_mode == 0:
+            _, indices = PathPlanner.simplify(joint_angles, self.simplify_joint_tolerance)
+        else:
+            _, indices = PathPlanner.simplify(points, self.simplify_tolerance)
+        if len(indices) < len(points):
+            print(f"Simplified trajectory: {len(points)} -> {len(indices)} waypoints")
+        return points[indices], joint_angles[indices]
+    
+    def _playback_frames(self, setpoints, waypoints):
+        """
+        将设定点流转换为动画帧 (joint_angles, is_last)
+        
+        插值出错时按waypoints (生成设定点所用的关节路径点) 播放，
+        跳过已经播放到的位置之前的路径点。
+        """
+        previous = None
         try:
-            if self.interp_mode == 0:
-                interp_traj = PathPlanner.interpolate_joint_space(
-                    self.trajectory_joint_angles, 
-                    num_points=20, 
-                    vmax=1.0, 
-                    amax=1.0
-                )
-            else:
-                interp_traj = PathPlanner.interpolate_operational_space(
-                    self.trajectory_points, 
-                    num_points=20, 
-                    vmax=1.0, 
-                    amax=1.0,
-                    robot=self.robot,
-                    initial_joint_angles=self.current_joint_angles
-                )
-            self.interpolated_traj = interp_traj
-            self.status_message = ''
+            for _, joint_angles in setpoints:
+                if previous is not None:
+                    yield previous, False
+                previous = joint_angles
         except Exception as e:
             msg = f"[Warning] Interpolation failed: {e}\nUsing waypoints as trajectory."
             print(msg)
-            self.interpolated_traj = np.array(self.trajectory_joint_angles)
             self.status_message = msg
-        self.anim = FuncAnimation(self.fig, self.animation_frame, frames=len(self.interpolated_traj),
-                                  interval=30 / self.speed_slider.val, repeat=False)
-        print("Animation started")
-        self.fig.canvas.draw_idle()
+            waypoints = np.asarray(waypoints, dtype=float)
+            if previous is not None:
+                # 从距离当前位置最近的路径点之后继续，避免跳回起点
+                nearest = int(np.argmin(np.linalg.norm(waypoints - previous, axis=1)))
+                waypoints = waypoints[nearest + 1:]
+            for joint_angles in waypoints:
+                if previous is not None:
+                    yield previous, False
+                previous = joint_angles
+        if previous is None:
+            previous = self.current_joint_angles
+        yield previous, True
     
     def animation_frame(self, frame):
         """
         动画每一帧的更新函数
         """
-        # 更新当前关节角度为轨迹点对应的IK解
-        if frame < len(self.interpolated_traj)-1:
-            self.current_joint_angles = self.interpolated_traj[frame]
-            self.ik_solution = self.current_joint_angles
-        else:
-            # 如果动画帧数超过插值轨迹长度，则停止动画
-            self.current_joint_angles = self.interpolated_traj[-1]
-            self.ik_solution = self.current_joint_angles
+        joint_angles, is_last = frame
+        # 更新当前关节角度为轨迹设定点
+        self.current_joint_angles = joint_angles
+        self.ik_solution = self.current_joint_angles
+        artists = self.update_robot_artists()
+        if is_last:
+            # 轨迹播放完毕，停止动画
             self.animation_running = False
             if self.anim is not None:
                 self.anim.event_source.stop()
             self.btn_play.label.set_text('Play Trajectory')
-            
-        self.update_plot()
-        # 返回一个空列表，兼容 blit=False
-        return []
+            # blit期间这些artist被标记为animated，普通重绘时不会绘制，需要恢复
+            for artist in artists:
+                artist.set_animated(False)
+            self.fig.canvas.draw_idle()
+        return artists
     
     def on_speed_change(self, val):
         if self.animation_running:
@@ -4,6 +4,8 @@
 """
 
 from .three_link_robot import ThreeLinkRobot
+from .workspace import Workspace
+from .trajectory import Trajectory
 from .utils import *
 
-__all__ = ['ThreeLinkRobot'] 
\ No newline at end of file
+__all__ = ['ThreeLinkRobot', 'Workspace', 'Trajectory'] 
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+并行批处理模块
+将大量相互独立的IK和轨迹规划任务分片到进程池中执行
+
+输入和结果数组都放在共享内存中，工作进程只接收分片下标，
+结果直接写回共享数组，不需要序列化传回主进程。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .path_planning import PathPlanner
+from .three_link_robot import ThreeLinkRobot
+
+
+class _SharedArray:
+    """
+    共享内存中的numpy数组
+    """
+
+    def __init__(self, shape, dtype=np.float64, name=None):
+        """
+        创建 (name为None) 或连接已有的共享内存数组
+
+        参数:
+            shape: 数组形状
+            dtype: 数据类型
+            name: 共享内存名称
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        nbytes = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.owner = True
+        else:
+            # 工作进程与主进程共用同一个resource_tracker，重复登记无副作用，
+            # 由创建方统一unlink
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @classmethod
+    def from_array(cls, array):
+        """
+        创建共享数组并拷贝数据
+        """
+        array = np.ascontiguousarray(array)
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def spec(self):
+        """
+        供工作进程连接的描述 (name, shape, dtype)
+        """
+        return self.shm.name, self.shape, self.dtype.str
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        return cls(shape, dtype, name=name)
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _chunk_ranges(n_jobs, chunk_size):
+    """
+    按输入顺序划分任务区间 [start, stop)
+    """
+    return [(start, min(start + chunk_size, n_jobs)) for start in range(0, n_jobs, chunk_size)]
+
+
+def _run_sharded(worker, n_jobs, shared_specs, params, n_workers, chunk_size):
+    """
+    将任务区间分发到进程池 (n_workers为1时在当前进程中直接执行)
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-n_jobs // (4 * n_workers)))
+
+    tasks = [(start, stop, shared_specs, params) for start, stop in _chunk_ranges(n_jobs, chunk_size)]
+
+    if n_workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            worker(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as executor:
+        # 消费迭代器以传播工作进程中的异常
+        for _ in executor.map(worker, tasks):
+            pass
+
+
+def _ik_worker(task):
+    start, stop, specs, params = task
+    shared = {key: _SharedArray.attach(spec) for key, spec in specs.items()}
+    try:
+        robot = ThreeLinkRobot(link_lengths=params['link_lengths'])
+        offsets = shared['offsets'].array
+        targets = shared['targets'].array
+        seeds = shared['seeds'].array
+        for job in range(start, stop):
+            lo, hi = offsets[job], offsets[job + 1]
+            solutions, converged, residuals = robot.solve_ik_batch(
+                targets[lo:hi], initial_guess=seeds[job], **params['ik_kwargs']
+            )
+            shared['solutions'].array[lo:hi] = solutions
+            shared['converged'].array[lo:hi] = converged
+            shared['residuals'].array[lo:hi] = residuals
+    finally:
+        for array in shared.values():
+            array.close()
+
+
+def _joint_trajectory_worker(task):
+    start, stop, specs, params = task
+    shared = {key: _SharedArray.attach(spec) for key, spec in specs.items()}
+    try:
+        offsets = shared['offsets'].array
+        waypoints = shared['waypoints'].array
+        for job in range(start, stop):
+            lo, hi = offsets[job], offsets[job + 1]
+            shared['trajectories'].array[job] = PathPlanner.interpolate_joint_space(
+                waypoints[lo:hi], **params
+            )
+    finally:
+        for array in shared.values():
+            array.close()
+
+
+def _pack_ragged(arrays):
+    """
+    将不等长的数组列表拼接为一个连续数组和偏移量
+    """
+    arrays = [np.atleast_2d(np.asarray(a, dtype=float)) for a in arrays]
+    lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    return np.concatenate(arrays, axis=0), offsets
+
+
+def parallel_solve_ik(link_lengths, target_sets, initial_guesses=None, n_workers=None,
+                      chunk_size=None, **ik_kwargs):
+    """
+    并行求解多组目标点的逆运动学
+
+    每组目标点内部按ThreeLinkRobot.solve_ik_batch求解 (默认顺序热启动)，
+    不同组之间相互独立，按chunk_size分片到进程池。
+
+    参数:
+        link_lengths: 连杆长度列表
+        target_sets: 目标点组列表，每组形状 (K_i, 2) 或 (K_i, 3)
+        initial_guesses: 每组的初始关节角度，形状 (J, n_joints)；None时为零
+        n_workers: 进程数 (默认CPU核数)
+        chunk_size: 每个分片包含的组数
+        **ik_kwargs: 传给solve_ik_batch的其他参数
+
+    返回:
+        solutions: 关节角度列表，与target_sets一一对应，每项形状 (K_i, n_joints)
+        converged: 收敛标志列表，每项形状 (K_i,)
+        residuals: 位置误差列表，每项形状 (K_i,)
+    """
+    robot = ThreeLinkRobot(link_lengths=link_lengths)
+    targets, offsets = _pack_ragged(target_sets)
+    n_jobs = len(offsets) - 1
+    n_targets = len(targets)
+
+    if initial_guesses is None:
+        initial_guesses = np.zeros((n_jobs, robot.n_joints))
+    initial_guesses = np.broadcast_to(np.asarray(initial_guesses, dtype=float), (n_jobs, robot.n_joints))
+
+    shared = {
+        'targets': _SharedArray.from_array(targets),
+        'offsets': _SharedArray.from_array(offsets),
+        'seeds': _SharedArray.from_array(initial_guesses),
+        'solutions': _SharedArray((n_targets, robot.n_joints)),
+        'converged': _SharedArray((n_targets,), dtype=bool),
+        'residuals': _SharedArray((n_targets,)),
+    }
+    try:
+        specs = {key: array.spec for key, array in shared.items()}
+        params = {'link_lengths': list(link_lengths), 'ik_kwargs': ik_kwargs}
+        _run_sharded(_ik_worker, n_jobs, specs, params, n_workers, chunk_size)
+
+        solutions = shared['solutions'].array.copy()
+        converged = shared['converged'].array.copy()
+        residuals = shared['residuals'].array.copy()
+    finally:
+        for array in shared.values():
+            array.close()
+
+    split = offsets[1:-1]
+    return np.split(solutions, split), np.split(converged, split), np.split(residuals, split)
+
+
+def parallel_interpolate_joint_space(waypoint_sets, num_points=10, vmax=1.0, amax=1.0,
+                                     n_workers=None, chunk_size=None):
+    """
+    并行生成多组关节空间轨迹
+
+    参数:
+        waypoint_sets: 关节路径点组列表，每组形状 (N_i, dof)
+        num_points: 每条轨迹的插值点数
+        vmax: 最大速度
+        amax: 最大加速度
+        n_workers: 进程数 (默认CPU核数)
+        chunk_size: 每个分片包含的轨迹数
+
+    返回:
+        trajectories: 形状 (J, num_points, dof)，顺序与waypoint_sets一致
+    """
+    waypoints, offsets = _pack_ragged(waypoint_sets)
+    n_jobs = len(offsets) - 1
+    dof = waypoints.shape[1]
+
+    shared = {
+        'waypoints': _SharedArray.from_array(waypoints),
+        'offsets': _SharedArray.from_array(offsets),
+        'trajectories': _SharedArray((n_jobs, num_points, dof)),
+    }
+    try:
+        specs = {key: array.spec for key, array in shared.items()}
+        params = {'num_points': num_points, 'vmax': vmax, 'amax': amax}
+        _run_sharded(_joint_trajectory_worker, n_jobs, specs, params, n_workers, chunk_size)
+
+        trajectories = shared['trajectories'].array.copy()
+    finally:
+        for array in shared.values():
+            array.close()
+
+    return trajectories
@@ -1,10 +1,19 @@
 """
 PathPlanning module for trajectory interpolation.
-支持关节空间和操作空间的梯形速度轨迹插值。
+支持关节空间和操作空间的梯形速度轨迹插值，以及三次/五次样条和B样条插值，
+并可在关节速度、加速度约束下对路径做时间最优重新定时。
+规划前可用simplify删除密集路径中的冗余路径点。
 """
 import numpy as np
 
+from . import splines, topp
+from .simplify import simplify_path
+from .profiles import TrapezoidProfile
+from .trajectory import Trajectory
+
 class PathPlanner:
+    METHODS = ('trapezoid', 'cubic', 'quintic', 'bspline')
+
     @staticmethod
     def _calculate_trapezoid_profile(distance, num_points, vmax, amax):
         """
@@ -17,39 +26,191 @@ class PathPlanner:
         返回：
             s: 位移序列
             t: 时间序列
-            
-        TODO:
-        1. 实现梯形速度轨迹的计算
-           - 计算加速和减速时间
-           - 处理加速、匀速和减速三个阶段
-           - 确保满足最大速度和加速度约束
-           - 处理总距离过短的特殊情况（需要重新计算最大速度）
         """
+        profile = TrapezoidProfile(distance, vmax, amax)
+        t, s, _, _ = profile.sample(num_points)
+        return s, t
+
+    @staticmethod
+    def _line_limits(distance, vmax, amax):
+        """
+        沿直线运动时各轴的速度、加速度上限
+
+        末端沿位移方向 u 运动时，若路径长度上的梯形轨迹取标量限值
+            v_s = min_i vmax_i / |u_i|,  a_s = min_i amax_i / |u_i|
+        则各轴限值取 v_s |u_i| 和 a_s |u_i| 后，所有轴的最短时长相同，
+        同步后各轴位移与路径长度成比例，末端保持在直线上且不超过原限值。
+
+        参数:
+            distance: 各段位移，形状 (..., dim)
+            vmax: 最大速度 (每个维度)
+            amax: 最大加速度 (每个维度)
+
+        返回:
+            vmax, amax: 形状与distance相同的各轴限值 (不运动的轴取原限值)
+        """
+        distance = np.asarray(distance, dtype=float)
+        vmax = np.broadcast_to(np.asarray(vmax, dtype=float), distance.shape)
+        amax = np.broadcast_to(np.asarray(amax, dtype=float), distance.shape)
+        length = np.linalg.norm(distance, axis=-1, keepdims=True)
+        direction = np.abs(np.divide(distance, length, out=np.zeros_like(distance), where=length > 0))
+        moving = direction > 0
+        with np.errstate(divide='ignore'):
+            v_line = np.min(np.where(moving, vmax / direction, np.inf), axis=-1, keepdims=True)
+            a_line = np.min(np.where(moving, amax / direction, np.inf), axis=-1, keepdims=True)
+        # 长度为零的段没有运动的轴
+        v_line = np.where(np.isfinite(v_line), v_line, 0.0)
+        a_line = np.where(np.isfinite(a_line), a_line, 0.0)
+        return np.where(moving, v_line * direction, vmax), np.where(moving, a_line * direction, amax)
+
+    @staticmethod
+    def simplify(waypoints, tolerance=0.01):
+        """
+        删除冗余路径点 (Ramer–Douglas–Peucker)
+
+        原路径点到简化后折线的距离不超过tolerance，规划和播放的开销随路径形状
+        而不是记录密度增长。笛卡尔路径点和关节路径点都可以使用。
+
+        参数:
+            waypoints: 路径点，形状 (N, dim)
+            tolerance: 允许的最大偏差 (与路径点同单位)
+
+        返回:
+            simplified: 保留的路径点，形状 (M, dim)
+            indices: 保留点的下标 (用于同步简化对应的关节角度或笛卡尔位置)
+        """
+        return simplify_path(waypoints, tolerance)
+
+    @staticmethod
+    def plan_spline(waypoints, method='cubic', times=None, vmax=1.0, start_time=0.0, degree=3):
+        """
+        样条轨迹 (经过所有路径点，中间不停顿，起点和终点速度为0)
+
+        参数:
+            waypoints: 路径点，形状 (N, dof)
+            method: 'cubic' (C2)、'quintic' (C4，端点加速度也为0) 或 'bspline'
+            times: 各路径点的时刻 (相对于start_time)，None时按vmax由路径点间距估计
+            vmax: 估计节点时间用的平均速度 (标量或每个关节的数组)
+            start_time: 轨迹开始时刻
+            degree: B样条次数
+
+        返回:
+            Trajectory
+
+        注意: 样条只保证经过路径点和端点条件，不保证速度、加速度不超过上限。
+        """
+        waypoints = np.atleast_2d(np.asarray(waypoints, dtype=float))
+        if len(waypoints) == 1:
+            return Trajectory.constant(waypoints[0], start_time=start_time)
+
+        if times is None:
+            times = splines.default_knot_times(waypoints, vmax)
+        times = start_time + np.asarray(times, dtype=float)
+
+        if method == 'cubic':
+            return splines.cubic_spline(times, waypoints)
+        if method == 'quintic':
+            return splines.quintic_spline(times, waypoints)
+        if method == 'bspline':
+            return splines.bspline(times, waypoints, degree)
+        raise ValueError(f"未知的插值方法: {method}，可选 {PathPlanner.METHODS}")
+
+    @staticmethod
+    def plan_joint_space(waypoints, vmax=1.0, amax=1.0, start_time=0.0, method='trapezoid'):
+        """
+        关节空间轨迹
 
-        raise NotImplementedError("Not implemented")
+        'trapezoid' (默认): 分段梯形轨迹，各段依次从静止运动到静止，段内所有关节同时到达；
+        其他方法见plan_spline。vmax/amax可以是标量或每个关节的数组。
 
+        参数:
+            waypoints: 关节路径点，形状 (N, dof)
+            vmax: 最大速度
+            amax: 最大加速度
+            start_time: 轨迹开始时刻
+            method: 插值方法，见 METHODS
+
+        返回:
+            Trajectory (只保存分段系数，可在任意时刻求值)
+        """
+        waypoints = np.atleast_2d(np.asarray(waypoints, dtype=float))
+        if method != 'trapezoid':
+            return PathPlanner.plan_spline(waypoints, method, vmax=vmax, start_time=start_time)
+        if len(waypoints) == 1:
+            return Trajectory.constant(waypoints[0], start_time=start_time)
+
+        profile = TrapezoidProfile(np.diff(waypoints, axis=0), vmax, amax)
+        return profile.to_trajectory(waypoints[:-1], start_time=start_time)
 
     @staticmethod
-    def interpolate_joint_space(waypoints, num_points=10, vmax=1.0, amax=1.0):
+    def plan_operational_space(waypoints, vmax=1.0, amax=1.0, start_time=0.0, method='trapezoid'):
+        """
+        操作空间轨迹
+
+        'trapezoid' (默认): 每段在路径长度上做梯形轨迹，末端在路径点之间走直线，
+        各维度的速度、加速度不超过vmax/amax (见_line_limits)；其他方法见plan_spline。
+
+        参数:
+            waypoints: 末端位置路径点，形状 (N, dim)
+            vmax: 最大速度 (每个维度)
+            amax: 最大加速度 (每个维度)
+            start_time: 轨迹开始时刻
+            method: 插值方法，见 METHODS
+
+        返回:
+            末端位置的Trajectory
+        """
+        waypoints = np.atleast_2d(np.asarray(waypoints, dtype=float))
+        if method != 'trapezoid' or len(waypoints) == 1:
+            return PathPlanner.plan_joint_space(waypoints, vmax, amax, start_time, method)
+
+        distance = np.diff(waypoints, axis=0)
+        profile = TrapezoidProfile(distance, *PathPlanner._line_limits(distance, vmax, amax))
+        return profile.to_trajectory(waypoints[:-1], start_time=start_time)
+
+    @staticmethod
+    def retime(path, vmax=1.0, amax=1.0, num_gridpoints=None, start_time=0.0):
+        """
+        时间最优重新定时 (TOPP-RA)
+
+        保持关节路径的几何形状不变，求在各关节速度、加速度约束下最快的时间参数化。
+        求解后检查网格区间内部，超限时收紧局部限值重新求解，结果满足vmax和amax。
+
+        参数:
+            path: 关节路径，Trajectory (例如plan_joint_space/plan_spline的结果)
+                  或形状 (N, dof) 的关节采样点 (例如interpolate_operational_space的结果)
+            vmax: 各关节最大速度 (标量或形状 (dof,))
+            amax: 各关节最大加速度 (标量或形状 (dof,))
+            num_gridpoints: 路径参数网格点数，None时按路径段数自动选取
+            start_time: 轨迹开始时刻
+
+        返回:
+            Trajectory (起点和终点静止)
         """
-        关节空间插值（梯形速度轨迹）
+        return topp.time_optimal_retime(path, vmax, amax, num_gridpoints, start_time)
+
+    @staticmethod
+    def interpolate_joint_space(waypoints, num_points=10, vmax=1.0, amax=1.0, method='trapezoid'):
+        """
+        关节空间插值（默认梯形速度轨迹）
         参数：
             waypoints: List of joint angle waypoints, shape (N, dof)
             num_points: Number of interpolation points
             vmax: Maximum velocity (per joint)
             amax: Maximum acceleration (per joint)
+            method: 'trapezoid', 'cubic', 'quintic' or 'bspline'
         返回：
             traj: Interpolated joint trajectory, shape (num_points, dof)
             
-        TODO:
-        1. 实现关节空间的轨迹插值(梯形速度轨迹)
-        进阶: 实现其他轨迹插值方法
-
+        各段依次从静止运动到静止，段内所有关节同时到达；
+        vmax/amax可以是标量或每个关节的数组。
         """
-        raise NotImplementedError("Not implemented")
+        _, traj = PathPlanner.plan_joint_space(waypoints, vmax, amax, method=method).sample(num_points)
+        return traj
 
     @staticmethod
-    def interpolate_operational_space(waypoints, num_points=10, vmax=1.0, amax=1.0, robot=None, initial_joint_angles=None):
+    def interpolate_operational_space(waypoints, num_points=10, vmax=1.0, amax=1.0, robot=None, initial_joint_angles=None,
+                                      method='trapezoid'):
         """
         操作空间插值（梯形速度轨迹）
         参数：
@@ -59,12 +220,219 @@ class PathPlanner:
             amax: Maximum acceleration (per dimension)
             robot: ThreeLinkRobot instance for IK calculation
             initial_joint_angles: Initial joint angles for IK calculation
+            method: 'trapezoid', 'cubic', 'quintic' or 'bspline'
         返回：
             traj: Interpolated joint angle trajectory, shape (num_points, dof)
             
-        TODO:
-        1. 实现操作空间的轨迹插值(梯形速度轨迹)
-        进阶: 实现其他轨迹插值方法
+        末端位置按分段梯形轨迹直线插值，再沿轨迹顺序求解IK，
+        每个采样点以上一个解为初始值，保证关节轨迹连续。
+        任一采样点IK不收敛时抛出ValueError。
+        """
+        if robot is None:
+            raise ValueError("操作空间插值需要robot进行IK求解")
+
+        _, points = PathPlanner.plan_operational_space(waypoints, vmax, amax, method=method).sample(num_points)
+        if initial_joint_angles is None:
+            initial_joint_angles = np.zeros(robot.n_joints)
+
+        solutions, converged, _ = robot.solve_ik_batch(points, initial_guess=initial_joint_angles, ordered=True)
+        if not np.all(converged):
+            failed = np.flatnonzero(~converged)
+            raise ValueError(f"{len(failed)}个采样点IK未收敛 (首个: 第{failed[0]}点 {points[failed[0]]})，"
+                             f"路径可能超出工作空间")
+        # solve_ik_batch把角度规范到 (-π, π]，展开以避免在±π处跳变
+        return np.unwrap(solutions, axis=0)
+
+    @staticmethod
+    def interpolate_operational_space_adaptive(waypoints, robot, tolerance=0.005, vmax=1.0, amax=1.0,
+                                               initial_joint_angles=None, max_joint_step=0.5,
+                                               min_interval=1e-3, method='trapezoid', **ik_kwargs):
+        """
+        自适应采样的操作空间插值 (有界偏差法)
+
+        从笛卡尔轨迹的断点开始，沿时间顺序逐段检查相邻两个IK解之间的关节空间直线:
+        取区间时间中点的末端位置p_m，按其在末端弦上的比例在两端关节角度之间线性插值，
+        若插值构型的末端位置偏离p_m超过tolerance，则在中点求解IK并二分该区间。
+        检查只需要一次正运动学，IK只在最终保留的采样点上求解，
+        直线、远离奇异位形的段只用很少的点，偏差大的段自动加密。
+        每次IK都以上一个保留的解为初始值。
+
+        相邻解的某个关节变化超过max_joint_step视为IK跳到了另一个构型分支，
+        同样继续二分；区间短于min_interval仍然跳变时，用保持上一个解末端姿态角的解析逆解
+        作为候选，取关节变化较小的解，仍然跳变的点记录在info['discontinuities']中。
 
+        参数:
+            waypoints: 末端位置路径点，形状 (N, dim)
+            robot: ThreeLinkRobot 对象
+            tolerance: 末端位置的最大偏差 (与路径点同单位)
+            vmax: 最大速度 (每个维度)
+            amax: 最大加速度 (每个维度)
+            initial_joint_angles: 第一个点的IK初始值
+            max_joint_step: 相邻采样点间允许的最大关节变化 (rad)
+            min_interval: 最小采样时间间隔 (s)
+            method: 笛卡尔轨迹的插值方法，见 METHODS
+            **ik_kwargs: 传给solve_ik_batch的其他参数
+
+        返回:
+            t: 采样时刻，形状 (M,)
+            joint_angles: 关节角度，形状 (M, dof) (已展开，连续)
+            info: dict，ik_calls (IK求解次数)、converged (各采样点IK是否收敛)、
+                  discontinuities (无法消除跳变的采样点下标)
+        """
+        if robot is None:
+            raise ValueError("操作空间插值需要robot进行IK求解")
+
+        trajectory = PathPlanner.plan_operational_space(waypoints, vmax, amax, method=method)
+        ik_calls = 0
+
+        def solve(point, seed):
+            nonlocal ik_calls
+            ik_calls += 1
+            solution, converged, _ = robot.solve_ik_batch(
+                point[np.newaxis, :], initial_guess=seed, ordered=True, **ik_kwargs
+            )
+            # 展开到与初始值最接近的角度
+            step = solution[0] - seed
+            return seed + np.arctan2(np.sin(step), np.cos(step)), bool(converged[0])
+
+        seed = np.zeros(robot.n_joints) if initial_joint_angles is None \
+            else np.asarray(initial_joint_angles, dtype=float)
+        t_a = trajectory.start_time
+        p_a = trajectory.position(t_a)
+        q_a, ok = solve(p_a, seed)
+        times, solutions, converged, discontinuities = [t_a], [q_a], [ok], []
+
+        # 待处理区间的右端点及其末端位置 (栈顶为最近的一个)；已求得的解缓存在cached中
+        knots = np.unique(trajectory.breakpoints)[1:]
+        pending = list(zip(knots[::-1], trajectory.position(knots[::-1])))
+        cached = {}
+        while pending:
+            t_b, p_b = pending[-1]
+            q_b, ok_b = cached.pop(t_b, None) or solve(p_b, q_a)
+            jump = np.max(np.abs(q_b - q_a)) > max_joint_step
+
+            if t_b - t_a > min_interval:
+                t_m = 0.5 * (t_a + t_b)
+                p_m = trajectory.position(t_m)
+                # 中点在末端弦上的比例 (加减速段中时间中点不是几何中点)
+                chord = p_b - p_a
+                length_sq = chord @ chord
+                fraction = np.clip((p_m - p_a) @ chord / length_sq, 0.0, 1.0) if length_sq > 0 else 0.5
+                _, positions = robot.forward_kinematics_batch((q_a + fraction * (q_b - q_a))[np.newaxis, :])
+                deviation = np.linalg.norm(positions[0, -1, :len(p_m)] - p_m)
+                if jump or deviation > tolerance:
+                    # 终点跳变时不缓存，之后从更近的初始值重新求解
+                    if not jump:
+                        cached[t_b] = (q_b, ok_b)
+                    pending.append((t_m, p_m))
+                    continue
+            elif jump:
+                # 以相同初始值重新迭代通常得到同一个解，改用保持上一个解末端姿态角的解析解
+                ik_calls += 1
+                candidates = robot.inverse_kinematics_analytic(p_b, orientation=np.sum(q_a), initial_guess=q_a)
+                if candidates is not None:
+                    step = candidates[0] - q_a
+                    retry = q_a + np.arctan2(np.sin(step), np.cos(step))
+                    if np.max(np.abs(retry - q_a)) < np.max(np.abs(q_b - q_a)):
+                        q_b, ok_b = retry, True
+                if np.max(np.abs(q_b - q_a)) > max_joint_step:
+                    discontinuities.append(len(times))
+
+            pending.pop()
+            times.append(t_b)
+            solutions.append(q_b)
+            converged.append(ok_b)
+            t_a, p_a, q_a = t_b, p_b, q_b
+
+        info = {
+            'ik_calls': ik_calls,
+            'converged': np.array(converged),
+            'discontinuities': np.array(discontinuities, dtype=int),
+        }
+        return np.array(times), np.array(solutions), info
+
+    @staticmethod
+    def _stream_segments(waypoints, dt, vmax, amax, straight_line=False):
         """
-        raise NotImplementedError("Not implemented")
\ No newline at end of file
+        逐个时间步生成分段梯形轨迹上的点
+
+        每段的梯形轨迹在到达该段时才计算，首个点的延迟与路径长度无关。
+        采样时刻为 k*dt，最后额外给出终点。
+        straight_line为True时按_line_limits缩放各轴限值，段内的点落在路径点连线上。
+
+        生成:
+            (t, point)
+        """
+        waypoints = np.atleast_2d(np.asarray(waypoints, dtype=float))
+        yield 0.0, waypoints[0].copy()
+
+        tick = 1
+        segment_start = 0.0
+        for start, end in zip(waypoints[:-1], waypoints[1:]):
+            limits = PathPlanner._line_limits(end - start, vmax, amax) if straight_line else (vmax, amax)
+            profile = TrapezoidProfile(end - start, *limits)
+            segment_end = segment_start + float(profile.duration)
+            while tick * dt < segment_end:
+                s, _, _ = profile.evaluate(np.array([tick * dt - segment_start]))
+                yield tick * dt, start + s[0]
+                tick += 1
+            segment_start = segment_end
+
+        if segment_start > 0.0:
+            yield segment_start, waypoints[-1].copy()
+
+    @staticmethod
+    def stream_joint_space(waypoints, dt=0.05, vmax=1.0, amax=1.0):
+        """
+        流式关节空间轨迹: 按控制周期逐个生成关节设定点
+
+        轨迹与interpolate_joint_space相同 (分段梯形、段内关节同步)，
+        但不预先计算整条轨迹，可以边生成边播放或下发给控制器。
+
+        参数:
+            waypoints: 关节路径点，形状 (N, dof)
+            dt: 采样周期 (s)
+            vmax: 最大速度
+            amax: 最大加速度
+
+        生成:
+            (t, joint_angles)
+        """
+        return PathPlanner._stream_segments(waypoints, dt, vmax, amax)
+
+    @staticmethod
+    def stream_operational_space(waypoints, dt=0.05, vmax=1.0, amax=1.0, robot=None,
+                                 initial_joint_angles=None, **ik_kwargs):
+        """
+        流式操作空间轨迹: 每个周期计算一个末端位置并立即求解IK
+
+        末端位置与plan_operational_space相同，在路径点之间走直线。
+        IK以上一个周期的解为初始值，结果展开到与上一个解最接近的角度，
+        避免在±π处跳变。IK不收敛时抛出ValueError (已生成的设定点仍然有效)。
+
+        参数:
+            waypoints: 末端位置路径点，形状 (N, dim)
+            dt: 采样周期 (s)
+            vmax: 最大速度 (每个维度)
+            amax: 最大加速度 (每个维度)
+            robot: ThreeLinkRobot 对象
+            initial_joint_angles: 第一个点的IK初始值
+            **ik_kwargs: 传给solve_ik_batch的其他参数
+
+        生成:
+            (t, joint_angles)
+        """
+        if robot is None:
+            raise ValueError("操作空间插值需要robot进行IK求解")
+
+        joint_angles = np.zeros(robot.n_joints) if initial_joint_angles is None \
+            else np.asarray(initial_joint_angles, dtype=float)
+        for t, point in PathPlanner._stream_segments(waypoints, dt, vmax, amax, straight_line=True):
+            solution, converged, _ = robot.solve_ik_batch(
+                point[np.newaxis, :], initial_guess=joint_angles, ordered=True, **ik_kwargs
+            )
+            if not converged[0]:
+                raise ValueError(f"t={t:.3f}s处IK未收敛 (目标 {point})，路径可能超出工作空间")
+            step = solution[0] - joint_angles
+            joint_angles = joint_angles + np.arctan2(np.sin(step), np.cos(step))
+            yield t, joint_angles
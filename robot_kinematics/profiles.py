@@ -0,0 +1,172 @@
+"""
+梯形速度轨迹
+闭式计算各阶段时长 (含距离过短时的三角形速度轨迹)，向量化采样位移、速度和加速度
+"""
+
+import numpy as np
+
+from .trajectory import Trajectory
+
+
+class TrapezoidProfile:
+    """
+    多轴同步的梯形速度轨迹 (从静止到静止)
+
+    每个轴先以最大加速度加速到峰值速度，匀速运动，再以最大加速度减速。
+    距离不足以加速到vmax时峰值速度降为 sqrt(D * amax)，匀速段时长为0 (三角形轨迹)。
+
+    同步: 最后一维的各轴取共同时长 T (最慢轴的最短时长或指定时长)，
+    其余轴在 T 内完成各自位移，峰值速度取
+        v = (a T - sqrt(a^2 T^2 - 4 a D)) / 2
+    即在加速度上限a下恰好用时T的最小峰值速度，不会超过该轴的vmax。
+
+    distance可以带前导维度 (例如 (S, dof) 表示S段互相独立的运动)，
+    此时每段有各自的时长，evaluate可以按段下标取参数。
+    """
+
+    def __init__(self, distance, vmax, amax, duration=None, synchronize=True):
+        """
+        参数:
+            distance: 各轴位移 (带符号)，形状 (..., n_axes)
+            vmax: 最大速度，标量或可广播到distance的数组
+            amax: 最大加速度，标量或可广播到distance的数组
+            duration: 指定时长 (不能短于最短时长)，None表示用最短时长
+            synchronize: 是否让最后一维的各轴同时完成
+        """
+        distance = np.asarray(distance, dtype=float)
+        vmax = np.broadcast_to(np.asarray(vmax, dtype=float), distance.shape)
+        amax = np.broadcast_to(np.asarray(amax, dtype=float), distance.shape)
+        if np.any(vmax <= 0) or np.any(amax <= 0):
+            raise ValueError("vmax和amax必须为正")
+
+        self.distance = distance
+        self.sign = np.sign(distance)
+        D = np.abs(distance)
+
+        # 各轴独立的最短时间轨迹
+        triangular = D < vmax ** 2 / amax
+        v_peak = np.where(triangular, np.sqrt(D * amax), vmax)
+        t_cruise = np.where(triangular, 0.0, D / vmax - vmax / amax)
+        self.min_duration = 2.0 * v_peak / amax + t_cruise
+
+        if synchronize and distance.ndim > 0:
+            T = self.min_duration.max(axis=-1, keepdims=True)
+        else:
+            T = self.min_duration
+        if duration is not None:
+            duration = np.asarray(duration, dtype=float)
+            if synchronize and distance.ndim > 0:
+                duration = duration[..., np.newaxis]
+            if np.any(duration < T - 1e-12):
+                raise ValueError("指定时长短于满足速度和加速度约束的最短时长")
+            T = np.broadcast_to(duration, T.shape)
+
+        # 给定时长T下的最小峰值速度
+        aT = amax * T
+        discriminant = np.clip(aT ** 2 - 4.0 * amax * D, 0.0, None)
+        self.peak_velocity = np.where(D > 0, (aT - np.sqrt(discriminant)) / 2.0, 0.0)
+        self.acceleration = np.where(D > 0, amax, 0.0)
+        self.t_acc = np.divide(self.peak_velocity, amax)
+        self.duration = T[..., 0] if synchronize and distance.ndim > 0 else T
+        self._T = np.broadcast_to(T, distance.shape)
+
+    def evaluate(self, t, index=None):
+        """
+        计算时刻t的位移、速度和加速度
+
+        参数:
+            t: 时间 (相对于运动开始)，形状 (K,)
+            index: 每个时刻所属的段下标，形状 (K,)；
+                   为None时所有时刻使用同一组参数 (distance不能有前导维度)
+
+        返回:
+            s, v, a: 位移、速度、加速度，形状 (K, n_axes) (distance为标量时为 (K,))
+        """
+        t = np.asarray(t, dtype=float)
+        params = (self.distance, self.sign, self.peak_velocity, self.acceleration, self.t_acc, self._T)
+        if index is None:
+            if self.distance.ndim > 1:
+                raise ValueError("多段轨迹需要给出每个时刻的段下标")
+        else:
+            params = tuple(p[index] for p in params)
+        distance, sign, v_peak, accel, t_acc, T = params
+
+        if distance.ndim > 0:
+            t = t[..., np.newaxis]
+        t = np.clip(t, 0.0, T)
+        t_dec = T - t
+
+        in_acc = t < t_acc
+        in_dec = t_dec < t_acc
+
+        s = np.where(
+            in_acc, 0.5 * accel * t ** 2,
+            np.where(in_dec, np.abs(distance) - 0.5 * accel * t_dec ** 2,
+                     v_peak * (t - 0.5 * t_acc))
+        )
+        v = np.where(in_acc, accel * t, np.where(in_dec, accel * t_dec, v_peak))
+        a = np.where(in_acc, accel, np.where(in_dec, -accel, 0.0))
+        # 结束时刻之后保持静止
+        finished = t >= T
+        v = np.where(finished, 0.0, v)
+        a = np.where(finished, 0.0, a)
+
+        return sign * s, sign * v, sign * a
+
+    def sample(self, num_points):
+        """
+        在 [0, duration] 上均匀采样 (distance无前导维度)
+
+        返回:
+            t: 时间序列，形状 (num_points,)
+            s, v, a: 形状 (num_points, n_axes)
+        """
+        t = np.linspace(0.0, float(np.max(self.duration)), num_points)
+        return (t,) + self.evaluate(t)
+
+    def to_trajectory(self, start_positions, start_time=0.0):
+        """
+        转换为分段二次多项式轨迹 (各段依次首尾相接)
+
+        每段内各轴的加速、匀速、减速切换时刻不同，取它们的并集作为断点，
+        相邻断点之间所有轴都是二次多项式。
+
+        参数:
+            start_positions: 各段起点，形状 (S, n_axes) (distance无前导维度时为 (n_axes,))
+            start_time: 第一段的开始时刻
+
+        返回:
+            Trajectory
+        """
+        distance = np.atleast_2d(self.distance)
+        if distance.ndim != 2:
+            raise ValueError("只支持形状为 (n_axes,) 或 (S, n_axes) 的位移")
+        start_positions = np.atleast_2d(np.asarray(start_positions, dtype=float))
+        n_segments = len(distance)
+        durations = np.atleast_1d(self.duration).reshape(n_segments)
+        t_acc = np.atleast_2d(self.t_acc)
+
+        # 每段的候选断点 (段内时间)，去掉长度为零的小段
+        local = np.sort(np.column_stack([
+            np.zeros(n_segments), t_acc, durations[:, np.newaxis] - t_acc, durations
+        ]), axis=1)
+        local = np.clip(local, 0.0, durations[:, np.newaxis])
+        piece_start, piece_end = local[:, :-1], local[:, 1:]
+        segment = np.broadcast_to(np.arange(n_segments)[:, np.newaxis], piece_start.shape)
+        keep = piece_end - piece_start > 1e-12
+        if not np.any(keep):
+            return Trajectory.constant(start_positions[0] + distance[0], start_time=start_time)
+
+        segment, piece_start, piece_end = segment[keep], piece_start[keep], piece_end[keep]
+        index = segment if self.distance.ndim > 1 else None
+        if index is None:
+            s0, v0, _ = self.evaluate(piece_start)
+            _, _, a_mid = self.evaluate((piece_start + piece_end) / 2)
+        else:
+            s0, v0, _ = self.evaluate(piece_start, index)
+            _, _, a_mid = self.evaluate((piece_start + piece_end) / 2, index)
+
+        coefficients = np.stack([start_positions[segment] + s0, v0, a_mid / 2.0], axis=1)
+        segment_starts = start_time + np.concatenate([[0.0], np.cumsum(durations)])
+        breakpoints = np.append(segment_starts[segment] + piece_start, segment_starts[-1])
+        return Trajectory(breakpoints, coefficients)
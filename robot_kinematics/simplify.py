@@ -0,0 +1,60 @@
+"""
+路径简化
+Ramer–Douglas–Peucker算法删除冗余路径点，保证原路径点到简化后折线的距离不超过给定容差
+"""
+
+import numpy as np
+
+
+def _segment_distance(points, start, end):
+    """
+    各点到线段 [start, end] 的距离
+    """
+    direction = end - start
+    length_sq = direction @ direction
+    if length_sq == 0.0:
+        return np.linalg.norm(points - start, axis=1)
+    t = np.clip((points - start) @ direction / length_sq, 0.0, 1.0)
+    return np.linalg.norm(points - start - t[:, np.newaxis] * direction, axis=1)
+
+
+def simplify_path(points, tolerance):
+    """
+    Ramer–Douglas–Peucker路径简化
+
+    保留首尾点，递归地在偏离首尾连线最远的点处切分，直到所有点到所在线段的距离
+    都不超过tolerance。点可以是笛卡尔位置或关节角度 (任意维度，欧氏距离)。
+
+    参数:
+        points: 路径点，形状 (N, dim)
+        tolerance: 允许的最大偏差 (与points同单位)
+
+    返回:
+        simplified: 保留的路径点，形状 (M, dim)
+        indices: 保留点在原路径中的下标，形状 (M,)，可用于同步简化对应的其他数组
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2:
+        raise ValueError(f"points的形状应为(N, dim)，实际为{points.shape}")
+    n = len(points)
+    if n <= 2:
+        return points.copy(), np.arange(n)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    # 用栈代替递归，避免长路径超出递归深度
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distance = _segment_distance(points[first + 1:last], points[first], points[last])
+        k = int(np.argmax(distance))
+        if distance[k] > tolerance:
+            split = first + 1 + k
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    indices = np.flatnonzero(keep)
+    return points[indices], indices
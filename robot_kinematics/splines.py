@@ -0,0 +1,213 @@
+"""
+样条插值
+三次、五次样条和B样条，连续性方程用带状矩阵求解 (每个关节O(N))，所有关节同时求解
+"""
+
+from math import factorial
+
+import numpy as np
+from scipy.interpolate import make_interp_spline
+from scipy.linalg import solve_banded
+
+from .trajectory import Trajectory
+
+
+def _prepare(times, waypoints):
+    times = np.asarray(times, dtype=float)
+    waypoints = np.asarray(waypoints, dtype=float)
+    if waypoints.ndim == 1:
+        waypoints = waypoints[:, np.newaxis]
+    if len(times) != len(waypoints) or len(times) < 2:
+        raise ValueError("times和waypoints的长度应相同且至少为2")
+    h = np.diff(times)
+    if np.any(h <= 0):
+        raise ValueError("times必须严格递增")
+    return times, waypoints, h
+
+
+def _boundary(value, dof):
+    return np.zeros(dof) if value is None else np.broadcast_to(np.asarray(value, dtype=float), (dof,))
+
+
+def default_knot_times(waypoints, vmax=1.0):
+    """
+    按相邻路径点间最大关节位移估计节点时间 (平均速度为vmax)
+
+    参数:
+        waypoints: 路径点，形状 (N, dof)
+        vmax: 最大速度 (标量或每个关节的数组)
+
+    返回:
+        times: 形状 (N,)，从0开始严格递增
+    """
+    waypoints = np.atleast_2d(np.asarray(waypoints, dtype=float))
+    step = np.max(np.abs(np.diff(waypoints, axis=0)) / np.asarray(vmax, dtype=float), axis=1)
+    # 重复的路径点也给一个很短的时间间隔，保证节点严格递增
+    step = np.maximum(step, 1e-6)
+    return np.concatenate([[0.0], np.cumsum(step)])
+
+
+def cubic_spline(times, waypoints, start_velocity=None, end_velocity=None, natural=False):
+    """
+    三次样条插值 (二阶导数连续)
+
+    未知量为各节点速度 v_i，内部节点的C2连续条件
+        h_i v_{i-1} + 2 (h_{i-1} + h_i) v_i + h_{i-1} v_{i+1} = 3 (h_i d_{i-1} + h_{i-1} d_i)
+    (d_i为第i段的平均速度) 是三对角方程组。
+
+    参数:
+        times: 节点时间，形状 (N,)
+        waypoints: 路径点，形状 (N, dof)
+        start_velocity, end_velocity: 端点速度 (默认为0)
+        natural: 使用自然边界 (端点二阶导数为0)，忽略端点速度
+
+    返回:
+        Trajectory (分段三次多项式)
+    """
+    times, y, h = _prepare(times, waypoints)
+    n, dof = y.shape
+    slope = np.diff(y, axis=0) / h[:, np.newaxis]
+
+    # solve_banded的带状存储: ab[1 + i - j, j] = A[i, j]
+    ab = np.zeros((3, n))
+    rhs = np.zeros((n, dof))
+    ab[1, 1:-1] = 2.0 * (h[:-1] + h[1:])
+    ab[0, 2:] = h[:-1]
+    ab[2, :-2] = h[1:]
+    rhs[1:-1] = 3.0 * (h[1:, np.newaxis] * slope[:-1] + h[:-1, np.newaxis] * slope[1:])
+
+    if natural:
+        ab[1, 0], ab[0, 1], rhs[0] = 2.0, 1.0, 3.0 * slope[0]
+        ab[1, -1], ab[2, -2], rhs[-1] = 2.0, 1.0, 3.0 * slope[-1]
+    else:
+        ab[1, 0], rhs[0] = 1.0, _boundary(start_velocity, dof)
+        ab[1, -1], rhs[-1] = 1.0, _boundary(end_velocity, dof)
+
+    v = solve_banded((1, 1), ab, rhs)
+
+    hh = h[:, np.newaxis]
+    coefficients = np.stack([
+        y[:-1],
+        v[:-1],
+        (3.0 * slope - 2.0 * v[:-1] - v[1:]) / hh,
+        (v[:-1] + v[1:] - 2.0 * slope) / hh ** 2,
+    ], axis=1)
+    return Trajectory(times, coefficients)
+
+
+def _quintic_coefficient_maps(h):
+    """
+    五次Hermite段的系数 c3, c4, c5 关于 (Δy, v0, a0, v1, a1) 的线性表示
+
+    返回:
+        形状 (3, 5, K) 的数组，[c3, c4, c5] x [Δy, v0, a0, v1, a1]
+    """
+    return np.array([
+        [10.0 / h ** 3, -6.0 / h ** 2, -1.5 / h, -4.0 / h ** 2, 0.5 / h],
+        [-15.0 / h ** 4, 8.0 / h ** 3, 1.5 / h ** 2, 7.0 / h ** 3, -1.0 / h ** 2],
+        [6.0 / h ** 5, -3.0 / h ** 4, -0.5 / h ** 3, -3.0 / h ** 4, 0.5 / h ** 3],
+    ])
+
+
+def quintic_spline(times, waypoints, start_velocity=None, end_velocity=None,
+                   start_acceleration=None, end_acceleration=None):
+    """
+    五次样条插值 (四阶导数连续)
+
+    每段为五次Hermite多项式，未知量为各节点的速度和加速度。
+    内部节点要求三阶、四阶导数连续，未知量按 [v0, a0, v1, a1, ...] 排列后
+    系数矩阵是上下带宽为3的带状矩阵。
+
+    参数:
+        times: 节点时间，形状 (N,)
+        waypoints: 路径点，形状 (N, dof)
+        start_velocity, end_velocity: 端点速度 (默认为0)
+        start_acceleration, end_acceleration: 端点加速度 (默认为0)
+
+    返回:
+        Trajectory (分段五次多项式)
+    """
+    times, y, h = _prepare(times, waypoints)
+    n, dof = y.shape
+    delta = np.diff(y, axis=0)
+    maps = _quintic_coefficient_maps(h)
+
+    # 段起点/终点处的三阶、四阶导数关于 (Δy, v0, a0, v1, a1) 的系数
+    c3, c4, c5 = maps
+    jerk_start = 6.0 * c3
+    jerk_end = 6.0 * c3 + 24.0 * c4 * h + 60.0 * c5 * h ** 2
+    snap_start = 24.0 * c4
+    snap_end = 24.0 * c4 + 120.0 * c5 * h
+
+    size = 2 * n
+    ab = np.zeros((7, size))
+    rhs = np.zeros((size, dof))
+
+    def add(rows, cols, values):
+        # 每次调用中 (row, col) 不重复，可以直接用花式索引累加
+        ab[3 + rows - cols, cols] += values
+
+    # 内部节点 i (1..n-2)：左段 L=i-1，右段 R=i
+    knots = np.arange(1, n - 1)
+    left, right = knots - 1, knots
+    for row_offset, end_map, start_map in ((0, jerk_end, jerk_start), (1, snap_end, snap_start)):
+        rows = 2 * knots + row_offset
+        # 左段终点: 未知量 v_{i-1}, a_{i-1}, v_i, a_i
+        for k, col_offset in enumerate((-2, -1, 0, 1)):
+            add(rows, 2 * knots + col_offset, end_map[k + 1, left])
+        # 减去右段起点: 未知量 v_i, a_i, v_{i+1}, a_{i+1}
+        for k, col_offset in enumerate((0, 1, 2, 3)):
+            add(rows, 2 * knots + col_offset, -start_map[k + 1, right])
+        rhs[rows] = -(end_map[0, left, np.newaxis] * delta[left] - start_map[0, right, np.newaxis] * delta[right])
+
+    # 边界条件
+    boundary_rows = np.array([0, 1, size - 2, size - 1])
+    add(boundary_rows, boundary_rows, np.ones(4))
+    rhs[0] = _boundary(start_velocity, dof)
+    rhs[1] = _boundary(start_acceleration, dof)
+    rhs[-2] = _boundary(end_velocity, dof)
+    rhs[-1] = _boundary(end_acceleration, dof)
+
+    solution = solve_banded((3, 3), ab, rhs)
+    v, a = solution[0::2], solution[1::2]
+
+    # 各段系数
+    terms = np.stack([delta, v[:-1], a[:-1], v[1:], a[1:]], axis=0)  # (5, K, dof)
+    high = np.einsum('ctk,tkd->kcd', maps, terms)                     # (K, 3, dof)
+    coefficients = np.concatenate([
+        np.stack([y[:-1], v[:-1], a[:-1] / 2.0], axis=1), high
+    ], axis=1)
+    return Trajectory(times, coefficients)
+
+
+def bspline(times, waypoints, degree=3):
+    """
+    B样条插值
+
+    用scipy的make_interp_spline求B样条控制点 (配置矩阵为带状矩阵)，
+    奇数次时端点导数 (1..(degree-1)/2 阶) 为0，偶数次时使用默认端点条件，
+    再转换为分段多项式 (断点为B样条节点)。
+
+    参数:
+        times: 节点时间，形状 (N,)
+        waypoints: 路径点，形状 (N, dof)
+        degree: 样条次数
+
+    返回:
+        Trajectory
+    """
+    times, y, _ = _prepare(times, waypoints)
+    n_conditions = (degree - 1) // 2
+    if degree % 2 == 1 and n_conditions > 0:
+        conditions = [(order, np.zeros(y.shape[1])) for order in range(1, n_conditions + 1)]
+        spline = make_interp_spline(times, y, k=degree, bc_type=(conditions, conditions))
+    else:
+        spline = make_interp_spline(times, y, k=degree)
+
+    # 节点区间内是多项式，用各段起点处的各阶导数得到升幂系数 c_j = q^(j)(x_k) / j!
+    breakpoints = np.unique(spline.t[degree:len(spline.t) - degree])
+    starts = breakpoints[:-1]
+    coefficients = np.stack([
+        spline(starts, nu=j) / factorial(j) for j in range(degree + 1)
+    ], axis=1)
+    return Trajectory(breakpoints, coefficients)
@@ -3,9 +3,10 @@
 包含正向运动学(FK)和逆向运动学(IK)
 """
 
+import math
 import numpy as np
 from scipy.optimize import minimize
-from .utils import jacobian_matrix
+from .workspace import Workspace
 
 
 class ThreeLinkRobot:
@@ -29,6 +30,9 @@ class ThreeLinkRobot:
         self.dh_params = []
         for i, length in enumerate(link_lengths):
             self.dh_params.append([length, 0, 0, 0])  # theta将在FK中设置
+        
+        # 工作空间缓存 (以连杆长度为失效键)
+        self._workspace = None
     
     def forward_kinematics(self, joint_angles):
         """
@@ -40,15 +44,50 @@ class ThreeLinkRobot:
         返回:
             4x4 齐次变换矩阵，表示末端执行器的位置和姿态
         """
-        # TODO: 实现Forward Kinematic
-        # 提示: 
-        # 1. 使用DH参数计算每个连杆的变换矩阵
-        # 2. 将所有变换矩阵相乘得到末端位置
-        # 3. 注意关节角度的累积效应
+        joint_angles = np.asarray(joint_angles, dtype=float)
+        T, _ = self.forward_kinematics_batch(joint_angles[np.newaxis, :])
+        return T[0]
+    
+    def forward_kinematics_batch(self, joint_angles_batch):
+        """
+        批量正向运动学 - 一次性计算N组关节角度对应的末端位姿和各关节位置
+        
+        平面机器人的第i个连杆方向角为前i个关节角的累加，
+        因此用cumsum得到累积角后，一次cos/sin即可得到所有位置，无需逐个相乘变换矩阵。
+        
+        参数:
+            joint_angles_batch: 关节角度数组，形状 (N, n_joints) (弧度)
+        
+        返回:
+            T: 末端执行器齐次变换矩阵，形状 (N, 4, 4)
+            joint_positions: 基座、各关节及末端的位置，形状 (N, n_joints+1, 3)
+        """
+        q = np.asarray(joint_angles_batch, dtype=float)
+        if q.ndim != 2 or q.shape[1] != self.n_joints:
+            raise ValueError(f"joint_angles_batch的形状应为(N, {self.n_joints})，实际为{q.shape}")
+        n = q.shape[0]
         
-        # 对于平面三连杆机器人，使用简单的几何方法
         # 累积关节角度
-        raise NotImplementedError("Not implemented")
+        theta = np.cumsum(q, axis=1)
+        cos_theta = np.cos(theta)
+        sin_theta = np.sin(theta)
+        
+        # 各关节位置 (基座位于原点)
+        joint_positions = np.zeros((n, self.n_joints + 1, 3))
+        np.cumsum(self.link_lengths * cos_theta, axis=1, out=joint_positions[:, 1:, 0])
+        np.cumsum(self.link_lengths * sin_theta, axis=1, out=joint_positions[:, 1:, 1])
+        
+        # 末端姿态为绕Z轴旋转累积角
+        T = np.zeros((n, 4, 4))
+        T[:, 0, 0] = cos_theta[:, -1]
+        T[:, 0, 1] = -sin_theta[:, -1]
+        T[:, 1, 0] = sin_theta[:, -1]
+        T[:, 1, 1] = cos_theta[:, -1]
+        T[:, 2, 2] = 1.0
+        T[:, 3, 3] = 1.0
+        T[:, :3, 3] = joint_positions[:, -1]
+        
+        return T, joint_positions
     
     def get_end_effector_position(self, joint_angles):
         """
@@ -63,6 +102,63 @@ class ThreeLinkRobot:
         T = self.forward_kinematics(joint_angles)
         return T[:3, 3]
     
+    def jacobian(self, joint_angles):
+        """
+        解析雅可比矩阵 (平面)
+        
+        参数:
+            joint_angles: 关节角度数组 [theta1, theta2, theta3]
+        
+        返回:
+            3xN 雅可比矩阵，行依次对应末端 x, y 和姿态角 phi
+        """
+        joint_angles = np.asarray(joint_angles, dtype=float)
+        return self.jacobian_batch(joint_angles[np.newaxis, :])[0]
+    
+    def jacobian_batch(self, joint_angles_batch):
+        """
+        批量解析雅可比矩阵
+        
+        第j列为关节j之后所有连杆的贡献之和:
+            dx/dq_j = -sum_{i>=j} L_i sin(theta_i)
+            dy/dq_j =  sum_{i>=j} L_i cos(theta_i)
+            dphi/dq_j = 1
+        其中theta_i为累积关节角
+        
+        参数:
+            joint_angles_batch: 关节角度数组，形状 (N, n_joints)
+        
+        返回:
+            形状 (N, 3, n_joints) 的雅可比矩阵
+        """
+        q = np.asarray(joint_angles_batch, dtype=float)
+        if q.ndim != 2 or q.shape[1] != self.n_joints:
+            raise ValueError(f"joint_angles_batch的形状应为(N, {self.n_joints})，实际为{q.shape}")
+        
+        theta = np.cumsum(q, axis=1)
+        link_x = self.link_lengths * np.cos(theta)
+        link_y = self.link_lengths * np.sin(theta)
+        
+        J = np.ones((q.shape[0], 3, self.n_joints))
+        # 反向累加得到每个关节之后的连杆贡献
+        J[:, 0, :] = -np.cumsum(link_y[:, ::-1], axis=1)[:, ::-1]
+        J[:, 1, :] = np.cumsum(link_x[:, ::-1], axis=1)[:, ::-1]
+        
+        return J
+    
+    def manipulability(self, joint_angles):
+        """
+        计算位置可操作度 sqrt(det(Jp Jp^T))
+        
+        参数:
+            joint_angles: 关节角度数组
+        
+        返回:
+            可操作度 (越接近0越接近奇异)
+        """
+        Jp = self.jacobian(joint_angles)[:2]
+        return np.sqrt(max(np.linalg.det(Jp @ Jp.T), 0.0))
+    
     def inverse_kinematics_optimization(self, target_position, initial_guess=None):
         """
         优化逆运动学 - 使用优化方法求解
@@ -100,6 +196,92 @@ class ThreeLinkRobot:
         else:
             return None
     
+    def inverse_kinematics_analytic(self, target_position, orientation=None, redundancy=0.0, initial_guess=None):
+        """
+        解析逆运动学 - 平面3R机器人的闭式解
+        
+        给定末端姿态角phi后，腕部点 p - L3*[cos(phi), sin(phi)] 由前两连杆到达，
+        按余弦定理得到肘部朝上/朝下两个分支。
+        
+        参数:
+            target_position: 目标位置 [x, y, z]
+            orientation: 末端姿态角 phi (弧度)；为None时由redundancy确定
+            redundancy: 冗余参数，phi = atan2(y, x) + redundancy (仅在orientation为None时使用)
+            initial_guess: 若给出，按与其的关节距离对解排序
+        
+        返回:
+            形状 (k, 3) 的关节角度数组 (k为有效分支数) 或 None (如果不可达)
+        """
+        target = np.asarray(target_position, dtype=float)[np.newaxis, :]
+        if orientation is not None:
+            orientation = np.array([orientation], dtype=float)
+        
+        solutions, valid = self.inverse_kinematics_analytic_batch(target, orientation, redundancy)
+        solutions = solutions[0][valid[0]]
+        if len(solutions) == 0:
+            return None
+        # c2 = ±1 (完全伸直或折叠) 时两个肘部分支重合，只保留一个
+        if len(solutions) == 2:
+            diff = solutions[1] - solutions[0]
+            if np.allclose(np.arctan2(np.sin(diff), np.cos(diff)), 0.0, atol=1e-9):
+                solutions = solutions[:1]
+        
+        if initial_guess is not None:
+            diff = solutions - np.asarray(initial_guess, dtype=float)
+            diff = np.arctan2(np.sin(diff), np.cos(diff))
+            solutions = solutions[np.argsort(np.linalg.norm(diff, axis=1))]
+        
+        return solutions
+    
+    def inverse_kinematics_analytic_batch(self, target_positions, orientations=None, redundancy=0.0):
+        """
+        批量解析逆运动学
+        
+        参数:
+            target_positions: 目标位置，形状 (M, 2) 或 (M, 3)
+            orientations: 末端姿态角，形状 (M,)；为None时由redundancy确定
+            redundancy: 冗余参数，标量或形状 (M,)
+        
+        返回:
+            solutions: 形状 (M, 2, 3)，第二维依次为肘部朝上/朝下分支
+            valid: 形状 (M, 2) 的布尔数组，标记分支是否可达
+        """
+        if self.n_joints != 3:
+            raise ValueError("解析逆运动学仅适用于平面三连杆机器人")
+        
+        targets = np.asarray(target_positions, dtype=float)
+        x = targets[:, 0]
+        y = targets[:, 1]
+        L1, L2, L3 = self.link_lengths
+        
+        if orientations is None:
+            phi = np.arctan2(y, x) + redundancy
+        else:
+            phi = np.broadcast_to(np.asarray(orientations, dtype=float), x.shape)
+        
+        # 腕部点
+        wx = x - L3 * np.cos(phi)
+        wy = y - L3 * np.sin(phi)
+        
+        # 余弦定理求theta2
+        c2 = (wx**2 + wy**2 - L1**2 - L2**2) / (2 * L1 * L2)
+        reachable = np.abs(c2) <= 1.0 + 1e-12
+        c2 = np.clip(c2, -1.0, 1.0)
+        s2 = np.sqrt(1.0 - c2**2)
+        
+        # 两个分支: s2 > 0 (肘部朝上) 和 s2 < 0 (肘部朝下)
+        theta2 = np.stack([np.arctan2(s2, c2), np.arctan2(-s2, c2)], axis=1)
+        theta1 = np.arctan2(wy, wx)[:, np.newaxis] - np.arctan2(
+            L2 * np.sin(theta2), L1 + L2 * np.cos(theta2)
+        )
+        theta3 = phi[:, np.newaxis] - theta1 - theta2
+        
+        solutions = np.stack([theta1, theta2, theta3], axis=2)
+        solutions = np.arctan2(np.sin(solutions), np.cos(solutions))
+        valid = np.repeat(reachable[:, np.newaxis], 2, axis=1)
+        
+        return solutions, valid
+    
     def check_singularity(self, joint_angles):
         """
         检查机器人是否处于奇异点
@@ -121,8 +303,8 @@ class ThreeLinkRobot:
         返回:
             bool: 是否处于奇异点
         """
-        # 计算雅可比矩阵
-        J = jacobian_matrix(self, joint_angles)
+        # 计算雅可比矩阵 (解析形式)
+        J = self.jacobian(joint_angles)
         
         # 对于平面机器人，只考虑位置雅可比（前2x2子矩阵）
         position_jacobian = J[:2, :2]
@@ -148,17 +330,30 @@ class ThreeLinkRobot:
         theta1_range = np.linspace(-np.pi, np.pi, num_points)
         theta2_range = np.linspace(-np.pi, np.pi, num_points)
         
-        x_coords = []
-        y_coords = []
+        # 构造所有 (theta1, theta2, 0) 组合，一次批量FK
+        theta1_grid, theta2_grid = np.meshgrid(theta1_range, theta2_range, indexing='ij')
+        joint_angles = np.zeros((num_points * num_points, self.n_joints))
+        joint_angles[:, 0] = theta1_grid.ravel()
+        joint_angles[:, 1] = theta2_grid.ravel()
+        
+        _, joint_positions = self.forward_kinematics_batch(joint_angles)
+        end_positions = joint_positions[:, -1]
+        
+        return end_positions[:, 0].copy(), end_positions[:, 1].copy()
+    
+    def get_workspace(self):
+        """
+        获取机器人的工作空间 (解析圆环表示)
         
-        for theta1 in theta1_range:
-            for theta2 in theta2_range:
-                joint_angles = [theta1, theta2, 0]
-                pos = self.get_end_effector_position(joint_angles)
-                x_coords.append(pos[0])
-                y_coords.append(pos[1])
+        每组连杆长度只计算一次，link_lengths改变后自动重建
         
-        return np.array(x_coords), np.array(y_coords)
+        返回:
+            Workspace 对象
+        """
+        key = tuple(np.asarray(self.link_lengths, dtype=float).tolist())
+        if self._workspace is None or self._workspace.key != key:
+            self._workspace = Workspace(self.link_lengths)
+        return self._workspace
     
     def inverse_kinematics_jacobian(self, target_position, initial_guess=None, max_iterations=200, tolerance=1e-4, step_size=0.05):
         """
@@ -184,11 +379,181 @@ class ThreeLinkRobot:
         返回:
             关节角度数组 [theta1, theta2, theta3] 或 None (如果未收敛)
         """
-        # TODO: 实现基于雅可比矩阵的逆运动学求解
-        # 提示:
-        # 1. 使用雅可比矩阵建立线性关系：Δx = J * Δθ
-        # 2. 计算雅可比矩阵的伪逆：Δθ = J^+ * Δx
-        # 3. 迭代更新关节角度：θ_new = θ_old + Δθ
-        # 4*. (进阶) 添加阻尼因子避免奇异点问题 (Damped least squares)
+        if initial_guess is None:
+            initial_guess = np.zeros(self.n_joints)
+        
+        # 与solve_ik_batch的顺序模式使用同一个DLS迭代
+        target = np.asarray(target_position, dtype=float)[np.newaxis, :2]
+        solutions, converged, _ = self._solve_dls_sequential(
+            target, np.asarray(initial_guess, dtype=float), max_iterations, tolerance, step_size
+        )
+        if not converged[0]:
+            return None
+        # 将关节角度规范到 (-π, π]
+        return np.arctan2(np.sin(solutions[0]), np.cos(solutions[0]))
+    
+    def solve_ik_batch(self, targets, initial_guess=None, ordered=True, max_iterations=100, tolerance=1e-4, damping=0.05):
+        """
+        批量逆运动学 - 阻尼最小二乘(DLS)求解一组目标位置
+        
+        两种模式:
+        - ordered=True: 按顺序求解，每个解作为下一个目标的初始值 (适合连续路径)
+        - ordered=False: 所有目标共用初始值，DLS迭代在所有目标上同时向量化进行
+        
+        参数:
+            targets: 目标位置，形状 (M, 2) 或 (M, 3)
+            initial_guess: 初始关节角度 (顺序模式下仅用于第一个目标)
+            ordered: 是否按顺序热启动
+            max_iterations: 每个目标的最大迭代次数
+            tolerance: 收敛容差 (位置误差)
+            damping: 阻尼因子
+        
+        返回:
+            solutions: 关节角度，形状 (M, n_joints)，规范到 (-π, π]
+            converged: 形状 (M,) 的布尔数组
+            residuals: 形状 (M,) 的最终位置误差
+        """
+        targets = np.asarray(targets, dtype=float)
+        if targets.ndim != 2 or targets.shape[1] < 2:
+            raise ValueError(f"targets的形状应为(M, 2)或(M, 3)，实际为{targets.shape}")
+        
+        if initial_guess is None:
+            initial_guess = np.zeros(self.n_joints)
+        initial_guess = np.asarray(initial_guess, dtype=float)
+        
+        if ordered:
+            solutions, converged, residuals = self._solve_dls_sequential(
+                targets[:, :2], initial_guess, max_iterations, tolerance, damping
+            )
+        else:
+            solutions, converged, residuals = self._solve_dls_vectorized(
+                targets[:, :2], initial_guess, max_iterations, tolerance, damping
+            )
+        
+        solutions = np.arctan2(np.sin(solutions), np.cos(solutions))
+        return solutions, converged, residuals
+    
+    def _solve_dls_sequential(self, targets, initial_guess, max_iterations, tolerance, damping):
+        """
+        顺序热启动的DLS求解
+        
+        单个目标只涉及几个标量运算，用math代替numpy可避免小数组的调用开销
+        """
+        n_targets = len(targets)
+        solutions = np.zeros((n_targets, self.n_joints))
+        converged = np.zeros(n_targets, dtype=bool)
+        residuals = np.zeros(n_targets)
+        
+        lengths = [float(l) for l in self.link_lengths]
+        damping_sq = damping ** 2
+        seed = [float(a) for a in initial_guess]
+        
+        for k, (tx, ty) in enumerate(targets.tolist()):
+            q = list(seed)
+            for iteration in range(max_iterations + 1):
+                error, q_next = _dls_step(q, lengths, tx, ty, damping_sq, tolerance)
+                if q_next is None or iteration == max_iterations:
+                    break
+                q = q_next
+            
+            solutions[k] = q
+            residuals[k] = error
+            converged[k] = error < tolerance
+            if converged[k]:
+                seed = q
+        
+        return solutions, converged, residuals
+    
+    def _solve_dls_vectorized(self, targets, initial_guess, max_iterations, tolerance, damping):
+        """
+        所有目标同时迭代的DLS求解，已收敛的目标不再更新
+        """
+        n_targets = len(targets)
+        q = np.tile(initial_guess, (n_targets, 1))
+        residuals = np.full(n_targets, np.inf)
+        active = np.arange(n_targets)
+        damping_sq = damping ** 2
+        
+        for iteration in range(max_iterations + 1):
+            _, joint_positions = self.forward_kinematics_batch(q[active])
+            error = targets[active] - joint_positions[:, -1, :2]
+            residuals[active] = np.hypot(error[:, 0], error[:, 1])
+            
+            still_active = residuals[active] >= tolerance
+            active = active[still_active]
+            if len(active) == 0 or iteration == max_iterations:
+                break
+            error = error[still_active]
+            
+            J = self.jacobian_batch(q[active])[:, :2, :]
+            a = np.einsum('ij,ij->i', J[:, 0], J[:, 0]) + damping_sq
+            b = np.einsum('ij,ij->i', J[:, 0], J[:, 1])
+            c = np.einsum('ij,ij->i', J[:, 1], J[:, 1]) + damping_sq
+            det = a * c - b * b
+            wx = (c * error[:, 0] - b * error[:, 1]) / det
+            wy = (a * error[:, 1] - b * error[:, 0]) / det
+            delta = J[:, 0] * wx[:, np.newaxis] + J[:, 1] * wy[:, np.newaxis]
+            
+            # 奇异构型上更新量为零时轻微扰动
+            stalled = np.linalg.norm(delta, axis=1) < 1e-9
+            delta[stalled] = 1e-2
+            q[active] += delta
         
-        raise NotImplementedError("Not implemented")
\ No newline at end of file
+        converged = residuals < tolerance
+        return q, converged, residuals
+
+
+def _dls_step(q, lengths, tx, ty, damping_sq, tolerance):
+    """
+    单个目标的一次阻尼最小二乘(DLS)迭代
+
+    Δθ = J^T (J J^T + λ^2 I)^-1 e，只涉及几个标量运算，用math代替numpy可避免小数组的调用开销。
+    在奇异构型(如完全伸直)上误差与雅可比正交时更新量为零，此时轻微扰动以跳出。
+
+    参数:
+        q: 当前关节角度 (列表)
+        lengths: 连杆长度 (列表)
+        tx, ty: 目标位置
+        damping_sq: 阻尼因子的平方 λ^2
+        tolerance: 收敛容差 (位置误差)
+
+    返回:
+        error: 当前末端位置误差
+        q_next: 更新后的关节角度；已收敛时为None
+    """
+    # 正向运动学: 各连杆在x/y方向上的分量
+    theta = 0.0
+    link_x = []
+    link_y = []
+    for angle, length in zip(q, lengths):
+        theta += angle
+        link_x.append(length * math.cos(theta))
+        link_y.append(length * math.sin(theta))
+    ex = tx - sum(link_x)
+    ey = ty - sum(link_y)
+    error = math.hypot(ex, ey)
+    if error < tolerance:
+        return error, None
+
+    # 解析雅可比 (反向累加)
+    jx = [0.0] * len(q)
+    jy = [0.0] * len(q)
+    acc_x = acc_y = 0.0
+    for i in range(len(q) - 1, -1, -1):
+        acc_x += link_x[i]
+        acc_y += link_y[i]
+        jx[i] = -acc_y
+        jy[i] = acc_x
+
+    # 2x2矩阵 J J^T + λ^2 I 直接求逆
+    a = sum(v * v for v in jx) + damping_sq
+    b = sum(u * v for u, v in zip(jx, jy))
+    c = sum(v * v for v in jy) + damping_sq
+    det = a * c - b * b
+    wx = (c * ex - b * ey) / det
+    wy = (a * ey - b * ex) / det
+    delta = [u * wx + v * wy for u, v in zip(jx, jy)]
+
+    if math.hypot(*delta) < 1e-9:
+        delta = [1e-2] * len(q)
+    return error, [angle + d for angle, d in zip(q, delta)]
@@ -0,0 +1,338 @@
+"""
+时间最优路径参数化 (TOPP)
+在关节速度和加速度约束下，用可达性分析 (TOPP-RA) 求沿给定几何路径运动的最短时间轨迹
+"""
+
+import numpy as np
+
+from . import splines
+from .trajectory import Trajectory
+
+# 路径静止且无曲率处 ṡ² 没有约束，用该上限代替无穷大
+_X_CAP = 1e12
+_EPS = 1e-12
+# 不起作用的u约束
+_U_CAP = 1e200
+# 检查限值时每个网格区间内的采样点数
+_CHECK_SAMPLES = 16
+# 采样峰值超过该比例的区间才加密检查
+_REFINE_THRESHOLD = 0.9
+# 超限时收紧局部限值、重新扫描的最多次数
+_MAX_REFINEMENTS = 4
+
+
+def _path_grid(path, num_gridpoints):
+    """
+    路径 (Trajectory) 和路径参数网格
+
+    Trajectory直接以其时间为路径参数；关节采样点数组以关节空间弦长为参数，
+    用自然三次样条连接。网格包含路径的所有断点，每个网格区间都在同一路径段内。
+    """
+    if not isinstance(path, Trajectory):
+        points = np.atleast_2d(np.asarray(path, dtype=float))
+        chord = np.linalg.norm(np.diff(points, axis=0), axis=1)
+        keep = np.concatenate([[True], chord > _EPS])
+        points, chord = points[keep], chord[chord > _EPS]
+        if len(points) < 2:
+            raise ValueError("路径至少需要两个不同的点")
+        path = splines.cubic_spline(np.concatenate([[0.0], np.cumsum(chord)]), points, natural=True)
+
+    if num_gridpoints is None:
+        num_gridpoints = max(200, 2 * path.n_segments + 1)
+    grid = np.union1d(np.linspace(path.start_time, path.end_time, num_gridpoints), path.breakpoints)
+    grid = grid[np.concatenate([[True], np.diff(grid) > _EPS])]
+    if len(grid) < 2:
+        raise ValueError("路径长度为0")
+    return path, grid
+
+
+def _acceleration_constraints(a, b, amax):
+    """
+    关节加速度约束 |a_j u + b_j x| <= amax_j 对 (x, u) = (ṡ², s̈) 的限制
+
+    a_j ≠ 0 的约束给出 lower_j + slope_j x <= u <= upper_j + slope_j x；
+    a_j = 0 的约束只限制x。各约束的u区间两两相交得到x的上界。
+
+    参数:
+        a, b: 形状 (M, k)
+        amax: 形状 (k,)
+
+    返回:
+        lower, upper, slope: 形状 (M, k)，a_j = 0 时 lower=-inf, upper=inf, slope=0
+        x_max: 形状 (M,)
+    """
+    abs_a = np.abs(a)
+    moving = abs_a > _EPS
+    bound = np.where(moving, amax / np.where(moving, abs_a, 1.0), np.inf)
+    lower, upper = -bound, bound
+    slope = np.where(moving, -b / np.where(moving, a, 1.0), 0.0)
+
+    with np.errstate(divide='ignore'):
+        still = ~moving & (np.abs(b) > _EPS)
+        x_max = np.min(np.where(still, amax / np.abs(b), np.inf), axis=1)
+
+        # 约束k的下界不超过约束l的上界: (slope_k - slope_l) x <= upper_l - lower_k
+        gap = upper[:, np.newaxis, :] - lower[:, :, np.newaxis]
+        rate = slope[:, :, np.newaxis] - slope[:, np.newaxis, :]
+        pair = np.where((rate > _EPS) & np.isfinite(gap), gap / np.where(rate > _EPS, rate, 1.0), np.inf)
+        x_max = np.minimum(x_max, pair.min(axis=(1, 2)))
+
+    return lower, upper, slope, x_max
+
+
+def _velocity_limit(dq, vmax):
+    """
+    速度约束 |q'_j| sqrt(x) <= vmax_j 给出的x上界，形状 (M,)
+    """
+    abs_dq = np.abs(dq)
+    moving = abs_dq > _EPS
+    with np.errstate(divide='ignore'):
+        return np.min(np.where(moving, (vmax / np.where(moving, abs_dq, 1.0)) ** 2, np.inf), axis=1)
+
+
+def _interval_constraints(lower, upper, slope):
+    """
+    每个区间的u约束 (lower, upper, slope)，转换为嵌套Python列表供逐点扫描使用
+
+    a_j = 0 的约束换成不起作用的有限大区间，避免在循环中判断。
+    """
+    lower = np.where(np.isfinite(lower), lower, -_U_CAP)
+    upper = np.where(np.isfinite(upper), upper, _U_CAP)
+    return np.stack([lower, upper, slope], axis=-1).tolist()
+
+
+def reachability_sweep(path, grid, vmax, amax, collocation=(0.0, 0.5, 1.0)):
+    """
+    TOPP-RA可达性分析
+
+    路径参数 s 上取网格 s_0 < s_1 < ... ，区间 [s_i, s_{i+1}] 上s̈=u为常数，
+    x = ṡ² 沿区间线性变化: x(s_i + θ Δs) = x_i + 2 θ Δs u。
+    加速度约束在区间内的若干位置θ上施加:
+        |q'(s_θ) u + q''(s_θ) (x_i + 2 θ Δs u)| <= amax
+    它们都是 (x_i, u) 的线性约束。速度约束施加在每个网格点。
+
+    后向扫描: 从终点开始逐个网格点求可控集 K_i，
+    即存在满足约束的u、使下一网格点的x落在 K_{i+1} 内的x区间。
+    前向扫描: 从起点开始，每步取能保持在可控集内的最大u。
+    两次扫描都与网格点数成线性关系，每步只有几个标量运算，用Python浮点数计算。
+
+    路径在起点 (终点) 处 q'=0 时，关节速度与ṡ无关，ṡ不必为0；否则ṡ为0。
+
+    参数:
+        path: 以s为自变量的路径 (Trajectory)
+        grid: 路径参数网格，形状 (M,)
+        vmax, amax: 各关节速度、加速度上限 (标量、形状 (dof,) 或每个网格点一行的 (M, dof))；
+                    区间约束取两端网格点中较小的限值
+        collocation: 区间内施加加速度约束的相对位置θ
+
+    返回:
+        x: 网格点处的 ṡ²，形状 (M,)
+        u: 各区间的 s̈，形状 (M-1,)
+    """
+    dof = path.dof
+    vmax = np.broadcast_to(np.asarray(vmax, dtype=float), (len(grid), dof))
+    amax = np.broadcast_to(np.asarray(amax, dtype=float), (len(grid), dof))
+    if np.any(vmax <= 0) or np.any(amax <= 0):
+        raise ValueError("vmax和amax必须为正")
+
+    # 网格点上的x上界
+    dq, ddq = path.evaluate(grid, 1), path.evaluate(grid, 2)
+    _, _, _, x_accel = _acceleration_constraints(dq, ddq, amax)
+    x_max = np.minimum(np.minimum(_velocity_limit(dq, vmax), x_accel), _X_CAP)
+
+    # 区间约束: 各配置点的加速度约束放在一起
+    ds = np.diff(grid)
+    a, b = [], []
+    for theta in collocation:
+        # 区间端点取区间内侧的导数 (路径导数在断点处可能不连续)
+        s_theta = grid[:-1] + np.clip(theta, 1e-9, 1.0 - 1e-9) * ds
+        dq_theta, ddq_theta = path.evaluate(s_theta, 1), path.evaluate(s_theta, 2)
+        a.append(dq_theta + 2.0 * theta * ds[:, np.newaxis] * ddq_theta)
+        b.append(ddq_theta)
+    lower, upper, slope, x_pair = _acceleration_constraints(
+        np.concatenate(a, axis=1), np.concatenate(b, axis=1),
+        np.tile(np.minimum(amax[:-1], amax[1:]), (1, len(collocation)))
+    )
+    x_max[:-1] = np.minimum(x_max[:-1], x_pair)
+    constraints = _interval_constraints(lower, upper, slope)
+    x_max = x_max.tolist()
+    h = (2.0 * ds).tolist()
+    n = len(grid)
+
+    rest_start = np.max(np.abs(dq[0])) <= _EPS
+    rest_end = np.max(np.abs(dq[-1])) <= _EPS
+
+    # 后向扫描
+    K_lo = [0.0] * n
+    K_hi = [0.0] * n
+    K_hi[-1] = x_max[-1] if rest_end else 0.0
+    for i in range(n - 2, -1, -1):
+        inv = 1.0 / h[i]
+        k_lo, k_hi = K_lo[i + 1] * inv, K_hi[i + 1] * inv
+        lo, hi = 0.0, x_max[i]
+        # 转移约束 (K_lo - x) / h <= u <= (K_hi - x) / h 与各约束的u区间相交，
+        # 每对给出 d + c x <= 0
+        for low, up, sl in constraints[i]:
+            c, d = -inv - sl, k_lo - up
+            if c > _EPS:
+                hi = min(hi, -d / c)
+            elif c < -_EPS:
+                lo = max(lo, -d / c)
+            elif d > _EPS:
+                hi = -np.inf
+            c, d = sl + inv, low - k_hi
+            if c > _EPS:
+                hi = min(hi, -d / c)
+            elif c < -_EPS:
+                lo = max(lo, -d / c)
+            elif d > _EPS:
+                hi = -np.inf
+        if lo > hi + 1e-9 * max(1.0, abs(hi)):
+            raise ValueError(f"路径在s={grid[i]:.4g}处无法满足约束 (可控集为空)")
+        K_lo[i], K_hi[i] = lo, max(lo, hi)
+    if K_lo[0] > 1e-9 and not rest_start:
+        raise ValueError("无法从静止开始沿路径运动")
+
+    # 前向扫描: 贪心取最大加速度
+    x = [0.0] * n
+    x[0] = K_hi[0] if rest_start else 0.0
+    u = [0.0] * (n - 1)
+    for i in range(n - 1):
+        xi = x[i]
+        u_max = (K_hi[i + 1] - xi) / h[i]
+        for _, up, sl in constraints[i]:
+            u_max = min(u_max, up + sl * xi)
+        x_next = min(max(xi + h[i] * u_max, K_lo[i + 1]), K_hi[i + 1])
+        x[i + 1] = x_next
+        u[i] = (x_next - xi) / h[i]
+    return np.array(x), np.array(u)
+
+
+def _compose(path, grid, x, u, start_time):
+    """
+    由网格上的 (ṡ², s̈) 得到关节轨迹
+
+    每个区间内s̈为常数: Δt = 2 Δs / (ṡ_i + ṡ_{i+1})。
+    区间内 s - b_k = (s_i - b_k) + ṡ_i τ + u τ²/2 (b_k为所在路径段的起点)，
+    代入路径段多项式得到关于τ的 2*degree 次多项式，轨迹精确落在路径上。
+    """
+    sdot = np.sqrt(np.maximum(x, 0.0))
+    dt = 2.0 * np.diff(grid) / np.maximum(sdot[:-1] + sdot[1:], _EPS)
+    times = start_time + np.concatenate([[0.0], np.cumsum(dt)])
+
+    segment, _ = path._locate(0.5 * (grid[:-1] + grid[1:]))
+    offset = grid[:-1] - path.breakpoints[segment]
+    path_coefficients = path.coefficients[segment]                  # (M-1, d+1, dof)
+    degree = path.degree
+    inner = np.stack([offset, sdot[:-1], 0.5 * u], axis=1)           # (M-1, 3)
+
+    coefficients = np.zeros((len(segment), 2 * degree + 1, path.dof))
+    power = np.zeros((len(segment), 2 * degree + 1))
+    power[:, 0] = 1.0
+    for j in range(degree + 1):
+        coefficients += power[:, :, np.newaxis] * path_coefficients[:, j, np.newaxis, :]
+        if j < degree:
+            # power *= inner (多项式乘法)
+            product = inner[:, 0:1] * power
+            product[:, 1:] += inner[:, 1:2] * power[:, :-1]
+            product[:, 2:] += inner[:, 2:3] * power[:, :-2]
+            power = product
+    return Trajectory(times, coefficients)
+
+
+def _interval_peaks(trajectory, vmax, amax):
+    """
+    各轨迹段内部的最大速度、加速度与限值之比
+
+    每段先均匀采样；接近限值的段在最大值所在的采样间隔内加密采样，
+    再用过最大采样点及其两侧点的抛物线顶点估计峰值。
+    段端点处的加速度约束在扫描中精确施加，这里只检查段内部。
+
+    返回:
+        v_ratio, a_ratio: 形状 (K,)
+    """
+    start = trajectory.breakpoints[:-1, np.newaxis]
+    length = np.diff(trajectory.breakpoints)[:, np.newaxis]
+    step = 1.0 / (_CHECK_SAMPLES + 1)
+    coarse = np.linspace(step, 1.0 - step, _CHECK_SAMPLES)
+
+    def ratio(segments, theta, derivative, limit):
+        values = np.abs(trajectory.evaluate((start[segments] + theta * length[segments]).ravel(), derivative))
+        return (values.reshape(theta.shape + (trajectory.dof,)) / limit).max(axis=2)
+
+    peaks = []
+    all_segments = np.arange(trajectory.n_segments)
+    for derivative, limit in ((1, vmax), (2, amax)):
+        theta = np.broadcast_to(coarse, (len(all_segments), _CHECK_SAMPLES))
+        values = ratio(all_segments, theta, derivative, limit)
+        peak = values.max(axis=1)
+        # 远低于限值的段不需要加密
+        near = np.flatnonzero(peak > _REFINE_THRESHOLD)
+        if len(near):
+            center = coarse[np.argmax(values[near], axis=1)]
+            offsets = np.linspace(-step, step, _CHECK_SAMPLES + 1)
+            fine = np.clip(center[:, np.newaxis] + offsets, 0.0, 1.0 - 1e-9)
+            fine_values = ratio(near, fine, derivative, limit)
+            k = np.clip(np.argmax(fine_values, axis=1), 1, _CHECK_SAMPLES - 1)
+            rows = np.arange(len(near))
+            left, middle, right = fine_values[rows, k - 1], fine_values[rows, k], fine_values[rows, k + 1]
+            curvature = left - 2.0 * middle + right
+            # 中间点最大时抛物线有内部顶点，修正量不超过 |right - left| / 8
+            interior = (middle >= left) & (middle >= right) & (curvature < 0.0)
+            vertex = np.where(interior,
+                              middle - (right - left) ** 2 / (8.0 * np.where(interior, curvature, -1.0)),
+                              middle)
+            peak[near] = np.maximum(peak[near], np.maximum(fine_values.max(axis=1), vertex))
+        peaks.append(peak)
+    return peaks[0], peaks[1]
+
+
+def _stretch(trajectory, factor):
+    """
+    按比例放慢轨迹 (时间乘以factor，速度除以factor，加速度除以factor²)
+    """
+    breakpoints = trajectory.start_time + (trajectory.breakpoints - trajectory.start_time) * factor
+    scale = factor ** -np.arange(trajectory.degree + 1)
+    return Trajectory(breakpoints, trajectory.coefficients * scale[np.newaxis, :, np.newaxis])
+
+
+def time_optimal_retime(path, vmax=1.0, amax=1.0, num_gridpoints=None, start_time=0.0):
+    """
+    沿给定关节路径的时间最优轨迹 (起点和终点静止)
+
+    约束只在网格点和区间配置点上施加，区间内部仍可能略微超限。
+    求解后在每个区间内部密集采样检查: 超限区间两端网格点的限值按超限比例收紧后重新扫描，
+    若干次后仍超限则整体按比例放慢，保证采样点上满足vmax和amax。
+
+    参数:
+        path: 关节路径，Trajectory (只使用其几何形状) 或形状 (N, dof) 的关节采样点
+        vmax: 各关节最大速度 (标量或形状 (dof,))
+        amax: 各关节最大加速度 (标量或形状 (dof,))
+        num_gridpoints: 路径参数网格点数，None时按路径段数自动选取
+        start_time: 轨迹开始时刻
+
+    返回:
+        Trajectory (路径段多项式与各区间二次的s(t)复合，次数为路径次数的两倍)
+    """
+    path, grid = _path_grid(path, num_gridpoints)
+    vmax = np.broadcast_to(np.asarray(vmax, dtype=float), (path.dof,))
+    amax = np.broadcast_to(np.asarray(amax, dtype=float), (path.dof,))
+    v_limit = np.tile(vmax, (len(grid), 1))
+    a_limit = np.tile(amax, (len(grid), 1))
+
+    for refinement in range(_MAX_REFINEMENTS + 1):
+        x, u = reachability_sweep(path, grid, v_limit, a_limit)
+        trajectory = _compose(path, grid, x, u, start_time)
+        v_ratio, a_ratio = _interval_peaks(trajectory, vmax, amax)
+        if np.all(v_ratio <= 1.0) and np.all(a_ratio <= 1.0):
+            return trajectory
+        if refinement == _MAX_REFINEMENTS:
+            break
+        # 区间的收紧系数作用在其两端的网格点上；
+        # 相邻区间相互影响，按超限比例的平方收紧以减少重新扫描的次数
+        for limit, ratio in ((v_limit, v_ratio), (a_limit, a_ratio)):
+            factor = np.maximum(ratio, 1.0) ** -2
+            point_factor = np.minimum(np.append(factor, 1.0), np.insert(factor, 0, 1.0))
+            limit *= point_factor[:, np.newaxis]
+
+    return _stretch(trajectory, max(1.0, v_ratio.max(), np.sqrt(a_ratio.max())))
@@ -0,0 +1,236 @@
+"""
+时间参数化轨迹
+以分段多项式系数存储轨迹，按需计算任意时刻的位置、速度和加速度
+"""
+
+from math import comb
+
+import numpy as np
+
+
+class Trajectory:
+    """
+    分段多项式轨迹
+
+    第k段定义在 [breakpoints[k], breakpoints[k+1]] 上，
+        q(t) = sum_j coefficients[k, j] * (t - breakpoints[k])^j
+    只保存断点和系数，内存与段数成正比，与采样率无关。
+    超出时间范围的时刻取端点处的值。
+    """
+
+    def __init__(self, breakpoints, coefficients):
+        """
+        参数:
+            breakpoints: 递增的断点时间，形状 (K+1,)
+            coefficients: 各段多项式系数 (按升幂排列)，形状 (K, degree+1, dof)
+        """
+        breakpoints = np.asarray(breakpoints, dtype=float)
+        coefficients = np.asarray(coefficients, dtype=float)
+        if coefficients.ndim != 3 or len(breakpoints) != len(coefficients) + 1:
+            raise ValueError("coefficients的形状应为(K, degree+1, dof)，breakpoints的长度应为K+1")
+        if np.any(np.diff(breakpoints) < 0):
+            raise ValueError("breakpoints必须递增")
+        self.breakpoints = breakpoints
+        self.coefficients = coefficients
+        self._derivatives = {0: coefficients}
+
+    @property
+    def start_time(self):
+        return float(self.breakpoints[0])
+
+    @property
+    def end_time(self):
+        return float(self.breakpoints[-1])
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    @property
+    def n_segments(self):
+        return len(self.coefficients)
+
+    @property
+    def degree(self):
+        return self.coefficients.shape[1] - 1
+
+    @property
+    def dof(self):
+        return self.coefficients.shape[2]
+
+    def __repr__(self):
+        return (f"Trajectory(t=[{self.start_time:.3f}, {self.end_time:.3f}], "
+                f"segments={self.n_segments}, degree={self.degree}, dof={self.dof})")
+
+    @classmethod
+    def constant(cls, position, duration=0.0, start_time=0.0):
+        """
+        保持在某一位置的轨迹
+        """
+        position = np.asarray(position, dtype=float)
+        return cls([start_time, start_time + duration], position[np.newaxis, np.newaxis, :])
+
+    def _derivative_coefficients(self, order):
+        """
+        order阶导数的分段多项式系数 (缓存)
+        """
+        if order not in self._derivatives:
+            coefficients = self._derivative_coefficients(order - 1)
+            if coefficients.shape[1] > 1:
+                powers = np.arange(1, coefficients.shape[1])[np.newaxis, :, np.newaxis]
+                derivative = coefficients[:, 1:] * powers
+            else:
+                derivative = np.zeros_like(coefficients)
+            self._derivatives[order] = derivative
+        return self._derivatives[order]
+
+    def _locate(self, t):
+        """
+        时刻所在的段下标和段内时间
+        """
+        t = np.clip(t, self.breakpoints[0], self.breakpoints[-1])
+        index = np.clip(np.searchsorted(self.breakpoints, t, side='right') - 1, 0, self.n_segments - 1)
+        return index, t - self.breakpoints[index]
+
+    def evaluate(self, t, derivative=0):
+        """
+        计算轨迹或其导数
+
+        参数:
+            t: 时刻，标量或形状 (M,) 的数组
+            derivative: 导数阶数 (0: 位置, 1: 速度, 2: 加速度, ...)
+
+        返回:
+            标量t时形状为 (dof,)，数组t时形状为 (M, dof)
+        """
+        scalar = np.ndim(t) == 0
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        index, tau = self._locate(t)
+
+        # Horner法则，所有时刻同时计算
+        coefficients = self._derivative_coefficients(derivative)[index]
+        tau = tau[:, np.newaxis]
+        values = coefficients[:, -1]
+        for j in range(coefficients.shape[1] - 2, -1, -1):
+            values = values * tau + coefficients[:, j]
+
+        return values[0] if scalar else values
+
+    def position(self, t):
+        return self.evaluate(t, 0)
+
+    def velocity(self, t):
+        return self.evaluate(t, 1)
+
+    def acceleration(self, t):
+        return self.evaluate(t, 2)
+
+    __call__ = position
+
+    def sample(self, num_points=None, dt=None):
+        """
+        均匀采样 (给出采样点数或采样间隔之一)
+
+        返回:
+            t: 时间序列
+            q: 位置，形状 (len(t), dof)
+        """
+        if (num_points is None) == (dt is None):
+            raise ValueError("num_points和dt需要且只能给出一个")
+        if num_points is None:
+            num_points = int(np.floor(self.duration / dt + 1e-9)) + 1
+            t = self.start_time + dt * np.arange(num_points)
+        else:
+            t = np.linspace(self.start_time, self.end_time, num_points)
+        return t, self.position(t)
+
+    def shift(self, offset):
+        """
+        时间平移后的轨迹 (共享系数数组)
+        """
+        return Trajectory(self.breakpoints + offset, self.coefficients)
+
+    def slice(self, t_start=None, t_end=None):
+        """
+        截取 [t_start, t_end] 部分 (保留原时间坐标)
+
+        截断点落在段内时，用多项式平移 (Taylor展开) 把该段系数改写到新起点。
+        """
+        t_start = self.start_time if t_start is None else max(float(t_start), self.start_time)
+        t_end = self.end_time if t_end is None else min(float(t_end), self.end_time)
+        if t_end < t_start:
+            raise ValueError("截取区间为空")
+
+        first, _ = self._locate(np.array([t_start]))
+        last, _ = self._locate(np.array([t_end]))
+        first, last = int(first[0]), int(last[0])
+        # 终点恰好落在断点上时不需要保留下一段
+        if last > first and t_end <= self.breakpoints[last]:
+            last -= 1
+
+        coefficients = self.coefficients[first:last + 1].copy()
+        delta = t_start - self.breakpoints[first]
+        if delta > 0:
+            coefficients[0] = _taylor_shift(coefficients[0], delta)
+
+        breakpoints = np.concatenate([[t_start], self.breakpoints[first + 1:last + 1], [t_end]])
+        return Trajectory(breakpoints, coefficients)
+
+    def __getitem__(self, key):
+        """
+        按时间切片: trajectory[t0:t1]
+        """
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError("只支持不带步长的时间切片 trajectory[t_start:t_end]")
+        return self.slice(key.start, key.stop)
+
+    @staticmethod
+    def concatenate(trajectories):
+        """
+        首尾相接拼接多条轨迹，后一条平移到前一条的结束时刻开始
+
+        参数:
+            trajectories: Trajectory列表 (dof相同)
+
+        返回:
+            Trajectory
+        """
+        trajectories = list(trajectories)
+        if not trajectories:
+            raise ValueError("至少需要一条轨迹")
+        degree = max(traj.degree for traj in trajectories)
+        dof = trajectories[0].dof
+
+        breakpoints = [trajectories[0].breakpoints[:1]]
+        coefficients = []
+        end = trajectories[0].start_time
+        for traj in trajectories:
+            if traj.dof != dof:
+                raise ValueError("拼接的轨迹维度不一致")
+            padded = np.zeros((traj.n_segments, degree + 1, dof))
+            padded[:, :traj.degree + 1] = traj.coefficients
+            coefficients.append(padded)
+            breakpoints.append(traj.breakpoints[1:] - traj.start_time + end)
+            end = breakpoints[-1][-1]
+
+        return Trajectory(np.concatenate(breakpoints), np.concatenate(coefficients))
+
+    def append(self, other):
+        """
+        在末尾拼接另一条轨迹
+        """
+        return Trajectory.concatenate([self, other])
+
+
+def _taylor_shift(coefficients, delta):
+    """
+    多项式 sum_j c_j tau^j 改写为关于 (tau - delta) 的系数
+
+    c'_i = sum_{j>=i} C(j, i) c_j delta^(j-i)
+    """
+    n = coefficients.shape[0]
+    shift = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i, n):
+            shift[i, j] = comb(j, i) * delta ** (j - i)
+    return shift @ coefficients
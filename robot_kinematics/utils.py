@@ -77,10 +77,19 @@ def jacobian_matrix(robot, joint_angles):
     返回:
         6xN 雅可比矩阵 (N为关节数)
     """
-    epsilon = 1e-6
     n_joints = len(joint_angles)
     J = np.zeros((6, n_joints))
     
+    # 平面机器人提供解析雅可比时直接使用 (位置行 + 绕Z轴的角速度行)
+    if hasattr(robot, 'jacobian'):
+        J_planar = robot.jacobian(joint_angles)
+        J[:2, :] = J_planar[:2]
+        J[5, :] = J_planar[2]
+        return J
+    
+    epsilon = 1e-6
+    joint_angles = np.array(joint_angles, dtype=float)
+    
     # 计算当前末端位置
     current_pose = robot.forward_kinematics(joint_angles)
     current_pos = current_pose[:3, 3]
@@ -104,4 +113,4 @@ def jacobian_matrix(robot, joint_angles):
         # 这里可以进一步改进为角速度雅可比
         J[3:, i] = np.zeros(3)
     
-    return J 
\ No newline at end of file
+    return J
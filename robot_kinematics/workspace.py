@@ -0,0 +1,71 @@
+"""
+平面串联机器人的工作空间表示
+基于连杆长度的解析圆环模型，替代逐点采样
+"""
+
+import numpy as np
+
+
+class Workspace:
+    """
+    平面转动关节机器人的可达工作空间
+
+    所有关节无限位时，末端可达区域是以基座为圆心的圆环:
+        r_max = sum(L)
+        r_min = max(0, 2*max(L) - sum(L))
+    """
+
+    def __init__(self, link_lengths):
+        """
+        根据连杆长度构建工作空间
+
+        参数:
+            link_lengths: 连杆长度列表 [L1, L2, ...]
+        """
+        self.link_lengths = np.array(link_lengths, dtype=float)
+        total = float(np.sum(self.link_lengths))
+        longest = float(np.max(self.link_lengths))
+
+        self.r_max = total
+        self.r_min = max(0.0, 2.0 * longest - total)
+
+    @property
+    def key(self):
+        """
+        缓存失效键 (由连杆长度决定)
+        """
+        return tuple(self.link_lengths.tolist())
+
+    def contains(self, points, tolerance=1e-9):
+        """
+        判断点是否位于工作空间内
+
+        参数:
+            points: 点坐标，形状 (2,)/(3,) 或 (N, 2)/(N, 3)
+            tolerance: 边界容差
+
+        返回:
+            bool 或 形状 (N,) 的布尔数组
+        """
+        points = np.asarray(points, dtype=float)
+        r = np.hypot(points[..., 0], points[..., 1])
+        return (r >= self.r_min - tolerance) & (r <= self.r_max + tolerance)
+
+    def boundary(self, num_points=200):
+        """
+        计算工作空间的内外边界
+
+        参数:
+            num_points: 每条边界的采样点数量
+
+        返回:
+            outer, inner: 外边界和内边界坐标，形状 (num_points, 2)；
+            r_min为0时inner为None
+        """
+        phi = np.linspace(-np.pi, np.pi, num_points)
+        circle = np.column_stack([np.cos(phi), np.sin(phi)])
+
+        outer = self.r_max * circle
+        inner = self.r_min * circle if self.r_min > 0 else None
+
+        return outer, inner
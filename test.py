@@ -9,8 +9,12 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy.interpolate import CubicSpline
 
-from robot_kinematics import ThreeLinkRobot
+from robot_kinematics import ThreeLinkRobot, Trajectory
+from robot_kinematics import splines
+from robot_kinematics.simplify import simplify_path
+from robot_kinematics.path_planning import PathPlanner
 from dynamics_control import CartDynamics, MPCController
 from visualization import RobotVisualizer, ControlVisualizer
 
@@ -111,6 +115,242 @@ def test_mpc_control():
     return time_array, state_history, control_history, target_state
 
 
+def test_mpc_telemetry_batch():
+    """
+    测试开启遥测时的批量MPC求解
+    """
+    print("\n=== Testing MPC Telemetry (Batch) ===")
+    
+    cart_dynamics = CartDynamics(mass=1.0, damping=0.1)
+    target_state = np.array([2.0, 0.0])
+    # 远离目标的状态会触发控制约束，需要逐个求解约束QP
+    initial_states = np.array([[0.0, 0.0], [-8.0, 0.0], [1.9, 0.0]])
+    
+    for backend, mode in (('cvxpy', 'linear'), ('osqp', 'linear'), ('osqp', 'ltv')):
+        mpc_controller = MPCController(cart_dynamics, horizon=10, dt=0.1, backend=backend, mode=mode)
+        telemetry = mpc_controller.enable_telemetry()
+        actions = mpc_controller.get_control_action_batch(initial_states, target_state)
+        
+        print(f"{backend}/{mode}: actions = {np.round(actions[:, 0], 3)}, records = {telemetry.size}")
+        assert telemetry.size > 0, "批量求解的约束QP没有写入遥测"
+        assert np.all(np.abs(actions[:2, 0]) > 1e-6), "约束QP求解失败 (返回零控制)"
+
+
+def test_lqr_fast_path():
+    """
+    测试LQR快速通道: 约束不起作用时与约束QP的解一致
+    """
+    print("\n=== Testing LQR Fast Path ===")
+    
+    cart_dynamics = CartDynamics(mass=1.0, damping=0.1)
+    target_state = np.array([2.0, 0.0])
+    current_state = np.array([1.8, 0.1])  # 靠近目标，控制和状态都不触及约束
+    
+    fast = MPCController(cart_dynamics, horizon=10, dt=0.1, lqr_fast_path=True)
+    constrained = MPCController(cart_dynamics, horizon=10, dt=0.1, lqr_fast_path=False)
+    u_fast, x_fast = fast.solve_mpc(current_state, target_state)
+    u_qp, x_qp = constrained.solve_mpc(current_state, target_state)
+    
+    error = np.max(np.abs(u_fast - u_qp))
+    print(f"Path stats: {fast.get_path_stats()}")
+    print(f"Max control difference (LQR vs QP): {error:.2e}")
+    assert fast.get_path_stats()['lqr'] == 1, "约束不起作用时应使用LQR快速通道"
+    assert constrained.get_path_stats()['qp'] == 1, "关闭快速通道时应求解约束QP"
+    assert error < 1e-3 * max(1.0, np.max(np.abs(u_qp))), "LQR解与约束QP解不一致"
+    assert np.allclose(x_fast, x_qp, atol=1e-3), "LQR预测状态与约束QP不一致"
+
+
+def test_trapezoid_profile():
+    """
+    测试梯形速度轨迹: 不超过速度和加速度上限，精确到达路径点
+    """
+    print("\n=== Testing Trapezoid Profile ===")
+    
+    vmax = np.array([1.0, 0.5, 2.0])
+    amax = np.array([2.0, 1.0, 4.0])
+    waypoints = np.array([
+        [0.0, 0.0, 0.0],
+        [1.5, -0.8, 0.3],    # 梯形
+        [1.6, -0.75, 0.3],   # 三角形 (距离过短)
+        [-1.0, 0.5, 2.0],
+    ])
+    trajectory = PathPlanner.plan_joint_space(waypoints, vmax, amax)
+    
+    t = np.linspace(trajectory.start_time, trajectory.end_time, 20001)
+    velocity = np.abs(trajectory.velocity(t))
+    acceleration = np.abs(trajectory.acceleration(t))
+    print(f"Duration: {trajectory.duration:.3f}s")
+    print(f"Peak velocity / vmax: {np.max(velocity / vmax):.6f}")
+    print(f"Peak acceleration / amax: {np.max(acceleration / amax):.6f}")
+    assert np.all(velocity <= vmax + 1e-9), "速度超过上限"
+    assert np.all(acceleration <= amax + 1e-9), "加速度超过上限"
+    
+    # 每个路径点都精确落在某个断点上，终点静止
+    positions = trajectory.position(trajectory.breakpoints)
+    reached = [np.min(np.max(np.abs(positions - point), axis=1)) for point in waypoints]
+    print(f"Max waypoint error: {max(reached):.2e}")
+    assert max(reached) < 1e-12, "轨迹没有精确经过路径点"
+    assert np.allclose(trajectory.position(trajectory.end_time), waypoints[-1], atol=1e-12)
+    assert np.allclose(trajectory.velocity(trajectory.end_time), 0.0, atol=1e-12)
+
+
+def test_operational_space_line():
+    """
+    测试操作空间梯形轨迹: 末端在路径点之间走直线，各维度不超过上限
+    """
+    print("\n=== Testing Operational Space Straight Lines ===")
+    
+    vmax = np.array([1.0, 0.4])
+    amax = np.array([1.0, 2.0])
+    waypoints = np.array([[1.5, 0.5], [1.0, 1.2], [0.2, 1.5], [2.0, 1.7]])
+    trajectory = PathPlanner.plan_operational_space(waypoints, vmax, amax)
+    
+    # 按时间把采样点分到各段 (段的起止时刻为到达路径点的断点)
+    positions = trajectory.position(trajectory.breakpoints)
+    arrivals = [trajectory.breakpoints[np.argmin(np.max(np.abs(positions - point), axis=1))] for point in waypoints]
+    max_deviation = 0.0
+    for k in range(len(waypoints) - 1):
+        t = np.linspace(arrivals[k], arrivals[k + 1], 501)
+        points = trajectory.position(t)
+        chord = waypoints[k + 1] - waypoints[k]
+        normal = np.array([-chord[1], chord[0]]) / np.linalg.norm(chord)
+        max_deviation = max(max_deviation, np.max(np.abs((points - waypoints[k]) @ normal)))
+    print(f"Max distance from segment lines: {max_deviation:.2e}")
+    assert max_deviation < 1e-12, "末端偏离了路径点之间的直线"
+    
+    t = np.linspace(trajectory.start_time, trajectory.end_time, 20001)
+    assert np.all(np.abs(trajectory.velocity(t)) <= vmax + 1e-9), "速度超过上限"
+    assert np.all(np.abs(trajectory.acceleration(t)) <= amax + 1e-9), "加速度超过上限"
+
+
+def test_trajectory_slice_concatenate():
+    """
+    测试Trajectory截取与拼接的连续性
+    """
+    print("\n=== Testing Trajectory Slice / Concatenate ===")
+    
+    waypoints = np.array([[0.0, 0.0, 0.0], [1.0, -0.5, 0.2], [0.3, 0.8, -1.0]])
+    trajectory = PathPlanner.plan_joint_space(waypoints, vmax=1.0, amax=2.0, method='quintic')
+    
+    # 在段内截断: 截取部分与原轨迹逐点一致
+    t_cut = trajectory.start_time + 0.37 * trajectory.duration
+    head, tail = trajectory[:t_cut], trajectory[t_cut:]
+    t_tail = np.linspace(t_cut, trajectory.end_time, 1001)
+    slice_error = max(np.max(np.abs(tail.evaluate(t_tail, d) - trajectory.evaluate(t_tail, d))) for d in range(3))
+    print(f"Slice error: {slice_error:.2e}")
+    assert slice_error < 1e-9, "截取后的轨迹与原轨迹不一致"
+    
+    # 重新拼接: 与原轨迹一致，接缝处位置、速度、加速度连续
+    joined = Trajectory.concatenate([head, tail])
+    t = np.linspace(trajectory.start_time, trajectory.end_time, 2001)
+    join_error = np.max(np.abs(joined.position(t) - trajectory.position(t)))
+    seam = [np.max(np.abs(joined.evaluate(t_cut - 1e-9, d) - joined.evaluate(t_cut + 1e-9, d))) for d in range(3)]
+    print(f"Concatenate error: {join_error:.2e}, seam jumps (pos/vel/acc): {[f'{j:.1e}' for j in seam]}")
+    assert abs(joined.duration - trajectory.duration) < 1e-12
+    assert join_error < 1e-9, "拼接后的轨迹与原轨迹不一致"
+    assert max(seam) < 1e-6, "拼接处不连续"
+    
+    # 拼接两条不同的轨迹: 后一条平移到前一条结束时刻
+    second = PathPlanner.plan_joint_space(waypoints[::-1], vmax=1.0, amax=2.0, start_time=100.0)
+    combined = trajectory.append(second)
+    print(f"Combined duration: {combined.duration:.3f}s")
+    assert abs(combined.duration - trajectory.duration - second.duration) < 1e-9
+    assert np.allclose(combined.position(trajectory.end_time), second.position(second.start_time), atol=1e-12)
+
+
+def test_splines():
+    """
+    测试样条插值: 三次样条与scipy一致，五次样条四阶导数连续
+    """
+    print("\n=== Testing Spline Interpolation ===")
+    
+    rng = np.random.default_rng(0)
+    waypoints = rng.uniform(-2.0, 2.0, (12, 3))
+    times = splines.default_knot_times(waypoints, vmax=1.0)
+    t = np.linspace(times[0], times[-1], 5001)
+    
+    for natural, bc_type in ((False, 'clamped'), (True, 'natural')):
+        spline = splines.cubic_spline(times, waypoints, natural=natural)
+        reference = CubicSpline(times, waypoints, bc_type=bc_type)
+        error = max(np.max(np.abs(spline.evaluate(t, d) - reference(t, d))) for d in range(3))
+        print(f"Cubic ({bc_type}) vs scipy CubicSpline: {error:.2e}")
+        assert error < 1e-9, "三次样条与scipy结果不一致"
+    
+    quintic = splines.quintic_spline(times, waypoints)
+    assert np.allclose(quintic.position(times), waypoints, atol=1e-12), "五次样条没有经过路径点"
+    # 节点左侧段在段末的导数与右侧段在段首的导数
+    jumps = np.zeros(5)
+    for knot in times[1:-1]:
+        left, right = quintic[:knot], quintic[knot:]
+        for d in range(5):
+            jumps[d] = max(jumps[d], np.max(np.abs(left.evaluate(knot, d) - right.evaluate(knot, d))))
+    print(f"Quintic jumps at knots (d0..d4): {[f'{j:.1e}' for j in jumps]}")
+    assert np.max(jumps) < 1e-8, "五次样条在节点处不是C4连续"
+    assert np.allclose(quintic.evaluate(times[[0, -1]], 1), 0.0, atol=1e-9)
+    assert np.allclose(quintic.evaluate(times[[0, -1]], 2), 0.0, atol=1e-9)
+
+
+def test_time_optimal_retime():
+    """
+    测试时间最优重新定时: 轨迹不超过速度和加速度上限，几何路径不变
+    """
+    print("\n=== Testing Time-Optimal Retiming (TOPP) ===")
+    
+    rng = np.random.default_rng(1)
+    waypoints = rng.uniform(-2.0, 2.0, (6, 3))
+    vmax = np.array([1.0, 0.8, 1.5])
+    amax = np.array([1.0, 2.0, 0.5])
+    
+    for method in ('quintic', 'cubic', 'trapezoid'):
+        path = PathPlanner.plan_joint_space(waypoints, method=method)
+        retimed = PathPlanner.retime(path, vmax, amax)
+        
+        t = np.linspace(retimed.start_time, retimed.end_time, 100001)
+        v_ratio = np.max(np.abs(retimed.velocity(t)) / vmax)
+        a_ratio = np.max(np.abs(retimed.acceleration(t)) / amax)
+        print(f"{method}: duration {retimed.duration:.3f}s, "
+              f"peak velocity / vmax {v_ratio:.6f}, peak acceleration / amax {a_ratio:.6f}")
+        assert v_ratio <= 1.0 + 1e-6, "重新定时后速度超过上限"
+        assert a_ratio <= 1.0 + 1e-6, "重新定时后加速度超过上限"
+        assert np.allclose(retimed.position(retimed.end_time), waypoints[-1], atol=1e-9), "终点改变"
+        assert np.allclose(retimed.velocity(retimed.end_time), 0.0, atol=1e-6), "终点不是静止的"
+    
+    # 单段直线运动的最优解就是梯形轨迹
+    straight = PathPlanner.plan_joint_space(waypoints[:2], vmax, amax)
+    retimed = PathPlanner.retime(straight, vmax, amax)
+    print(f"Straight move: trapezoid {straight.duration:.6f}s, retimed {retimed.duration:.6f}s")
+    assert abs(retimed.duration - straight.duration) < 1e-3 * straight.duration
+
+
+def test_simplify_path():
+    """
+    测试路径简化: 原路径点到简化折线的距离不超过容差
+    """
+    print("\n=== Testing Path Simplification ===")
+    
+    rng = np.random.default_rng(2)
+    t = np.linspace(0.0, 2.0 * np.pi, 2000)
+    points = np.column_stack([np.cos(t) * (1.5 + 0.2 * np.sin(5 * t)), np.sin(t), np.zeros_like(t)])
+    points += rng.normal(0.0, 1e-4, points.shape)
+    
+    for tolerance in (0.001, 0.01, 0.1):
+        simplified, indices = simplify_path(points, tolerance)
+        
+        # 每个原路径点到其所在简化线段的距离
+        deviation = 0.0
+        for first, last in zip(indices[:-1], indices[1:]):
+            start, end = points[first], points[last]
+            direction = end - start
+            u = np.clip((points[first:last + 1] - start) @ direction / (direction @ direction), 0.0, 1.0)
+            distance = np.linalg.norm(points[first:last + 1] - start - u[:, np.newaxis] * direction, axis=1)
+            deviation = max(deviation, distance.max())
+        
+        print(f"tolerance {tolerance}: {len(points)} -> {len(simplified)} points, max deviation {deviation:.5f}")
+        assert deviation <= tolerance, "简化后的路径偏差超过容差"
+        assert indices[0] == 0 and indices[-1] == len(points) - 1, "没有保留首尾点"
+        assert np.array_equal(simplified, points[indices])
+
+
 def visualize_results():
     """
     可视化结果
@@ -183,8 +423,18 @@ def main():
         # 测试逆向运动学
         test_inverse_kinematics()
         
+        # 测试轨迹规划
+        test_trapezoid_profile()
+        test_operational_space_line()
+        test_trajectory_slice_concatenate()
+        test_splines()
+        test_time_optimal_retime()
+        test_simplify_path()
+        
         # 测试MPC控制
         test_mpc_control()
+        test_lqr_fast_path()
+        test_mpc_telemetry_batch()
         
         # 可视化结果
         visualize_results()
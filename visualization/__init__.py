@@ -5,5 +5,6 @@ Contains visualization for robot kinematics and control results
 
 from .robot_visualizer import RobotVisualizer
 from .control_visualizer import ControlVisualizer
+from .export import OffscreenRenderer, export_robot_motion
 
-__all__ = ['RobotVisualizer', 'ControlVisualizer'] 
\ No newline at end of file
+__all__ = ['RobotVisualizer', 'ControlVisualizer', 'OffscreenRenderer', 'export_robot_motion'] 
\ No newline at end of file
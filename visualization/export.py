@@ -0,0 +1,340 @@
+"""
+离屏批量导出
+在Agg画布上渲染预先计算的关节轨迹，逐帧写入视频、图像序列或无压缩RGBA文件，
+不需要显示器，也不在内存中保存所有帧；可按帧区间分片到多个进程并行渲染
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Annulus
+from PIL import Image
+
+from robot_kinematics import ThreeLinkRobot
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.avi', '.webm')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+RAW_EXTENSIONS = ('.rgba', '.raw')
+
+
+class OffscreenRenderer:
+    """
+    机器人构型的离屏渲染器
+
+    直接使用Figure和FigureCanvasAgg (不经过pyplot，与当前后端无关)。
+    坐标轴、网格和工作空间作为静态背景只绘制一次并缓存，
+    每帧恢复背景后只绘制连杆、关节和目标点。
+    """
+
+    def __init__(self, robot, figsize=(6, 6), dpi=100, title='Robot Motion', show_workspace=True,
+                 show_target=False):
+        """
+        参数:
+            robot: ThreeLinkRobot 对象
+            figsize: 图像尺寸 (英寸)
+            dpi: 分辨率
+            title: 标题
+            show_workspace: 是否显示工作空间
+            show_target: 是否显示目标点
+        """
+        self.robot = robot
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        ax = self.figure.add_subplot(1, 1, 1)
+        self.ax = ax
+
+        max_reach = sum(robot.link_lengths)
+        ax.set_xlim(-max_reach * 1.2, max_reach * 1.2)
+        ax.set_ylim(-max_reach * 1.2, max_reach * 1.2)
+        ax.set_xlabel('X (m)')
+        ax.set_ylabel('Y (m)')
+        ax.set_title(title)
+        ax.grid(True)
+        ax.set_aspect('equal')
+        if show_workspace:
+            workspace = robot.get_workspace()
+            ax.add_patch(Annulus((0, 0), workspace.r_max, workspace.r_max - workspace.r_min,
+                                 facecolor='lightblue', edgecolor='none', alpha=0.3))
+
+        self.links_line, = ax.plot([], [], 'b-', linewidth=3, animated=True)
+        self.joints_line, = ax.plot([], [], 'ro', markersize=8, linestyle='none', animated=True)
+        self.target_marker, = ax.plot([], [], 'g*', markersize=15, animated=True)
+        self.target_marker.set_visible(show_target)
+
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        width, height = self.canvas.get_width_height()
+        self.size = (width, height)
+
+    def render(self, joint_positions, target=None):
+        """
+        渲染一帧
+
+        参数:
+            joint_positions: 各关节 (含基座和末端) 的位置，形状 (n_joints+1, 2或3)
+            target: 目标位置 (可选)
+
+        返回:
+            RGBA图像，形状 (height, width, 4)，uint8；
+            是画布缓冲区的视图，下一次render时会被覆盖
+        """
+        self.canvas.restore_region(self.background)
+        self.links_line.set_data(joint_positions[:, 0], joint_positions[:, 1])
+        self.joints_line.set_data(joint_positions[:, 0], joint_positions[:, 1])
+        self.ax.draw_artist(self.links_line)
+        self.ax.draw_artist(self.joints_line)
+        if target is not None and self.target_marker.get_visible():
+            self.target_marker.set_data([target[0]], [target[1]])
+            self.ax.draw_artist(self.target_marker)
+        return np.asarray(self.canvas.buffer_rgba())
+
+
+class ImageSequenceWriter:
+    """
+    逐帧写入图像文件 (PNG等)
+    """
+
+    def __init__(self, pattern, start_index=0, compress_level=1):
+        """
+        参数:
+            pattern: 文件名格式，例如 'frames/frame_{:05d}.png'
+            start_index: 第一帧的编号
+            compress_level: PNG压缩级别 (0-9，越小越快)
+        """
+        self.pattern = pattern
+        self.index = start_index
+        self.compress_level = compress_level
+        directory = os.path.dirname(pattern.format(start_index))
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame):
+        path = self.pattern.format(self.index)
+        image = Image.frombuffer('RGBA', (frame.shape[1], frame.shape[0]), np.ascontiguousarray(frame),
+                                 'raw', 'RGBA', 0, 1)
+        if path.lower().endswith(('.jpg', '.jpeg', '.bmp')):
+            image = image.convert('RGB')
+        image.save(path, compress_level=self.compress_level)
+        self.index += 1
+
+    def close(self):
+        pass
+
+
+class RawFrameWriter:
+    """
+    逐帧写入无压缩RGBA文件
+
+    文件没有文件头，各帧 (height, width, 4) 的uint8数据按帧序号首尾相接，
+    第k帧位于偏移 k * width * height * 4 处，因此多个进程可以各自写入自己的帧区间。
+    读取: np.fromfile(path, np.uint8).reshape(-1, height, width, 4)；
+    转码: ffmpeg -f rawvideo -pix_fmt rgba -s WxH -r fps -i path out.mp4
+    """
+
+    def __init__(self, path, size, start_index=0):
+        """
+        参数:
+            path: 输出文件 (必须已存在，由调用方创建或清空)
+            size: (width, height)
+            start_index: 第一帧的编号
+        """
+        width, height = size
+        self.file = open(path, 'r+b')
+        self.file.seek(start_index * width * height * 4)
+
+    def write(self, frame):
+        self.file.write(np.ascontiguousarray(frame).data)
+
+    def close(self):
+        self.file.close()
+
+
+def _ffmpeg_path():
+    path = shutil.which(rcParams['animation.ffmpeg_path'])
+    if path is None:
+        raise RuntimeError("导出视频需要ffmpeg (可设置 matplotlib.rcParams['animation.ffmpeg_path'])，"
+                           "或导出为图像序列")
+    return path
+
+
+class VideoWriter:
+    """
+    通过管道把原始RGBA帧写给ffmpeg编码
+    """
+
+    def __init__(self, path, fps, size, codec='libx264', extra_args=None):
+        """
+        参数:
+            path: 输出文件
+            fps: 帧率
+            size: (width, height)
+            codec: 视频编码器
+            extra_args: 额外的ffmpeg输出参数列表
+        """
+        width, height = size
+        command = [
+            _ffmpeg_path(), '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+            '-an', '-vcodec', codec, '-pix_fmt', 'yuv420p',
+            # yuv420p要求宽高为偶数
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+        ]
+        if codec == 'libx264':
+            command += ['-preset', 'ultrafast']
+        command += list(extra_args or []) + [path]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(np.ascontiguousarray(frame).data)
+
+    def close(self):
+        self.process.stdin.close()
+        error = self.process.stderr.read()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg编码失败: {error.decode(errors='replace')}")
+
+
+def _output_kind(path):
+    """
+    按路径判断输出类型 ('video'、'raw' 或 'images')，并返回图像序列的文件名格式
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if '{' in path:
+        return 'images', path
+    if extension in VIDEO_EXTENSIONS:
+        return 'video', path
+    if extension in RAW_EXTENSIONS:
+        return 'raw', path
+    if extension in IMAGE_EXTENSIONS:
+        stem, extension = os.path.splitext(path)
+        return 'images', stem + '_{:05d}' + extension
+    if extension == '':
+        return 'images', os.path.join(path, 'frame_{:05d}.png')
+    raise ValueError(f"不支持的输出格式: {path}，可用视频格式 {VIDEO_EXTENSIONS}、"
+                     f"无压缩格式 {RAW_EXTENSIONS} 或图像序列")
+
+
+def _open_writer(kind, path, size, start_index, writer_options):
+    if kind == 'video':
+        return VideoWriter(path, writer_options['fps'], size, writer_options['codec'])
+    if kind == 'raw':
+        return RawFrameWriter(path, size, start_index)
+    return ImageSequenceWriter(path, start_index, writer_options['compress_level'])
+
+
+def _render_frames(robot, joint_angles, targets, kind, path, start_index, writer_options, render_options):
+    """
+    渲染一段帧并写入输出 (写入器按渲染器的画布尺寸打开)
+    """
+    render_options = dict(render_options)
+    render_options.setdefault('show_target', targets is not None)
+    renderer = OffscreenRenderer(robot, **render_options)
+    writer = _open_writer(kind, path, renderer.size, start_index, writer_options)
+    try:
+        _, positions = robot.forward_kinematics_batch(joint_angles)
+        for i, joint_positions in enumerate(positions):
+            writer.write(renderer.render(joint_positions, None if targets is None else targets[i]))
+    finally:
+        writer.close()
+
+
+def _render_chunk(task):
+    link_lengths, joint_angles, targets, kind, path, start_index, writer_options, render_options = task
+    _render_frames(ThreeLinkRobot(link_lengths=link_lengths), joint_angles, targets, kind, path, start_index,
+                   writer_options, render_options)
+
+
+def export_robot_motion(robot, joint_angle_sequence, path, fps=30, target_positions=None, n_workers=1,
+                        chunk_size=None, codec='libx264', compress_level=1, **render_options):
+    """
+    离屏导出机器人运动
+
+    每帧渲染后立即写入视频编码器或文件，内存占用与帧数无关。
+    n_workers > 1 时按帧区间分片到进程池: 图像序列和无压缩文件由各进程直接写各自的帧；
+    视频由各进程编码各自的片段，最后用ffmpeg无损拼接。
+
+    渲染每帧不到1 ms，PNG编码则需要数毫秒，是图像序列导出的主要开销；
+    需要最快导出时使用无压缩的 .rgba 文件，之后再离线转码。
+
+    参数:
+        robot: ThreeLinkRobot 对象
+        joint_angle_sequence: 关节角度序列，形状 (N, n_joints)
+        path: 输出路径。视频: .mp4/.mkv/.mov/.avi/.webm (需要ffmpeg)；
+              无压缩RGBA: .rgba/.raw (格式见RawFrameWriter)；
+              图像序列: 含格式占位符的文件名 (例如 'out/frame_{:05d}.png')、
+              图像文件名 (自动加帧编号) 或目录
+        fps: 帧率
+        target_positions: 每帧的目标位置，形状 (N, 2或3) (可选)
+        n_workers: 进程数 (None为CPU核数)
+        chunk_size: 每个分片的帧数 (默认平均分给各进程)
+        codec: 视频编码器
+        compress_level: PNG压缩级别 (0-9，0最快、文件最大)
+        **render_options: 传给OffscreenRenderer的参数 (figsize, dpi, title, show_workspace, show_target)
+
+    返回:
+        写入的帧数
+    """
+    joint_angles = np.atleast_2d(np.asarray(joint_angle_sequence, dtype=float))
+    targets = None if target_positions is None else np.asarray(target_positions, dtype=float)
+    n_frames = len(joint_angles)
+    kind, output = _output_kind(path)
+    writer_options = {'fps': fps, 'codec': codec, 'compress_level': compress_level}
+    if kind == 'raw':
+        # 创建或清空输出文件，各写入器按帧偏移写入
+        open(output, 'wb').close()
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-n_frames // max(n_workers, 1)))
+    ranges = [(start, min(start + chunk_size, n_frames)) for start in range(0, n_frames, chunk_size)]
+
+    if n_workers <= 1 or len(ranges) <= 1:
+        _render_frames(robot, joint_angles, targets, kind, output, 0, writer_options, render_options)
+        return n_frames
+
+    link_lengths = list(robot.link_lengths)
+    with tempfile.TemporaryDirectory() as workdir:
+        if kind == 'video':
+            extension = os.path.splitext(output)[1]
+            parts = [os.path.join(workdir, f'part{k:05d}{extension}') for k in range(len(ranges))]
+        else:
+            parts = [output] * len(ranges)
+
+        tasks = [
+            (link_lengths, joint_angles[start:stop], None if targets is None else targets[start:stop],
+             kind, part, start, writer_options, render_options)
+            for (start, stop), part in zip(ranges, parts)
+        ]
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as executor:
+            # 消费迭代器以传播工作进程中的异常
+            for _ in executor.map(_render_chunk, tasks):
+                pass
+
+        if kind == 'video':
+            _concatenate_videos(parts, output, workdir)
+    return n_frames
+
+
+def _concatenate_videos(parts, output, workdir):
+    """
+    用ffmpeg concat按顺序拼接视频片段 (不重新编码)
+    """
+    listing = os.path.join(workdir, 'parts.txt')
+    with open(listing, 'w') as f:
+        for part in parts:
+            f.write(f"file '{part}'\n")
+    result = subprocess.run(
+        [_ffmpeg_path(), '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', listing,
+         '-c', 'copy', output],
+        stderr=subprocess.PIPE
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg拼接失败: {result.stderr.decode(errors='replace')}")
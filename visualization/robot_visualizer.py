@@ -5,8 +5,11 @@ Robot Kinematics Visualization
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from matplotlib.patches import Annulus
 from mpl_toolkits.mplot3d import Axes3D
 
+from .export import export_robot_motion
+
 
 class RobotVisualizer:
     """
@@ -61,9 +64,7 @@ class RobotVisualizer:
         
         # Show workspace
         if show_workspace:
-            x_coords, y_coords = self.robot.get_workspace_boundary()
-            self.ax.scatter(x_coords, y_coords, c='lightblue', alpha=0.3, 
-                           s=1, label='Workspace')
+            self.ax.add_patch(self.create_workspace_artist())
         
         # Set plot properties
         self.ax.set_xlabel('X (m)')
@@ -81,6 +82,27 @@ class RobotVisualizer:
         plt.tight_layout()
         plt.show()
     
+    def create_workspace_artist(self, facecolor='lightblue', alpha=0.3, label='Workspace'):
+        """
+        Create a patch artist for the robot workspace
+
+        The annulus comes from the robot's cached analytic workspace, so
+        building it is cheap and the same artist can be re-added to an axes
+        after it has been cleared.
+
+        Parameters:
+            facecolor: Fill color
+            alpha: Fill transparency
+            label: Legend label
+
+        Returns:
+            patch: matplotlib Annulus patch
+        """
+        workspace = self.robot.get_workspace()
+        width = workspace.r_max - workspace.r_min
+        return Annulus((0, 0), workspace.r_max, width, facecolor=facecolor,
+                       edgecolor='none', alpha=alpha, label=label)
+    
     def _calculate_joint_positions(self, joint_angles):
         """
         Calculate joint positions
@@ -91,24 +113,15 @@ class RobotVisualizer:
         Returns:
             joint_positions: List of joint positions
         """  
-        joint_positions = [np.array([0, 0])]  # Base position
-        
-        # Accumulate joint angles
-        cumulative_theta = 0
-        
-        for i, length in enumerate(self.robot.link_lengths):
-            cumulative_theta += joint_angles[i]
-            
-            # Calculate current joint position
-            x = joint_positions[-1][0] + length * np.cos(cumulative_theta)
-            y = joint_positions[-1][1] + length * np.sin(cumulative_theta)
-            
-            joint_positions.append(np.array([x, y]))
-        
-        return joint_positions
+        # Batched FK on a single configuration (base, joints and end effector)
+        _, positions = self.robot.forward_kinematics_batch(
+            np.asarray(joint_angles, dtype=float)[np.newaxis, :]
+        )
+
+        return list(positions[0, :, :2])
     
     def animate_robot_motion(self, joint_angle_sequence, target_positions=None, 
-                           interval=100, save_path=None):
+                           interval=100, save_path=None, show=True, n_workers=1):
         """
         动画显示机器人运动
         
@@ -116,8 +129,21 @@ class RobotVisualizer:
             joint_angle_sequence: 关节角度序列
             target_positions: 目标位置序列
             interval: 动画间隔 (ms)
-            save_path: 保存路径
+            save_path: 保存路径。视频或图像序列用离屏渲染逐帧导出 (见export_motion)，
+                       .gif仍通过FuncAnimation保存
+            show: 是否显示动画窗口 (无显示器的服务器上设为False)
+            n_workers: 离屏导出的进程数
+        
+        返回:
+            FuncAnimation对象；show=False且已离屏导出时为None
         """
+        if save_path and not save_path.lower().endswith('.gif'):
+            self.export_motion(joint_angle_sequence, save_path, fps=1000.0 / interval,
+                               target_positions=target_positions, n_workers=n_workers,
+                               title='Robot Motion Animation')
+            save_path = None
+            if not show:
+                return None
         
         fig, ax = plt.subplots(figsize=(10, 8))
         
@@ -185,9 +211,28 @@ class RobotVisualizer:
         if save_path:
             anim.save(save_path, writer='pillow')
         
-        plt.show()
+        if show:
+            plt.show()
         return anim
     
+    def export_motion(self, joint_angle_sequence, path, fps=30, target_positions=None, n_workers=1, **kwargs):
+        """
+        离屏导出机器人运动为视频或图像序列 (不需要显示器，帧不保存在内存中)
+        
+        参数:
+            joint_angle_sequence: 关节角度序列，形状 (N, n_joints)
+            path: 输出路径，.mp4等视频文件 (需要ffmpeg)、无压缩的.rgba文件 (最快)、图像文件名格式或目录
+            fps: 帧率
+            target_positions: 目标位置序列
+            n_workers: 渲染进程数
+            **kwargs: 传给export_robot_motion的其他参数 (figsize, dpi, chunk_size, compress_level, show_target等)
+        
+        返回:
+            导出的帧数
+        """
+        return export_robot_motion(self.robot, joint_angle_sequence, path, fps=fps,
+                                   target_positions=target_positions, n_workers=n_workers, **kwargs)
+    
     def plot_workspace(self, num_points=1000):
         """
         绘制机器人工作空间